@@ -3,11 +3,12 @@ from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime
 import json
+import time
 from typing import Any, Awaitable, Coroutine, Optional, Dict, TypedDict
 import uuid
 import models
 
-from python.helpers import extract_tools, rate_limiter, files, errors, history, tokens
+from python.helpers import extract_tools, rate_limiter, files, errors, history, tokens, prompt_cache, tracing, metrics, utility_cache
 from python.helpers import dirty_json
 from python.helpers.print_style import PrintStyle
 from langchain_core.prompts import (
@@ -71,6 +72,8 @@ class AgentContext:
         context = AgentContext._contexts.pop(id, None)
         if context and context.task:
             context.task.kill()
+        if context and context.config.code_exec_docker_pool_size > 0:
+            context.release_container()
         return context
 
     def serialize(self):
@@ -95,8 +98,16 @@ class AgentContext:
         if self.task:
             self.task.kill()
 
+    def release_container(self):
+        from python.helpers.docker import DockerContainerPool
+
+        # pooled execution container goes back to be recycled
+        DockerContainerPool.release_owner(self.id)
+
     def reset(self):
         self.kill_process()
+        if self.config.code_exec_docker_pool_size > 0:
+            self.release_container()
         self.log.reset()
         self.agent0 = Agent(0, self.config, self)
         self.streaming_agent = None
@@ -191,6 +202,7 @@ class AgentConfig:
     code_exec_docker_ports: dict[str, int] = field(
         default_factory=lambda: {"22/tcp": 55022, "80/tcp": 55080}
     )
+    code_exec_docker_pool_size: int = 0  # warm containers kept ready, 0 disables the pool
     code_exec_docker_volumes: dict[str, dict[str, str]] = field(
         default_factory=lambda: {
             files.get_base_dir(): {"bind": "/a0", "mode": "rw"},
@@ -202,6 +214,13 @@ class AgentConfig:
     code_exec_ssh_port: int = 55022
     code_exec_ssh_user: str = "root"
     code_exec_ssh_pass: str = ""
+    code_exec_kernels: bool = False
+    search_engines: list[str] = field(default_factory=lambda: ["searxng"])  # searxng, duckduckgo, perplexity
+    prompt_cache_layout: bool = False  # keep a stable prompt prefix for provider prompt caching
+    subordinate_concurrency: int = 3  # sibling subordinates running at once when call_subordinate fans out
+    multi_tool: bool = False  # accept a "tool_calls" list of tool requests in one response
+    recall_direct: bool = True  # recall with the recent messages as query, utility model query only for poor results
+    utility_cache: bool = True  # reuse utility model responses for identical model, system and message
     additional: Dict[str, Any] = field(default_factory=dict)
 
 
@@ -245,7 +264,9 @@ class Agent:
 
     DATA_NAME_SUPERIOR = "_superior"
     DATA_NAME_SUBORDINATE = "_subordinate"
+    DATA_NAME_SUBORDINATES = "_subordinates"  # siblings of the last call_subordinate fan-out
     DATA_NAME_CTX_WINDOW = "ctx_window"
+    DATA_NAME_CTX_PROMPT = "_ctx_prompt"  # not persisted, rendered into the ctx window on request
 
     def __init__(
         self, number: int, config: AgentConfig, context: AgentContext | None = None
@@ -262,12 +283,27 @@ class Agent:
         self.agent_name = f"Agent {self.number}"
 
         self.history = history.History(self)
+        self.history_cache = history.LangchainCache()
+        self.system_tokens: tuple[str, int] = ("", 0)
         self.last_user_message: history.Message | None = None
         self.intervention: UserMessage | None = None
         self.data = {}  # free data object all the tools can use
 
+    def get_agent_tree(self) -> list["Agent"]:
+        """This agent, its subordinate chain and all fan-out siblings below them."""
+        result = []
+        stack: list[Agent] = [self]
+        while stack:
+            agent = stack.pop()
+            result.append(agent)
+            stack.extend(reversed(agent.get_data(Agent.DATA_NAME_SUBORDINATES) or []))
+            if subordinate := agent.get_data(Agent.DATA_NAME_SUBORDINATE):
+                stack.append(subordinate)
+        return result
+
     async def monologue(self):
         while True:
+            monologue_span = tracing.span("agent.monologue", agent=self.agent_name, context=self.context.id)
             try:
                 # loop data dictionary to pass to extensions
                 self.loop_data = LoopData(user_message=self.last_user_message)
@@ -279,13 +315,17 @@ class Agent:
                 # let the agent run message loop until he stops it with a response tool
                 while True:
 
-                    self.context.streaming_agent = self  # mark self as current streamer
+                    if not self.is_fan_out_sibling():
+                        self.context.streaming_agent = self  # mark self as current streamer
                     self.loop_data.iteration += 1
 
                     # call message_loop_start extensions
                     await self.call_extensions("message_loop_start", loop_data=self.loop_data)
 
                     try:
+                        # opened inside the try so the finally below always ends it
+                        iteration_span = tracing.span("agent.iteration", iteration=self.loop_data.iteration)
+
                         # prepare LLM chain (model, system, history)
                         prompt = await self.prepare_prompt(loop_data=self.loop_data)
 
@@ -347,6 +387,8 @@ class Agent:
                         self.handle_critical_exception(e)
 
                     finally:
+                        # ended first, a failing message_loop_end extension must not leave it open
+                        iteration_span.end()
                         # call message_loop_end extensions
                         await self.call_extensions(
                             "message_loop_end", loop_data=self.loop_data
@@ -358,10 +400,13 @@ class Agent:
             except Exception as e:
                 self.handle_critical_exception(e)
             finally:
-                self.context.streaming_agent = None  # unset current streamer
+                if not self.is_fan_out_sibling():
+                    self.context.streaming_agent = None  # unset current streamer
+                monologue_span.end()
                 # call monologue_end extensions
                 await self.call_extensions("monologue_end", loop_data=self.loop_data)  # type: ignore
 
+    @tracing.traced("agent.prepare_prompt")
     async def prepare_prompt(self, loop_data: LoopData) -> ChatPromptTemplate:
         # call extensions before setting prompts
         await self.call_extensions("message_loop_prompts_before", loop_data=loop_data)
@@ -386,28 +431,43 @@ class Agent:
                 ))).output()
         loop_data.extras_temporary.clear()
 
-        # convert history + extras to LLM format
-        history_langchain: list[BaseMessage] = history.output_langchain(
-            loop_data.history_output + extras
-        )
+        system_text = "\n\n".join(loop_data.system)
+        provider = self.config.chat_model.provider
+        if self.config.prompt_cache_layout and prompt_cache.supports_breakpoints(provider):
+            # history and extras converted separately, cache breakpoints go between them
+            history_langchain: list[BaseMessage] = self.history_cache.convert(
+                loop_data.history_output
+            )
+            frozen = self.history_cache.message_count(self.history.get_frozen_output_count())
+            messages = prompt_cache.mark_breakpoints(
+                system_text, history_langchain, frozen, history.output_langchain(extras)
+            )
+        else:
+            # convert history + extras to LLM format, unchanged messages are reused from the last iteration
+            history_langchain: list[BaseMessage] = self.history_cache.convert(
+                loop_data.history_output + extras
+            )
+            messages = [SystemMessage(content=system_text), *history_langchain]
 
         # build chain from system prompt, message history and model
-        system_text = "\n\n".join(loop_data.system)
         prompt = ChatPromptTemplate.from_messages(
             [
-                SystemMessage(content=system_text),
-                *history_langchain,
+                *messages,
                 # AIMessage(content="JSON:"), # force the LLM to start with json
             ]
         )
 
-        # store as last context window content
+        # system prompt is mostly the same between iterations
+        if self.system_tokens[0] != system_text:
+            self.system_tokens = (system_text, tokens.approximate_tokens(system_text))
+
+        # store as last context window content, the text is only rendered when requested
+        self.set_data(Agent.DATA_NAME_CTX_PROMPT, prompt)
         self.set_data(
             Agent.DATA_NAME_CTX_WINDOW,
             {
-                "text": prompt.format(),
                 "tokens": self.history.get_tokens()
-                + tokens.approximate_tokens(system_text)
+                + self.system_tokens[1]
                 + tokens.approximate_tokens(history.output_text(extras)),
             },
         )
@@ -472,6 +532,11 @@ class Agent:
         prompt = files.remove_code_fences(prompt)
         return prompt
 
+    def is_fan_out_sibling(self) -> bool:
+        # siblings run concurrently, their superior stays the streaming agent and forwards interventions
+        superior = self.get_data(Agent.DATA_NAME_SUPERIOR)
+        return bool(superior) and self in (superior.get_data(Agent.DATA_NAME_SUBORDINATES) or [])
+
     def get_data(self, field: str):
         return self.data.get(field, None)
 
@@ -532,11 +597,15 @@ class Agent:
         return self.history.output_text(human_label="user", ai_label="assistant")
 
     def get_chat_model(self):
+        kwargs = self.config.chat_model.kwargs
+        if self.config.prompt_cache_layout:
+            # usage metadata with cached token counts
+            kwargs = {**prompt_cache.model_kwargs(self.config.chat_model.provider), **kwargs}
         return models.get_model(
             models.ModelType.CHAT,
             self.config.chat_model.provider,
             self.config.chat_model.name,
-            **self.config.chat_model.kwargs,
+            **kwargs,
         )
 
     def get_utility_model(self):
@@ -555,13 +624,30 @@ class Agent:
             **self.config.embeddings_model.kwargs,
         )
 
+    @tracing.traced("agent.call_utility_model")
     async def call_utility_model(
         self,
         system: str,
         message: str,
         callback: Callable[[str], Awaitable[None]] | None = None,
         background: bool = False,
+        cache: bool = True,
     ):
+        # identical requests are answered from the disk cache, call sites opt out with cache=False
+        cache_key = ""
+        if cache and self.config.utility_cache:
+            model_config = self.config.utility_model
+            cache_key = utility_cache.get_key(
+                model_config.provider.name, model_config.name, model_config.kwargs, system, message
+            )
+            cached = await asyncio.to_thread(utility_cache.read, cache_key)
+            metrics.UTILITY_CACHE.inc(result="hit" if cached is not None else "miss")
+            if cached is not None:
+                tracing.current().set(cached=True)
+                if callback:
+                    await callback(cached)
+                return cached
+
         prompt = ChatPromptTemplate.from_messages(
             [SystemMessage(content=system), HumanMessage(content=message)]
         )
@@ -576,18 +662,25 @@ class Agent:
             self.config.utility_model, prompt.format(), background
         )
 
+        stats = _StreamStats(self.config.utility_model)
         async for chunk in (prompt | model).astream({}):
             await self.handle_intervention()  # wait for intervention and handle it, if paused
 
             content = models.parse_chunk(chunk)
-            limiter.add(output=tokens.approximate_tokens(content))
+            output_tokens = tokens.approximate_tokens(content)
+            limiter.add(output=output_tokens)
+            stats.add(output_tokens)
             response += content
 
             if callback:
                 await callback(content)
 
+        stats.end()
+        if cache_key and response:
+            await asyncio.to_thread(utility_cache.write, cache_key, response)
         return response
 
+    @tracing.traced("agent.call_chat_model")
     async def call_chat_model(
         self,
         prompt: ChatPromptTemplate,
@@ -598,23 +691,50 @@ class Agent:
         # model class
         model = self.get_chat_model()
 
-        # rate limiter
-        limiter = await self.rate_limiter(self.config.chat_model, prompt.format())
+        # rate limiter, token count of the prepared prompt is already known
+        window = self.get_data(Agent.DATA_NAME_CTX_WINDOW)
+        if window and self.get_data(Agent.DATA_NAME_CTX_PROMPT) is prompt:
+            limiter = await self.rate_limiter(
+                self.config.chat_model, "", input_tokens=window["tokens"]
+            )
+        else:
+            limiter = await self.rate_limiter(self.config.chat_model, prompt.format())
 
+        usage = None
+        stats = _StreamStats(self.config.chat_model)
         async for chunk in (prompt | model).astream({}):
             await self.handle_intervention()  # wait for intervention and handle it, if paused
 
+            # usage metadata, anthropic splits it between the first and last chunk
+            if chunk_usage := prompt_cache.parse_usage(chunk):
+                usage = usage or prompt_cache.Usage()
+                usage.add(chunk_usage)
+
             content = models.parse_chunk(chunk)
-            limiter.add(output=tokens.approximate_tokens(content))
+            output_tokens = tokens.approximate_tokens(content)
+            limiter.add(output=output_tokens)
+            stats.add(output_tokens)
             response += content
 
             if callback:
                 await callback(content, response)
 
+        stats.end(usage)
+        if usage:
+            prompt_cache.record_usage(
+                self.config.chat_model.provider, self.config.chat_model.name, usage
+            )
+            if window and self.get_data(Agent.DATA_NAME_CTX_PROMPT) is prompt:
+                window["usage"] = usage.output()
+
         return response
 
     async def rate_limiter(
-        self, model_config: ModelConfig, input: str, background: bool = False
+        self,
+        model_config: ModelConfig,
+        input: str,
+        background: bool = False,
+        input_tokens: int = 0,
     ):
         # rate limiter log
         wait_log = None
@@ -640,9 +760,15 @@ class Agent:
             model_config.limit_input,
             model_config.limit_output,
         )
-        limiter.add(input=tokens.approximate_tokens(input))
+        input_tokens = input_tokens or tokens.approximate_tokens(input)
+        limiter.add(input=input_tokens)
         limiter.add(requests=1)
-        await limiter.wait(callback=wait_callback)
+        labels = {"provider": model_config.provider.name, "model": model_config.name}
+        metrics.MODEL_REQUESTS.inc(**labels)
+        metrics.MODEL_INPUT_TOKENS.inc(input_tokens, **labels)
+        with tracing.span("rate_limiter.wait", model=model_config.name):
+            with metrics.Timer(metrics.RATE_LIMIT_WAIT, **labels):
+                await limiter.wait(callback=wait_callback)
         return limiter
 
     async def handle_intervention(self, progress: str = ""):
@@ -663,36 +789,72 @@ class Agent:
         while self.context.paused:
             await asyncio.sleep(0.1)
 
+    @tracing.traced("agent.process_tools")
     async def process_tools(self, msg: str):
         # search for tool usage requests in agent message
         tool_request = extract_tools.json_parse_dirty(msg)
+        tools = self.get_requested_tools(tool_request, msg) if tool_request is not None else []
+
+        if tools:
+            # consecutive read-only tools run concurrently, the others one by one in order
+            batches: list[list] = []
+            for tool in tools:
+                if tool.read_only and batches and batches[-1][0].read_only:
+                    batches[-1].append(tool)
+                else:
+                    batches.append([tool])
+
+            for batch in batches:
+                responses = await self.execute_tools(batch)
+                # results go to history in request order
+                for tool, response in zip(batch, responses):
+                    await tool.after_execution(response)
+                    await self.handle_intervention()  # wait if paused and handle intervention message if needed
+                    if response.break_loop:
+                        return response.message
+        else:
+            msg = self.read_prompt("fw.msg_misformat.md")
+            self.hist_add_warning(msg)
+            PrintStyle(font_color="red", padding=True).print(msg)
+            self.context.log.log(
+                type="error", content=f"{self.agent_name}: Message misformat"
+            )
+
+    def get_requested_tools(self, tool_request: dict, message: str) -> list:
+        requests = [tool_request]
+        if self.config.multi_tool and isinstance(tool_request.get("tool_calls"), list):
+            requests = [r for r in tool_request["tool_calls"] if isinstance(r, dict)]
 
-        if tool_request is not None:
-            tool_name = tool_request.get("tool_name", "")
+        tools = []
+        for request in requests:
+            tool_name = request.get("tool_name", "")
             tool_method = None
-            tool_args = tool_request.get("tool_args", {})
+            tool_args = request.get("tool_args", {})
 
             if ":" in tool_name:
                 tool_name, tool_method = tool_name.split(":", 1)
 
-            tool = self.get_tool(name=tool_name, method=tool_method, args=tool_args, message=msg)
+            tools.append(self.get_tool(name=tool_name, method=tool_method, args=tool_args, message=message))
+        return tools
 
+    async def execute_tools(self, tools: list):
+        for tool in tools:
             await self.handle_intervention()  # wait if paused and handle intervention message if needed
-            await tool.before_execution(**tool_args)
-            await self.handle_intervention()  # wait if paused and handle intervention message if needed
-            response = await tool.execute(**tool_args)
-            await self.handle_intervention()  # wait if paused and handle intervention message if needed
-            await tool.after_execution(response)
-            await self.handle_intervention()  # wait if paused and handle intervention message if needed
-            if response.break_loop:
-                return response.message
-        else:
-            msg = self.read_prompt("fw.msg_misformat.md")
-            self.hist_add_warning(msg)
-            PrintStyle(font_color="red", padding=True).print(msg)
-            self.context.log.log(
-                type="error", content=f"{self.agent_name}: Message misformat"
-            )
+            await tool.before_execution(**tool.args)
+        await self.handle_intervention()  # wait if paused and handle intervention message if needed
+
+        async def execute(tool):
+            with tracing.span(f"tool.{tool.name}", method=tool.method or ""):
+                return await tool.execute(**tool.args)
+
+        if len(tools) == 1:
+            return [await execute(tools[0])]
+        # let every tool finish before raising, no task is left running behind the loop
+        results = await asyncio.gather(*[execute(tool) for tool in tools], return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
 
     def log_from_stream(self, stream: str, logItem: Log.LogItem):
         try:
@@ -721,5 +883,41 @@ class Agent:
         classes = extract_tools.load_classes_from_folder(
             "python/extensions/" + folder, "*", Extension
         )
-        for cls in classes:
-            await cls(agent=self).execute(**kwargs)
+        with tracing.span(f"extensions.{folder}"):
+            for cls in classes:
+                await cls(agent=self).execute(**kwargs)
+
+
+class _StreamStats:
+    # time to first token and output rate of a streamed model call, added to the current span and metrics
+    def __init__(self, model_config: ModelConfig):
+        self.labels = {"provider": model_config.provider.name, "model": model_config.name}
+        self.span = tracing.current()
+        self.span.set(**self.labels)
+        self.start = time.perf_counter()
+        self.first = 0.0
+        self.tokens = 0
+
+    def add(self, output_tokens: int):
+        if output_tokens and not self.first:
+            self.first = time.perf_counter()
+            self.span.event("first_token")
+        self.tokens += output_tokens
+
+    def end(self, usage: "prompt_cache.Usage | None" = None):
+        now = time.perf_counter()
+        metrics.MODEL_LATENCY.observe(now - self.start, **self.labels)
+        metrics.MODEL_OUTPUT_TOKENS.inc(self.tokens, **self.labels)
+        if self.first:
+            metrics.MODEL_FIRST_TOKEN.observe(self.first - self.start, **self.labels)
+        if not tracing.is_enabled():
+            return
+        attributes: dict[str, Any] = {"output_tokens": self.tokens}
+        if self.first:
+            attributes["time_to_first_token_ms"] = (self.first - self.start) * 1000
+            streaming = now - self.first
+            attributes["tokens_per_second"] = self.tokens / streaming if streaming else 0.0
+        if usage:
+            attributes["input_tokens"] = usage.input_tokens
+            attributes["cache_read_tokens"] = usage.cache_read_tokens
+        self.span.set(**attributes)
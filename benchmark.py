@@ -0,0 +1,254 @@
+import argparse
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+import models
+from agent import Agent, AgentConfig, AgentContext, ModelConfig, UserMessage
+from python.helpers import fake_models, history, persist_chat, settings
+from python.helpers.memory import Memory
+
+# End-to-end benchmark of the agent loop against the fake model provider.
+# Every user message runs a scripted monologue (memory save, memory load, response),
+# with recall extensions, persistence and history compression on a small context window.
+# Phase times are exclusive, a phase called inside another one is not counted twice.
+
+CHAT_SCRIPT = [
+    json.dumps({
+        "thoughts": ["Saving a note about the task"],
+        "tool_name": "memory_save",
+        "tool_args": {"text": "Benchmark note: the agent loop should stay fast with long histories. " * 8},
+    }),
+    json.dumps({
+        "thoughts": ["Loading related notes"],
+        "tool_name": "memory_load",
+        "tool_args": {"query": "agent loop long histories", "threshold": 0.1, "limit": 5},
+    }),
+    json.dumps({
+        "thoughts": ["Done"],
+        "tool_name": "response",
+        "tool_args": {"text": "Benchmark step finished."},
+    }),
+]
+
+UTILITY_SCRIPT = ["[]"]  # parses as an empty result for memorize, works as a plain query too
+
+_frame: contextvars.ContextVar[list | None] = contextvars.ContextVar("benchmark_frame", default=None)
+
+
+class Phases:
+    def __init__(self, allocations: bool):
+        self.allocations = allocations
+        self.times: dict[str, list[float]] = defaultdict(list)
+        self.allocated: dict[str, int] = defaultdict(int)
+        self._patched: list[tuple[object, str, object]] = []
+
+    def patch(self, owner: object, attr: str, phase: str | None = None):
+        original = getattr(owner, attr)
+        phases = self
+
+        def name_for(args, kwargs):
+            if phase:
+                return phase
+            # call_extensions, one phase per extension point
+            folder = args[1] if len(args) > 1 else kwargs.get("folder", "")
+            return f"extensions:{folder}"
+
+        if inspect.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def wrapper(*args, **kwargs):
+                frame = phases._enter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    phases._exit(name_for(args, kwargs), frame)
+        else:
+            @functools.wraps(original)
+            def wrapper(*args, **kwargs):
+                frame = phases._enter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    phases._exit(name_for(args, kwargs), frame)
+
+        setattr(owner, attr, wrapper)
+        self._patched.append((owner, attr, original))
+
+    def restore(self):
+        for owner, attr, original in reversed(self._patched):
+            setattr(owner, attr, original)
+        self._patched.clear()
+
+    def _enter(self) -> list:
+        # [parent, token, task, start, child time, start memory, child memory]
+        frame = [_frame.get(), None, _current_task(), time.perf_counter(), 0.0, self._memory(), 0]
+        frame[1] = _frame.set(frame)
+        return frame
+
+    def _exit(self, phase: str, frame: list):
+        elapsed = time.perf_counter() - frame[3]
+        allocated = self._memory() - frame[5]
+        _frame.reset(frame[1])
+        self.times[phase].append(elapsed - frame[4])
+        self.allocated[phase] += allocated - frame[6]
+        parent = frame[0]
+        # children running in another task overlap with the parent instead of nesting
+        if parent and parent[2] is frame[2]:
+            parent[4] += elapsed
+            parent[6] += allocated
+
+    def _memory(self) -> int:
+        return tracemalloc.get_traced_memory()[0] if self.allocations else 0
+
+    def report(self) -> dict:
+        result = {}
+        for phase, samples in sorted(self.times.items()):
+            ordered = sorted(samples)
+            result[phase] = {
+                "calls": len(samples),
+                "total_ms": sum(samples) * 1000,
+                "mean_ms": statistics.fmean(samples) * 1000,
+                "p50_ms": ordered[len(ordered) // 2] * 1000,
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+            }
+            if self.allocations:
+                result[phase]["allocated_kb"] = self.allocated[phase] / 1024
+        return result
+
+
+def _current_task():
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+def get_config(args, memory_dir: str) -> AgentConfig:
+    chat = ModelConfig(
+        provider=models.ModelProvider.FAKE,
+        name="benchmark-chat",
+        kwargs={
+            "responses": CHAT_SCRIPT,
+            "token_latency": args.token_latency,
+            "first_token_latency": args.first_token_latency,
+            "chunk_tokens": args.chunk_tokens,
+        },
+    )
+    utility = ModelConfig(
+        provider=models.ModelProvider.FAKE,
+        name="benchmark-utility",
+        kwargs={"responses": UTILITY_SCRIPT},
+    )
+    embeddings = ModelConfig(provider=models.ModelProvider.FAKE, name="benchmark-embedding")
+    return AgentConfig(
+        chat_model=chat,
+        utility_model=utility,
+        embeddings_model=embeddings,
+        browser_model=chat,
+        memory_subdir=memory_dir,  # absolute, outside the memory folder
+        knowledge_subdirs=[],
+        code_exec_ssh_enabled=False,
+        recall_direct=not args.llm_recall,
+        utility_cache=args.utility_cache,
+    )
+
+
+async def run(args) -> dict:
+    # small context window so history compression kicks in, the settings file is not touched
+    with settings.override(chat_model_ctx_length=args.ctx_length), tempfile.TemporaryDirectory(
+        prefix="a0-benchmark-"
+    ) as memory_dir:
+        return await _run(args, memory_dir)
+
+
+async def _run(args, memory_dir: str) -> dict:
+    fake_models.reset()
+
+    phases = Phases(args.allocations)
+    phases.patch(Agent, "call_extensions")
+    phases.patch(Agent, "prepare_prompt", "prompt")
+    phases.patch(Agent, "call_chat_model", "model")
+    phases.patch(Agent, "call_utility_model", "utility_model")
+    phases.patch(Agent, "process_tools", "tools")
+    phases.patch(history.History, "compress", "history_compress")
+    phases.patch(Memory, "search_similarity_threshold", "memory_search")
+    phases.patch(Memory, "search_areas", "memory_search")
+    phases.patch(Memory, "insert_text", "memory_insert")
+    phases.patch(persist_chat, "save_tmp_chat", "persistence")
+
+    if args.allocations:
+        tracemalloc.start()
+    context = AgentContext(get_config(args, memory_dir))
+    iterations = []
+    try:
+        for i in range(args.iterations):
+            start = time.perf_counter()
+            task = context.communicate(
+                UserMessage(f"Benchmark message {i}: summarize what the agent loop did so far.")
+            )
+            await task.result()
+            iterations.append(time.perf_counter() - start)
+    finally:
+        peak = tracemalloc.get_traced_memory()[1] if args.allocations else 0
+        if args.allocations:
+            tracemalloc.stop()
+        phases.restore()
+        AgentContext.remove(context.id)
+        persist_chat.remove_chat(context.id)
+        Memory.index.pop(memory_dir, None)
+
+    return {
+        "iterations": len(iterations),
+        "iteration_mean_ms": statistics.fmean(iterations) * 1000 if iterations else 0.0,
+        "iteration_max_ms": max(iterations) * 1000 if iterations else 0.0,
+        "history_tokens": context.agent0.history.get_tokens(),
+        "peak_allocated_mb": peak / 1024 / 1024,
+        "phases": phases.report(),
+    }
+
+
+def print_report(result: dict):
+    print(
+        f"{result['iterations']} iterations, {result['iteration_mean_ms']:.1f} ms mean, "
+        f"{result['iteration_max_ms']:.1f} ms max, {result['history_tokens']} history tokens"
+    )
+    if result["peak_allocated_mb"]:
+        print(f"peak traced memory {result['peak_allocated_mb']:.1f} MB")
+    print(f"{'phase':<45}{'calls':>7}{'total ms':>11}{'mean ms':>10}{'p95 ms':>10}{'alloc KB':>11}")
+    for phase, stats in result["phases"].items():
+        alloc = f"{stats['allocated_kb']:>11.0f}" if "allocated_kb" in stats else ""
+        print(
+            f"{phase:<45}{stats['calls']:>7}{stats['total_ms']:>11.1f}"
+            f"{stats['mean_ms']:>10.2f}{stats['p95_ms']:>10.2f}{alloc}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent loop benchmark with fake models")
+    parser.add_argument("--iterations", type=int, default=20, help="user messages to process")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per streamed chunk")
+    parser.add_argument("--first-token-latency", type=float, default=0.0, help="seconds before the first chunk")
+    parser.add_argument("--chunk-tokens", type=int, default=4, help="words per streamed chunk")
+    parser.add_argument("--ctx-length", type=int, default=4000, help="chat model context length, small values force compression")
+    parser.add_argument("--llm-recall", action="store_true", help="always ask the utility model for recall queries, to compare with direct recall")
+    parser.add_argument("--utility-cache", action="store_true", help="answer repeated utility model calls from the disk cache")
+    parser.add_argument("--allocations", action="store_true", help="track allocations with tracemalloc (slower)")
+    parser.add_argument("--json", default="", help="also write the report to this file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
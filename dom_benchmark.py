@@ -0,0 +1,86 @@
+import argparse
+import gc
+import re
+import statistics
+import time
+
+import bs4
+
+from python.helpers.browser import Browser
+
+# clean_dom against the BeautifulSoup pipeline it replaced, on a generated page.
+# Both run --runs times after a warm-up, with the garbage collector paused during each run.
+
+
+def big_page(rows: int) -> str:
+    selector = Browser.selector_name
+    body = "".join(
+        f'<div class="row"><span>item {i}</span><a {selector}="{i}a" href="/{i}">link {i}</a>'
+        f"<script>track({i})</script><br></div>"
+        for i in range(rows)
+    )
+    return f"<html><head><title>Big</title></head><body>{body}</body></html>"
+
+
+def reference_clean_dom(html_content: str) -> str:
+    """The BeautifulSoup pipeline clean_dom replaced."""
+    soup = bs4.BeautifulSoup(html_content, "html.parser")
+    for tag in soup.find_all(["br", "hr", "style", "script", "noscript", "meta", "link", "svg"]):
+        tag.decompose()
+    for tag in soup.find_all(True):
+        if tag.attrs and "invisible" in tag.attrs:
+            tag.decompose()
+    for tag in soup.find_all(True):
+        allowed = [Browser.selector_name, "aria-label", "placeholder", "name", "value", "type"]
+        tag.attrs = {
+            "selector" if key == Browser.selector_name else key: tag.attrs[key]
+            for key in allowed
+            if key in tag.attrs and tag.attrs[key]
+        }
+    for name in ("span", "p", "strong"):
+        for tag in soup.find_all(name):
+            if not tag.attrs:
+                tag.unwrap()
+    html_content = re.sub(r"\s+", " ", soup.prettify(formatter="minimal"))
+    soup = bs4.BeautifulSoup(html_content, "html.parser")
+    for name in ("html", "head", "body", "div", "span", "section", "main", "article",
+                 "header", "footer", "nav", "ul", "ol", "li", "tr", "td", "th"):
+        for element in soup.find_all(name):
+            element.unwrap()
+    out = re.sub(r">\s*<", "><", str(soup).strip())
+    return re.sub(r'aria-label="', 'label="', out)
+
+
+def measure(func, page: str, runs: int) -> list[float]:
+    func(page)  # warm-up
+    times = []
+    for _ in range(runs):
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            func(page)
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="clean_dom benchmark against the BeautifulSoup reference")
+    parser.add_argument("--rows", type=int, default=2000, help="rows of the generated page")
+    parser.add_argument("--runs", type=int, default=20, help="measured runs per implementation")
+    args = parser.parse_args()
+
+    page = big_page(args.rows)
+    browser = Browser()
+    print(f"page of {len(page)} chars, {args.runs} runs")
+    for name, func in (("clean_dom", browser.clean_dom), ("bs4 reference", reference_clean_dom)):
+        times = measure(func, page, args.runs)
+        print(
+            f"{name:<15}{statistics.median(times) * 1000:>9.1f} ms p50"
+            f"{min(times) * 1000:>9.1f} ms min{max(times) * 1000:>9.1f} ms max"
+        )
+
+
+if __name__ == "__main__":
+    main()
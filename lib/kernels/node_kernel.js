@@ -0,0 +1,51 @@
+// Persistent Node.js kernel for the code execution tool.
+// Reads frames from stdin: base64 lines of a JSON request, terminated by a "." line.
+// Every request is executed in the same global scope, output goes to stdout
+// and each execution ends with the end marker line followed by the frame id.
+// Ctrl-C interrupts the running request, the kernel keeps running.
+const readline = require("readline");
+const util = require("util");
+const vm = require("vm");
+
+const READY_MARKER = "@@A0-KERNEL-READY@@";
+const END_MARKER = "@@A0-KERNEL-END@@";
+
+globalThis.require = require;
+
+async function run(frame) {
+  try {
+    const timeout = frame.timeout ? frame.timeout * 1000 : undefined;
+    let result = vm.runInThisContext(frame.code || "", {
+      filename: "<kernel>",
+      timeout: timeout,
+      breakOnSigint: true,
+    });
+    if (result && typeof result.then === "function") result = await result;
+    if (result !== undefined) console.log(util.inspect(result, { colors: false }));
+  } catch (e) {
+    console.error(e && e.stack ? e.stack : String(e));
+  }
+}
+
+const rl = readline.createInterface({ input: process.stdin, terminal: false });
+let lines = [];
+let queue = Promise.resolve();
+
+rl.on("line", (line) => {
+  line = line.trim();
+  if (line !== ".") {
+    lines.push(line);
+    return;
+  }
+  const frame = JSON.parse(Buffer.from(lines.join(""), "base64").toString("utf-8"));
+  lines = [];
+  queue = queue.then(async () => {
+    if (frame.exit) process.exit(0);
+    await run(frame);
+    process.stdout.write("\n" + END_MARKER + (frame.id || "") + "\n");
+  });
+});
+process.on("SIGINT", () => {}); // an idle kernel ignores Ctrl-C
+rl.on("close", () => queue.then(() => process.exit(0)));
+
+console.log(READY_MARKER);
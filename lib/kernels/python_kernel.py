@@ -0,0 +1,92 @@
+# Persistent Python kernel for the code execution tool.
+# Reads frames from stdin: base64 lines of a JSON request, terminated by a "." line.
+# Every request is executed in the same namespace, output goes to stdout
+# and each execution ends with the end marker line followed by the frame id.
+# Ctrl-C interrupts the running request, the kernel keeps running.
+import ast, base64, json, signal, sys, traceback
+
+READY_MARKER = "@@A0-KERNEL-READY@@"
+END_MARKER = "@@A0-KERNEL-END@@"
+
+
+def read_frame():
+    lines = []
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            return None  # stdin closed
+        line = line.strip()
+        if line == ".":
+            return json.loads(base64.b64decode("".join(lines)).decode("utf-8"))
+        lines.append(line)
+
+
+def get_runner():
+    try:
+        from IPython.core.interactiveshell import InteractiveShell
+
+        shell = InteractiveShell.instance(colors="NoColor")
+        return lambda code: shell.run_cell(code, store_history=True)
+    except ImportError:
+        namespace = {"__name__": "__main__"}
+
+        def run(code):
+            try:
+                tree = ast.parse(code)
+                last = None
+                if tree.body and isinstance(tree.body[-1], ast.Expr):
+                    last = tree.body.pop()
+                exec(compile(tree, "<kernel>", "exec"), namespace)
+                # show value of the last expression like the interactive shell does
+                if last is not None:
+                    expression = ast.Expression(last.value)
+                    value = eval(compile(expression, "<kernel>", "eval"), namespace)
+                    if value is not None:
+                        print(repr(value))
+            except BaseException as e:
+                if isinstance(e, (SystemExit, KeyboardInterrupt)):
+                    raise
+                traceback.print_exc()
+
+        return run
+
+
+running = False
+
+
+def on_timeout(signum, frame):
+    raise TimeoutError("Execution timed out")
+
+
+def on_interrupt(signum, frame):
+    # Ctrl-C only interrupts a running request, an idle kernel ignores it
+    if running:
+        raise KeyboardInterrupt()
+
+
+def main():
+    global running
+    run = get_runner()
+    signal.signal(signal.SIGALRM, on_timeout)
+    signal.signal(signal.SIGINT, on_interrupt)
+    print(READY_MARKER, flush=True)
+    while True:
+        frame = read_frame()
+        if frame is None or frame.get("exit"):
+            break
+        signal.alarm(int(frame.get("timeout") or 0))
+        try:
+            running = True
+            run(frame.get("code", ""))
+        except (TimeoutError, KeyboardInterrupt) as e:
+            print(f"{type(e).__name__}: {e}".rstrip(": "))
+        finally:
+            running = False
+            signal.alarm(0)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        print("\n" + END_MARKER + frame.get("id", ""), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -46,6 +46,7 @@ class ModelProvider(Enum):
     CEREBRAS = "Cerebras"
     CHUTES = "Chutes"
     DEEPSEEK = "DeepSeek"
+    FAKE = "Fake"
     GOOGLE = "Google"
     GROQ = "Groq"
     HUGGINGFACE = "HuggingFace"
@@ -434,6 +435,19 @@ def get_chutes_chat(
     return ChatOpenAI(api_key=api_key, model=model_name, base_url=base_url, **kwargs)  # type: ignore
 
 
+# Fake models, deterministic and offline for tests and benchmarks
+def get_fake_chat(model_name: str, **kwargs):
+    from python.helpers import fake_models
+
+    return fake_models.get_chat(model_name, **kwargs)
+
+
+def get_fake_embedding(model_name: str, **kwargs):
+    from python.helpers import fake_models
+
+    return fake_models.get_embedding(model_name, **kwargs)
+
+
 # Cerebras models
 def get_cerebras_chat(
     model_name: str,
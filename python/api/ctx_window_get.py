@@ -12,7 +12,11 @@ class GetCtxWindow(ApiHandler):
         if not window or not isinstance(window, dict):
             return {"content": "", "tokens": 0}
 
-        text = window["text"]
+        text = window.get("text")
+        if text is None:
+            # rendered on request only, the message loop never formats the whole prompt
+            prompt = agent.get_data(agent.DATA_NAME_CTX_PROMPT)
+            text = window["text"] = prompt.format() if prompt else ""
         tokens = window["tokens"]
 
         return {"content": text, "tokens": tokens}
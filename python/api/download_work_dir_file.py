@@ -1,10 +1,9 @@
-import base64
-from io import BytesIO
+from mimetypes import guess_type
 
 from python.helpers.api import ApiHandler, Input, Output, Request, Response
 from flask import send_file
 
-from python.helpers import files, runtime
+from python.helpers import files, runtime, defer
 from python.api import file_info
 import os
 
@@ -25,40 +24,56 @@ class DownloadFile(ApiHandler):
             raise Exception(f"File {file_path} not found")
 
         if file["is_dir"]:
-            zip_file = await runtime.call_development_function(files.zip_dir, file["abs_path"])
+            # zipped on the fly, no temp file and no size known upfront
             if runtime.is_development():
-                b64 = await runtime.call_development_function(fetch_file, zip_file)
-                file_data = BytesIO(base64.b64decode(b64))
-                return send_file(
-                    file_data,
-                    as_attachment=True,
-                    download_name=os.path.basename(zip_file),
-                )
+                chunks = runtime.call_development_stream(files.zip_dir_stream, file["abs_path"])
             else:
-                return send_file(
-                    zip_file,
-                    as_attachment=True,
-                    download_name=f"{os.path.basename(file_path)}.zip",
-                )
+                chunks = files.zip_dir_stream(file["abs_path"])
+            return stream_response(
+                chunks,
+                download_name=f"{os.path.basename(file['abs_path'])}.zip",
+                mimetype="application/zip",
+            )
         elif file["is_file"]:
-            if runtime.is_development():
-                b64 = await runtime.call_development_function(fetch_file, file["abs_path"])
-                file_data = BytesIO(base64.b64decode(b64))
-                return send_file(
-                    file_data,
-                    as_attachment=True,
-                    download_name=os.path.basename(file_path),
-                )
-            else:
+            download_name = os.path.basename(file["file_name"])
+            if not runtime.is_development():
+                # local file, werkzeug handles range requests and uses sendfile
                 return send_file(
                     file["abs_path"],
                     as_attachment=True,
-                    download_name=os.path.basename(file["file_name"]),
+                    download_name=download_name,
+                    conditional=True,
                 )
+
+            size = file["size"]
+            start, end, status = 0, size, 200
+            if request.range and request.range.units == "bytes":
+                byte_range = request.range.range_for_length(size)
+                if byte_range is None:
+                    return Response(status=416, headers={"Content-Range": f"bytes */{size}"})
+                start, end = byte_range
+                status = 206
+
+            chunks = runtime.call_development_stream(
+                files.read_file_chunks, file["abs_path"], start, end
+            )
+            response = stream_response(
+                chunks,
+                download_name=download_name,
+                mimetype=guess_type(download_name)[0] or "application/octet-stream",
+                status=status,
+            )
+            response.content_length = end - start
+            response.headers["Accept-Ranges"] = "bytes"
+            if status == 206:
+                response.headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+            return response
         raise Exception(f"File {file_path} not found")
 
 
-async def fetch_file(path):
-    with open(path, "rb") as file:
-        file_content = file.read()
-        return base64.b64encode(file_content).decode("utf-8")
+def stream_response(chunks, download_name: str, mimetype: str, status: int = 200) -> Response:
+    if hasattr(chunks, "__anext__"):
+        chunks = defer.iterate_sync(chunks)  # rfc stream, pulled from the background loop
+    response = Response(chunks, status=status, mimetype=mimetype, direct_passthrough=True)
+    response.headers.set("Content-Disposition", "attachment", filename=download_name)
+    return response
@@ -1,10 +1,7 @@
 from python.helpers.api import ApiHandler
 from flask import Request, Response
 
-from python.helpers.file_browser import FileBrowser
-from python.helpers import files, memory
-import os
-from werkzeug.utils import secure_filename
+from python.helpers import files, memory, uploads, knowledge_jobs
 
 
 class ImportKnowledge(ApiHandler):
@@ -21,19 +18,18 @@ class ImportKnowledge(ApiHandler):
         file_list = request.files.getlist("files[]")
         KNOWLEDGE_FOLDER = files.get_abs_path(memory.get_custom_knowledge_subdir_abs(context.agent0),"main")
 
-        saved_filenames = []
+        saved: list[uploads.UploadedFile] = []
 
         for file in file_list:
-            if file:
-                filename = secure_filename(file.filename)  # type: ignore
-                file.save(os.path.join(KNOWLEDGE_FOLDER, filename))
-                saved_filenames.append(filename)
+            if file and file.filename:
+                saved.append(uploads.save_stream(file.stream, KNOWLEDGE_FOLDER, file.filename))
 
-        #reload memory to re-import knowledge
-        await memory.Memory.reload(context.agent0)
-        context.log.set_initial_progress()
+        # index only the new files in the background, progress via import_knowledge_status
+        job = knowledge_jobs.start(context, [f["path"] for f in saved])
 
         return {
-            "message": "Knowledge Imported",
-            "filenames": saved_filenames[:5]
-        }
\ No newline at end of file
+            "message": "Knowledge import queued",
+            "job_id": job.id,
+            "filenames": [f["filename"] for f in saved][:5],
+            "checksums": {f["filename"]: f["sha256"] for f in saved},
+        }
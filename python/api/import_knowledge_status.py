@@ -0,0 +1,17 @@
+from python.helpers.api import ApiHandler
+from flask import Request, Response
+
+from python.helpers import knowledge_jobs
+
+
+class ImportKnowledgeStatus(ApiHandler):
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        job_id = input.get("job_id", "")
+        if job_id:
+            job = knowledge_jobs.get(job_id)
+            if not job:
+                raise Exception(f"Knowledge import job {job_id} not found")
+            return job.output()
+
+        ctxid = input.get("ctxid", "")
+        return {"jobs": [job.output() for job in knowledge_jobs.list_jobs(ctxid)]}
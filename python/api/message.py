@@ -2,9 +2,8 @@ from agent import AgentContext, UserMessage
 from python.helpers.api import ApiHandler
 from flask import Request, Response
 
-from python.helpers import files
+from python.helpers import files, uploads
 import os
-from werkzeug.utils import secure_filename
 from python.helpers.defer import DeferredTask
 from python.helpers.print_style import PrintStyle
 
@@ -38,10 +37,10 @@ class Message(ApiHandler):
                 for attachment in attachments:
                     if attachment.filename is None:
                         continue
-                    filename = secure_filename(attachment.filename)
-                    save_path = files.get_abs_path(upload_folder_ext, filename)
-                    attachment.save(save_path)
-                    attachment_paths.append(os.path.join(upload_folder_int, filename))
+                    saved = uploads.save_stream(
+                        attachment.stream, upload_folder_ext, attachment.filename
+                    )
+                    attachment_paths.append(os.path.join(upload_folder_int, saved["filename"]))
         else:
             # Handle JSON request as before
             input_data = request.get_json()
@@ -0,0 +1,13 @@
+from python.helpers.api import ApiHandler
+from flask import Request, Response
+from python.helpers import metrics
+
+
+class Metrics(ApiHandler):
+    # Prometheus text exposition format, scrapers authenticate like any other client
+
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        return Response(
+            await metrics.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
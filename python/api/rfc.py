@@ -1,9 +1,18 @@
 from python.helpers.api import ApiHandler
 from flask import Request, Response
 
-from python.helpers import runtime
+from python.helpers import runtime, rfc
 
 class RFC(ApiHandler):
+
+    @classmethod
+    def streams_input(cls) -> bool:
+        return True
+
     async def process(self, input: dict, request: Request) -> dict | Response:
+        if request.mimetype == rfc.CONTENT_TYPE:
+            # v2 framed call, body is read and answered as a stream
+            frames = await runtime.handle_rfc_stream(request.stream)
+            return Response(frames, mimetype=rfc.CONTENT_TYPE, direct_passthrough=True)
         result = await runtime.handle_rfc(input) # type: ignore
         return result
@@ -1,7 +1,7 @@
 from python.helpers.api import ApiHandler
 from flask import Request, Response
 
-from python.helpers import runtime, settings, whisper
+from python.helpers import settings, whisper, defer
 
 class Transcribe(ApiHandler):
     async def process(self, input: dict, request: Request) -> dict | Response:
@@ -13,5 +13,9 @@ class Transcribe(ApiHandler):
             context.log.log(type="info", content="Whisper model is currently being downloaded, please wait...")
 
         set = settings.get_settings()
+        if input.get("stream"):
+            # partial transcripts as json lines while long recordings are decoded
+            lines = whisper.transcribe_stream(set["stt_model_size"], audio) # type: ignore
+            return Response(defer.iterate_sync(lines), mimetype="application/x-ndjson")
         result = await whisper.transcribe(set["stt_model_size"], audio) # type: ignore
         return result
@@ -1,10 +1,10 @@
-import base64
 from werkzeug.datastructures import FileStorage
 from python.helpers.api import ApiHandler
 from flask import Request, Response, send_file
 
 from python.helpers.file_browser import FileBrowser
-from python.helpers import files, runtime
+from python.helpers import files, runtime, uploads
+from python.helpers.print_style import PrintStyle
 from python.api import get_work_dir_files
 import os
 
@@ -44,14 +44,16 @@ async def upload_files(uploaded_files: list[FileStorage], current_path: str):
     if runtime.is_development():
         successful = []
         failed = []
+        target_dir = await runtime.call_development_function(resolve_dir, current_path)
         for file in uploaded_files:
-            file_content = file.stream.read()
-            base64_content = base64.b64encode(file_content).decode("utf-8")
-            if await runtime.call_development_function(
-                upload_file, current_path, file.filename, base64_content
-            ):
-                successful.append(file.filename)
-            else:
+            try:
+                # sent in bounded chunks instead of one base64 blob
+                saved = await uploads.save_stream_remote(
+                    file.stream, target_dir, file.filename or "", FileBrowser.MAX_FILE_SIZE
+                )
+                successful.append(saved["filename"])
+            except Exception as e:
+                PrintStyle.error(f"Error saving file {file.filename}: {e}")
                 failed.append(file.filename)
     else:
         browser = FileBrowser()
@@ -60,7 +62,5 @@ async def upload_files(uploaded_files: list[FileStorage], current_path: str):
     return successful, failed
 
 
-async def upload_file(current_path: str, filename: str, base64_content: str):
-    browser = FileBrowser()
-    return browser.save_file_b64(current_path, filename, base64_content)
-
+async def resolve_dir(current_path: str):
+    return FileBrowser().resolve_dir(current_path)
@@ -1,6 +1,8 @@
 import asyncio
+import time
 from python.helpers.extension import Extension
 from python.helpers.memory import Memory
+from python.helpers import recall
 from agent import LoopData
 
 DATA_NAME_TASK = "_recall_memories_task"
@@ -10,7 +12,6 @@ class RecallMemories(Extension):
     INTERVAL = 3
     HISTORY = 10000
     RESULTS = 3
-    THRESHOLD = 0.6
 
     async def execute(self, loop_data: LoopData = LoopData(), **kwargs):
 
@@ -43,35 +44,41 @@ class RecallMemories(Extension):
             heading="Searching memories...",
         )
 
-        # get system message and chat history for util llm
-        # msgs_text = self.agent.concat_messages(
-        #     self.agent.history[-RecallMemories.HISTORY :]
-        # )  # only last X messages
-        msgs_text = self.agent.history.output_text()[-RecallMemories.HISTORY:]
-        system = self.agent.read_prompt(
-            "memory.memories_query.sys.md", history=msgs_text
-        )
+        # recent messages as query, the utility model only writes one when that finds nothing good
+        areas = [Memory.Area.MAIN.value, Memory.Area.FRAGMENTS.value]
+        found = []
+        if self.agent.config.recall_direct:
+            direct = await recall.get_direct(self.agent, loop_data)
+            found = direct.best(areas, RecallMemories.RESULTS)
+            log_item.update(direct_ms=round(direct.seconds * 1000))
+
+        if not recall.is_good(found):
+            start = time.perf_counter()
+
+            # get system message and chat history for util llm
+            msgs_text = self.agent.history.output_text()[-RecallMemories.HISTORY:]
+            system = self.agent.read_prompt(
+                "memory.memories_query.sys.md", history=msgs_text
+            )
 
-        # log query streamed by LLM
-        async def log_callback(content):
-            log_item.stream(query=content)
+            # log query streamed by LLM
+            async def log_callback(content):
+                log_item.stream(query=content)
 
-        # call util llm to summarize conversation
-        query = await self.agent.call_utility_model(
-            system=system,
-            message=loop_data.user_message.output_text() if loop_data.user_message else "",
-            callback=log_callback,
-        )
+            # call util llm to summarize conversation
+            query = await self.agent.call_utility_model(
+                system=system,
+                message=loop_data.user_message.output_text() if loop_data.user_message else "",
+                callback=log_callback,
+            )
 
-        # get solutions database
-        db = await Memory.get(self.agent)
+            result = await recall.search(
+                self.agent, query, {area: RecallMemories.RESULTS for area in areas}, "llm", start
+            )
+            found = result.best(areas, RecallMemories.RESULTS)
+            log_item.update(llm_ms=round(result.seconds * 1000))
 
-        memories = await db.search_similarity_threshold(
-            query=query,
-            limit=RecallMemories.RESULTS,
-            threshold=RecallMemories.THRESHOLD,
-            filter=f"area == '{Memory.Area.MAIN.value}' or area == '{Memory.Area.FRAGMENTS.value}'",  # exclude solutions
-        )
+        memories = [doc for doc, _ in found]
 
         # log the short result
         if not isinstance(memories, list) or len(memories) == 0:
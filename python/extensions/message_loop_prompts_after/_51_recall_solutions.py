@@ -1,6 +1,8 @@
 import asyncio
+import time
 from python.helpers.extension import Extension
 from python.helpers.memory import Memory
+from python.helpers import recall
 from agent import LoopData
 
 DATA_NAME_TASK = "_recall_solutions_task"
@@ -11,7 +13,6 @@ class RecallSolutions(Extension):
     HISTORY = 10000
     SOLUTIONS_COUNT = 2
     INSTRUMENTS_COUNT = 2
-    THRESHOLD = 0.6
 
     async def execute(self, loop_data: LoopData = LoopData(), **kwargs):
 
@@ -30,6 +31,8 @@ class RecallSolutions(Extension):
         extras = loop_data.extras_persistent
         if "solutions" in extras:
             del extras["solutions"]
+        if "instruments" in extras:
+            del extras["instruments"]
         
         # try:
         # show temp info message
@@ -43,41 +46,40 @@ class RecallSolutions(Extension):
             heading="Searching memory for solutions...",
         )
 
-        # get system message and chat history for util llm
-        # msgs_text = self.agent.concat_messages(
-        #     self.agent.history[-RecallSolutions.HISTORY :]
-        # )  # only last X messages
-        # msgs_text = self.agent.history.current.output_text()
-        msgs_text = self.agent.history.output_text()[-RecallSolutions.HISTORY:]
-
-        system = self.agent.read_prompt(
-            "memory.solutions_query.sys.md", history=msgs_text
-        )
+        # recent messages as query, the utility model only writes one when that finds nothing good
+        limits = {
+            Memory.Area.SOLUTIONS.value: RecallSolutions.SOLUTIONS_COUNT,
+            Memory.Area.INSTRUMENTS.value: RecallSolutions.INSTRUMENTS_COUNT,
+        }
+        result = None
+        if self.agent.config.recall_direct:
+            result = await recall.get_direct(self.agent, loop_data)
+            log_item.update(direct_ms=round(result.seconds * 1000))
+
+        if not result or not recall.is_good(result.best(list(limits), 1)):
+            start = time.perf_counter()
+
+            # get system message and chat history for util llm
+            msgs_text = self.agent.history.output_text()[-RecallSolutions.HISTORY:]
+            system = self.agent.read_prompt(
+                "memory.solutions_query.sys.md", history=msgs_text
+            )
 
-        # log query streamed by LLM
-        async def log_callback(content):
-            log_item.stream(query=content)
+            # log query streamed by LLM
+            async def log_callback(content):
+                log_item.stream(query=content)
 
-        # call util llm to summarize conversation
-        query = await self.agent.call_utility_model(
-            system=system, message=loop_data.user_message.output_text() if loop_data.user_message else "", callback=log_callback
-        )
+            # call util llm to summarize conversation
+            query = await self.agent.call_utility_model(
+                system=system, message=loop_data.user_message.output_text() if loop_data.user_message else "", callback=log_callback
+            )
 
-        # get solutions database
-        db = await Memory.get(self.agent)
+            # solutions and instruments in one search
+            result = await recall.search(self.agent, query, limits, "llm", start)
+            log_item.update(llm_ms=round(result.seconds * 1000))
 
-        solutions = await db.search_similarity_threshold(
-            query=query,
-            limit=RecallSolutions.SOLUTIONS_COUNT,
-            threshold=RecallSolutions.THRESHOLD,
-            filter=f"area == '{Memory.Area.SOLUTIONS.value}'",
-        )
-        instruments = await db.search_similarity_threshold(
-            query=query,
-            limit=RecallSolutions.INSTRUMENTS_COUNT,
-            threshold=RecallSolutions.THRESHOLD,
-            filter=f"area == '{Memory.Area.INSTRUMENTS.value}'",
-        )
+        solutions = [doc for doc, _ in result.best([Memory.Area.SOLUTIONS.value], RecallSolutions.SOLUTIONS_COUNT)]
+        instruments = [doc for doc, _ in result.best([Memory.Area.INSTRUMENTS.value], RecallSolutions.INSTRUMENTS_COUNT)]
 
         log_item.update(
             heading=f"{len(instruments)} instruments, {len(solutions)} solutions found",
@@ -92,7 +94,10 @@ class RecallSolutions(Extension):
             instruments_prompt = self.agent.read_prompt(
                 "agent.system.instruments.md", instruments=instruments_text
             )
-            loop_data.system.append(instruments_prompt)
+            if self.agent.config.prompt_cache_layout:
+                extras["instruments"] = instruments_prompt  # keep the system prompt stable
+            else:
+                loop_data.system.append(instruments_prompt)
 
         if solutions:
             solutions_text = ""
@@ -43,6 +43,7 @@ class MemorizeMemories(Extension):
             message=msgs_text,
             callback=log_callback,
             background=True,
+            cache=False,  # whole history, never repeats, would only crowd out the cache
         )
 
         memories = DirtyJson.parse_string(memories_json)
@@ -42,6 +42,7 @@ class MemorizeSolutions(Extension):
             message=msgs_text,
             callback=log_callback,
             background=True,
+            cache=False,  # whole history, never repeats, would only crowd out the cache
         )
 
         solutions = DirtyJson.parse_string(solutions_json)
@@ -4,9 +4,20 @@ from agent import LoopData
 import asyncio
 
 
+DATA_NAME_RENAMED_AT = "rename_chat_tokens"  # history tokens at the last rename, persisted with the chat
+
+
 class RenameChat(Extension):
 
+    MIN_NEW_TOKENS = 300  # history change that is worth a new name
+
     async def execute(self, loop_data: LoopData = LoopData(), **kwargs):
+        # skip when the history barely changed since the last rename
+        history_tokens = self.agent.history.get_tokens()
+        renamed_at = self.agent.get_data(DATA_NAME_RENAMED_AT)
+        if renamed_at is not None and abs(history_tokens - renamed_at) < RenameChat.MIN_NEW_TOKENS:
+            return
+        self.agent.set_data(DATA_NAME_RENAMED_AT, history_tokens)
         asyncio.create_task(self.change_name())
 
     async def change_name(self):
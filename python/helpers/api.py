@@ -32,6 +32,10 @@ class ApiHandler:
     def requires_auth(cls) -> bool:
         return True
 
+    @classmethod
+    def streams_input(cls) -> bool:
+        return False  # handler reads non-json bodies from request.stream itself
+
     @abstractmethod
     async def process(self, input: Input, request: Request) -> Output:
         pass
@@ -49,7 +53,7 @@ class ApiHandler:
                     # Just log the error and continue with empty input
                     PrintStyle().print(f"Error parsing JSON: {str(e)}")
                     input_data = {}
-            else:
+            elif not self.streams_input():
                 input_data = {"data": request.get_data(as_text=True)}
 
             # process via handler
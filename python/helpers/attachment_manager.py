@@ -1,11 +1,10 @@
 import os
-import io
 import base64
-from PIL import Image
 from typing import Dict, List, Optional, Tuple
 from werkzeug.utils import secure_filename
 
 from python.helpers.print_style import PrintStyle
+from python.helpers import images
 
 class AttachmentManager:
   ALLOWED_EXTENSIONS = {
@@ -73,20 +72,12 @@ class AttachmentManager:
 
   def generate_image_preview(self, image_path: str, max_size: int = 800) -> Optional[str]:
       try:
-          with Image.open(image_path) as img:
-              # Convert image if needed
-              if img.mode in ('RGBA', 'P'):
-                  img = img.convert('RGB')
-              
-              # Resize for preview
-              img.thumbnail((max_size, max_size))
-              
-              # Save to buffer
-              buffer = io.BytesIO()
-              img.save(buffer, format="JPEG", quality=70, optimize=True)
-              
-              # Convert to base64
-              return base64.b64encode(buffer.getvalue()).decode('utf-8')
+          # resized in the image worker pool, unchanged files come from the cache
+          result = images.preview_image_file(image_path, max_size=max_size, quality=70)
+          if result["error"] or not result["data"]:
+              raise Exception(result["error"] or "File not found")
+          # Convert to base64
+          return base64.b64encode(result["data"]).decode('utf-8')
       except Exception as e:
           PrintStyle.error(f"Error generating preview for {image_path}: {e}")
           return None
@@ -1,6 +1,7 @@
 import asyncio
 import re
-from bs4 import BeautifulSoup
+import time
+from lxml import etree, html as lxml_html
 from playwright.async_api import (
     async_playwright,
     Browser as PlaywrightBrowser,
@@ -16,6 +17,151 @@ class NoPageError(Exception):
     pass
 
 
+# tags dropped with their content, and tags replaced by their content
+REMOVED_TAGS = {"br", "hr", "style", "script", "noscript", "meta", "link", "svg"}
+STRUCTURAL_TAGS = {
+    "html", "head", "body", "div", "span", "section", "main", "article", "header",
+    "footer", "nav", "ul", "ol", "li", "tr", "td", "th",
+}
+UNWRAP_IF_EMPTY_TAGS = {"p", "strong"}
+ALLOWED_ATTRS = ["aria-label", "placeholder", "name", "value", "type"]
+RENAMED_ATTRS = {"aria-label": "label"}
+
+# counts DOM mutations of the main frame, used to tell if a cached DOM is still valid
+DOM_VERSION_JS = """() => {
+    if (!window.__a0DomVersion) {
+        window.__a0DomVersion = 1;
+        new MutationObserver(() => window.__a0DomVersion++).observe(document, {
+            subtree: true, childList: true, attributes: true, characterData: true,
+        });
+    }
+    return window.__a0DomVersion;
+}"""
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.6422.141 Safari/537.36"
+
+
+class BrowserLease:
+    """Isolated browser context leased from the pool."""
+
+    def __init__(self, pool: "BrowserPool", context: BrowserContext):
+        self.pool = pool
+        self.context = context
+        self.closed = False
+        self.last_used = time.time()
+
+    def touch(self):
+        self.last_used = time.time()
+
+    def connected(self) -> bool:
+        browser = self.context.browser
+        return bool(browser and browser.is_connected())
+
+    async def close(self):
+        await self.pool.release(self)
+
+
+class BrowserPool:
+    """One Playwright driver and Chromium per event loop, shared by all agents.
+
+    Agents lease isolated contexts, contexts idle for longer than `idle_timeout`
+    seconds are closed by the reaper.
+    """
+
+    _pools: dict[tuple[asyncio.AbstractEventLoop, bool], "BrowserPool"] = {}
+    idle_timeout = 600
+    reap_interval = 60
+
+    def __init__(self, headless=True):
+        self.headless = headless
+        self.browser: PlaywrightBrowser | None = None
+        self._playwright = None
+        self._lock = asyncio.Lock()
+        self._reaper: asyncio.Task | None = None
+        self.leases: list[BrowserLease] = []
+        self.metrics = {
+            "launches": 0,
+            "launch_seconds": 0.0,
+            "leases": 0,
+            "lease_seconds": 0.0,
+            "reaped": 0,
+        }
+
+    @classmethod
+    def get(cls, headless=True) -> "BrowserPool":
+        # playwright objects are bound to the loop they were created in
+        key = (asyncio.get_running_loop(), headless)
+        if key not in cls._pools:
+            cls._pools[key] = cls(headless=headless)
+        return cls._pools[key]
+
+    async def _ensure_browser(self) -> PlaywrightBrowser:
+        async with self._lock:
+            if not self.browser or not self.browser.is_connected():
+                start = time.perf_counter()
+                if not self._playwright:
+                    self._playwright = await async_playwright().start()
+                self.browser = await self._playwright.chromium.launch(
+                    headless=self.headless, args=["--disable-http2"]
+                )
+                # contexts of the disconnected browser are gone with it
+                for lease in self.leases:
+                    lease.closed = True
+                self.leases = []
+                self.metrics["launches"] += 1
+                self.metrics["launch_seconds"] += time.perf_counter() - start
+            if not self._reaper or self._reaper.done():
+                self._reaper = asyncio.create_task(self._reap_loop())
+            return self.browser
+
+    async def lease(self) -> BrowserLease:
+        start = time.perf_counter()
+        browser = await self._ensure_browser()
+        context = await browser.new_context(user_agent=USER_AGENT)
+        lease = BrowserLease(self, context)
+        self.leases.append(lease)
+        self.metrics["leases"] += 1
+        self.metrics["lease_seconds"] += time.perf_counter() - start
+        return lease
+
+    async def release(self, lease: BrowserLease):
+        if lease.closed:
+            return
+        lease.closed = True
+        if lease in self.leases:
+            self.leases.remove(lease)
+        try:
+            await lease.context.close()
+        except Exception as e:
+            print(f"Error closing browser context: {e}")
+
+    async def reap_idle(self):
+        cutoff = time.time() - self.idle_timeout
+        for lease in [l for l in self.leases if l.last_used < cutoff]:
+            await self.release(lease)
+            self.metrics["reaped"] += 1
+
+    async def _reap_loop(self):
+        while self.browser and self.browser.is_connected():
+            await asyncio.sleep(self.reap_interval)
+            await self.reap_idle()
+
+    def get_metrics(self) -> dict:
+        return {**self.metrics, "active_contexts": len(self.leases)}
+
+    async def shutdown(self):
+        for lease in list(self.leases):
+            await self.release(lease)
+        if self._reaper:
+            self._reaper.cancel()
+        if self.browser:
+            await self.browser.close()
+            self.browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+
 class Browser:
 
     load_timeout = 10000
@@ -23,15 +169,15 @@ class Browser:
     selector_name = "data-a0sel3ct0r"
 
     def __init__(self, headless=True):
-        self.browser: PlaywrightBrowser = None  # type: ignore
+        self.lease: BrowserLease | None = None
         self.context: BrowserContext = None  # type: ignore
         self.page: Page = None  # type: ignore
-        self._playwright = None
         self.headless = headless
         self.contexts = {}
         self.last_selector = ""
         self.page_loaded = False
         self.navigation_count = 0
+        self._dom_cache: tuple[tuple, str] | None = None
 
     async def __aenter__(self):
         await self.start()
@@ -41,16 +187,16 @@ class Browser:
         await self.close()
 
     async def start(self):
-        """Start browser session"""
-        self._playwright = await async_playwright().start()
-        if not self.browser:
-            self.browser = await self._playwright.chromium.launch(
-                headless=self.headless, args=["--disable-http2"]
-            )
-        if not self.context:
-            self.context = await self.browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.6422.141 Safari/537.36"
-            )
+        """Start browser session, the browser itself is shared through the pool"""
+        if not self.lease or self.lease.closed or not self.lease.connected():
+            self.lease = await BrowserPool.get(self.headless).lease()
+            self.context = self.lease.context
+            self.page = None  # type: ignore
+        self.lease.touch()
+
+        # pages are reused between opens, set up only new ones
+        if self.page and not self.page.is_closed():
+            return
 
         self.page = await self.context.new_page()
         await self.page.set_viewport_size({"width": 1200, "height": 1200})
@@ -103,18 +249,16 @@ class Browser:
         self.page.on("load", handle_load)
 
     async def close(self):
-        """Close browser session"""
-        if self.browser:
-            await self.browser.close()
-        if self._playwright:
-            await self._playwright.stop()
+        """Close browser session, the shared browser keeps running"""
+        self.page = None  # type: ignore
+        if self.lease:
+            await self.lease.close()
+            self.lease = None
 
     async def open(self, url: str):
         """Open a URL in the browser"""
         self.last_selector = ""
         self.contexts = {}
-        if self.page:
-            await self.page.close()
         await self.start()
         try:
             await self.page.goto(
@@ -127,156 +271,128 @@ class Browser:
             raise e
         await self.wait_tick()
 
+    _extract_js: str | None = None
+
     async def get_full_dom(self) -> str:
         """Get full DOM with unique selectors"""
         await self._check_page()
-        js_code = files.read_file("lib/browser/extract_dom.js")
+        if Browser._extract_js is None:
+            Browser._extract_js = files.read_file("lib/browser/extract_dom.js")
+        js_code = Browser._extract_js
 
-        # Get all frames
-        self.contexts = {}
-        frame_contents = {}
+        # marks follow frame order, extraction itself runs for all frames at once
+        frames = [frame for frame in self.page.frames if frame.url]
+        marks = [self._num_to_alpha(i) for i in range(len(frames))]
 
-        # Extract content from each frame
-        i = -1
-        for frame in self.page.frames:
+        async def extract(frame: Frame, frame_mark: str) -> str | None:
             try:
-                if frame.url:  # and frame != self.page.main_frame:
-                    i += 1
-                    frame_mark = self._num_to_alpha(i)
-
-                    # Check if frame is still valid
-                    await self.wait_tick()
-                    if not frame.is_detached():
-                        try:
-                            # short timeout to identify and skip unresponsive frames
-                            async with asyncio.timeout(0.25):
-                                await frame.evaluate("window.location.href")
-                        except TimeoutError as e:
-                            print(f"Skipping unresponsive frame: {frame.url}")
-                            continue
-
-                        await frame.wait_for_load_state(
-                            "domcontentloaded", timeout=1000
-                        )
-
-                        async with asyncio.timeout(1):
-                            content = await frame.evaluate(
-                                js_code, [frame_mark, self.selector_name]
-                            )
-                            self.contexts[frame_mark] = frame
-                            frame_contents[frame.url] = content
-                    else:
-                        print(f"Warning: Frame was detached: {frame.url}")
+                if frame.is_detached():
+                    print(f"Warning: Frame was detached: {frame.url}")
+                    return None
+                try:
+                    # short timeout to identify and skip unresponsive frames
+                    async with asyncio.timeout(0.25):
+                        await frame.evaluate("window.location.href")
+                except TimeoutError as e:
+                    print(f"Skipping unresponsive frame: {frame.url}")
+                    return None
+
+                await frame.wait_for_load_state("domcontentloaded", timeout=1000)
+
+                async with asyncio.timeout(1):
+                    return await frame.evaluate(
+                        js_code, [frame_mark, self.selector_name]
+                    )
             except Exception as e:
                 print(f"Error extracting from frame {frame.url}: {e}")
+                return None
+
+        results = await asyncio.gather(
+            *(extract(frame, mark) for frame, mark in zip(frames, marks))
+        )
+
+        self.contexts = {}
+        frame_contents = {}
+        for frame, mark, content in zip(frames, marks, results):
+            if content is not None:
+                self.contexts[mark] = frame
+                frame_contents[frame.url] = content
 
-        # # Get main frame content
-        # main_mark = self._num_to_alpha(0)
-        # main_content = ""
-        # try:
-        #     async with asyncio.timeout(1):
-        #         main_content = await self.page.evaluate(js_code, [main_mark, self.selector_name])
-        #         self.contexts[main_mark] = self.page
-        # except Exception as e:
-        #     print(f"Error when extracting from main frame: {e}")
-
-        # Replace iframe placeholders with actual content
-        # for url, content in frame_contents.items():
-        #     placeholder = f'<iframe src="{url}"'
-        #     main_content = main_content.replace(placeholder, f'{placeholder}>\n<!-- IFrame Content Start -->\n{content}\n<!-- IFrame Content End -->\n</iframe')
-
-        # return main_content + "".join(frame_contents.values())
         return "".join(frame_contents.values())
 
-    def strip_html_dom(self, html_content: str) -> str:
-        """Clean and strip HTML content"""
-        if not html_content:
+    def clean_dom(self, html_content: str) -> str:
+        """Strip the DOM to content and selectors in a single parse"""
+        if not html_content or not html_content.strip():
             return ""
 
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        for tag in soup.find_all(
-            ["br", "hr", "style", "script", "noscript", "meta", "link", "svg"]
-        ):
-            tag.decompose()
-
-        for tag in soup.find_all(True):
-            if tag.attrs and "invisible" in tag.attrs:
-                tag.decompose()
-
-        for tag in soup.find_all(True):
-            allowed_attrs = [
-                self.selector_name,
-                "aria-label",
-                "placeholder",
-                "name",
-                "value",
-                "type",
-            ]
-            attrs = {
-                "selector" if key == self.selector_name else key: tag.attrs[key]
-                for key in allowed_attrs
-                if key in tag.attrs and tag.attrs[key]
-            }
-            tag.attrs = attrs
-
-        def remove_empty(tag_name: str) -> None:
-            for tag in soup.find_all(tag_name):
-                if not tag.attrs:
-                    tag.unwrap()
-
-        remove_empty("span")
-        remove_empty("p")
-        remove_empty("strong")
-
-        return soup.prettify(formatter="minimal")
-
-    def process_html_with_selectors(self, html_content: str) -> str:
-        """Process HTML content and add selectors to interactive elements"""
-        if not html_content:
-            return ""
+        # document parser, a fragment parser would drop head elements like <title>
+        try:
+            root = lxml_html.document_fromstring(html_content)
+        except etree.ParserError:
+            return ""  # nothing but whitespace or comments
+
+        for element in list(root.iter(etree.Element)):
+            if element is root:
+                continue
+            if element.tag in REMOVED_TAGS or "invisible" in element.attrib:
+                # the tail moves to the previous node, keep it apart from the text there
+                element.tail = " " + (element.tail or "")
+                element.drop_tree()
+
+        unwrap = []
+        for element in root.iter(etree.Element):
+            attrs = element.attrib
+            kept = {}
+            if attrs.get(self.selector_name):
+                kept["selector"] = attrs[self.selector_name]
+            for key in ALLOWED_ATTRS:
+                if attrs.get(key):
+                    kept[RENAMED_ATTRS.get(key, key)] = attrs[key]
+            attrs.clear()
+            attrs.update(kept)
+
+            if element is not root and (
+                element.tag in STRUCTURAL_TAGS
+                or (element.tag in UNWRAP_IF_EMPTY_TAGS and not kept)
+            ):
+                unwrap.append(element)
+
+        for element in unwrap:
+            # keep words of neighbouring blocks apart
+            element.text = " " + (element.text or "")
+            element.tail = " " + (element.tail or "")
+            element.drop_tag()
 
-        html_content = re.sub(r"\s+", " ", html_content)
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        structural_tags = [
-            "html",
-            "head",
-            "body",
-            "div",
-            "span",
-            "section",
-            "main",
-            "article",
-            "header",
-            "footer",
-            "nav",
-            "ul",
-            "ol",
-            "li",
-            "tr",
-            "td",
-            "th",
-        ]
-        for tag in structural_tags:
-            for element in soup.find_all(tag):
-                element.unwrap()
-
-        out = str(soup).strip()
-        out = re.sub(r">\s*<", "><", out)
-        out = re.sub(r'aria-label="', 'label="', out)
-
-        # out = re.sub(r'selector="(\d+[a-zA-Z]+)"', r'selector=\1', out)
-        return out
+        out = (root.text or "") + "".join(
+            lxml_html.tostring(child, encoding="unicode") for child in root
+        )
+        out = re.sub(r"\s+", " ", out).strip()
+        return re.sub(r">\s*<", "><", out)
 
     async def get_clean_dom(self) -> str:
-        """Get clean DOM with selectors"""
-        full_dom = await self.get_full_dom()
-        clean_dom = self.strip_html_dom(full_dom)
-        return self.process_html_with_selectors(clean_dom)
+        """Get clean DOM with selectors, cached while the page does not change"""
+        await self._check_page()
+        version = await self._dom_version()
+        key = (self.navigation_count, len(self.page.frames), version)
+        if version >= 0 and self._dom_cache and self._dom_cache[0] == key:
+            return self._dom_cache[1]
+
+        clean_dom = self.clean_dom(await self.get_full_dom())
+
+        # extraction marks elements itself, read the version after it
+        version = await self._dom_version()
+        self._dom_cache = ((self.navigation_count, len(self.page.frames), version), clean_dom)
+        return clean_dom
+
+    async def _dom_version(self) -> int:
+        try:
+            return await self.page.evaluate(DOM_VERSION_JS)
+        except Exception:
+            return -1  # unknown, forces a new extraction
 
     async def click(self, selector: str):
         await self._check_page()
+        self._dom_cache = None
         ctx, selector = self._parse_selector(selector)
         self.last_selector = selector
         # js_code = files.read_file("lib/browser/click.js")
@@ -292,6 +408,7 @@ class Browser:
 
     async def press(self, key: str):
         await self._check_page()
+        self._dom_cache = None
         if self.last_selector:
             await self.page.press(
                 self.last_selector, key, timeout=Browser.interact_timeout
@@ -301,6 +418,7 @@ class Browser:
 
     async def fill(self, selector: str, text: str):
         await self._check_page()
+        self._dom_cache = None
         ctx, selector = self._parse_selector(selector)
         self.last_selector = selector
         try:
@@ -312,6 +430,7 @@ class Browser:
 
     async def execute(self, js_code: str):
         await self._check_page()
+        self._dom_cache = None
         result = await self.page.evaluate(js_code)
         return result
 
@@ -334,12 +453,12 @@ class Browser:
     async def _check_page(self):
         for _ in range(2):
             try:
-                await self.wait_tick()
-                self.page = self.context.pages[0]
-                if not self.page:
+                if not self.page or self.page.is_closed() or not self.lease or self.lease.closed:
                     raise NoPageError(
                         "No page is open in the browser. Please open a URL first."
                     )
+                self.lease.touch()
+                await self.wait_tick()
                 # await self.page.wait_for_load_state("networkidle",)
                 async with asyncio.timeout(self.load_timeout / 1000):
                     if not self.page_loaded:
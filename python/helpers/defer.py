@@ -2,7 +2,7 @@ import asyncio
 from dataclasses import dataclass
 import threading
 from concurrent.futures import Future
-from typing import Any, Callable, Optional, Coroutine, TypeVar, Awaitable
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Coroutine, TypeVar, Awaitable
 
 T = TypeVar("T")
 
@@ -50,6 +50,21 @@ class EventLoopThread:
         return asyncio.run_coroutine_threadsafe(coro, self.loop)
 
 
+def iterate_sync(aiter: AsyncIterator[T], thread_name: str = "Streams") -> Iterator[T]:
+    """Consume an async iterator from sync code (e.g. a WSGI response) on a background loop."""
+    thread = EventLoopThread(thread_name)
+    try:
+        while True:
+            try:
+                yield thread.run_coroutine(aiter.__anext__()).result()  # type: ignore
+            except StopAsyncIteration:
+                break
+    finally:
+        aclose = getattr(aiter, "aclose", None)
+        if aclose:
+            thread.run_coroutine(aclose()).result()
+
+
 @dataclass
 class ChildTask:
     task: "DeferredTask"
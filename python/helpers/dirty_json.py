@@ -25,6 +25,7 @@ class DirtyJson:
         self.current_char = None
         self.result = None
         self.stack = []
+        self.double_braced = set()  # ids of objects opened with {{
 
     @staticmethod
     def parse_string(json_string):
@@ -105,7 +106,8 @@ class DirtyJson:
         self._skip_whitespace()
         if self.current_char == "{":
             if self._peek(1) == "{":  # Handle {{
-                self._advance(2)
+                self._advance()
+                return self._parse_object(double=True)
             return self._parse_object()
         elif self.current_char == "[":
             return self._parse_array()
@@ -139,9 +141,11 @@ class DirtyJson:
             return True
         return False
 
-    def _parse_object(self):
+    def _parse_object(self, double=False):
         obj = {}
         self._advance()  # Skip opening brace
+        if double:
+            self.double_braced.add(id(obj))
         self.stack.append(obj)
         self._parse_object_content()
         return obj
@@ -150,7 +154,8 @@ class DirtyJson:
         while self.current_char is not None:
             self._skip_whitespace()
             if self.current_char == "}":
-                if self._peek(1) == "}":  # Handle }}
+                # Handle }}, only for {{ objects, nested objects end with }} as well
+                if self._peek(1) == "}" and id(self.stack[-1]) in self.double_braced:
                     self._advance(2)
                 else:
                     self._advance()
@@ -1,20 +1,26 @@
+import asyncio
+import socket
+import threading
 import time
+import uuid
 import docker
 import atexit
-from typing import Optional
-from python.helpers.files import get_abs_path
+from dataclasses import dataclass
+from typing import Any, Optional
 from python.helpers.errors import format_error
 from python.helpers.print_style import PrintStyle
 from python.helpers.log import Log
 
 class DockerContainerManager:
-    def __init__(self, image: str, name: str, ports: Optional[dict[str, int]] = None, volumes: Optional[dict[str, dict[str, str]]] = None,logger: Log|None=None):
+    def __init__(self, image: str, name: str, ports: Optional[dict[str, int]] = None, volumes: Optional[dict[str, dict[str, str]]] = None,logger: Log|None=None, client: Any = None):
         self.logger = logger
         self.image = image
         self.name = name
         self.ports = ports
         self.volumes = volumes
-        self.init_docker()
+        self.client = client
+        self.container = None
+        if not self.client: self.init_docker()
                 
     def init_docker(self):
         self.client = None
@@ -64,11 +70,10 @@ class DockerContainerManager:
 
     def start_container(self) -> None:
         if not self.client: self.client = self.init_docker()
-        existing_container = None
-        for container in self.client.containers.list(all=True):
-            if container.name == self.name:
-                existing_container = container
-                break
+        try:
+            existing_container = self.client.containers.get(self.name)
+        except docker.errors.NotFound:
+            existing_container = None
 
         if existing_container:
             if existing_container.status != 'running':
@@ -77,7 +82,7 @@ class DockerContainerManager:
                 
                 existing_container.start()
                 self.container = existing_container
-                time.sleep(2) # this helps to get SSH ready
+                self.wait_for_ssh()
                 
             else:
                 self.container = existing_container
@@ -96,4 +101,203 @@ class DockerContainerManager:
             # atexit.register(self.cleanup_container)
             PrintStyle.standard(f"Started container with ID: {self.container.id}")
             if self.logger: self.logger.log(type="info", content=f"Started container with ID: {self.container.id}")
-            time.sleep(5) # this helps to get SSH ready
+            self.wait_for_ssh()
+
+    async def start_container_async(self) -> None:
+        # docker API and readiness checks block, keep them off the event loop
+        await asyncio.to_thread(self.start_container)
+
+    def wait_for_ssh(self, timeout: float = 30) -> bool:
+        port = (self.ports or {}).get("22/tcp")
+        if not port: return True
+        return wait_for_ssh("localhost", int(port), timeout)
+
+
+def wait_for_ssh(host: str, port: int, timeout: float = 30) -> bool:
+    """Poll until the SSH server answers with its banner instead of sleeping a fixed time."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=2) as sock:
+                sock.settimeout(2)
+                if sock.recv(4).startswith(b"SSH-"):
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+@dataclass
+class PooledContainer:
+    container: Any
+    name: str
+    ssh_port: int
+    http_port: int | None = None
+
+
+class DockerContainerPool:
+    """Keeps `size` started, SSH ready containers and leases them to owners (agent contexts).
+
+    Released containers are removed and replaced by fresh ones, so no state leaks
+    between owners. All docker calls run in worker threads. Containers left over by
+    a previous run are removed when the pool is created, the rest on exit.
+    """
+
+    NAME_PREFIX = "A0-pool-"
+    HEALTH_TIMEOUT = 2  # seconds an idle container gets to answer on SSH when leased
+
+    _pools: dict[str, "DockerContainerPool"] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, image: str, size: int, volumes: Optional[dict[str, dict[str, str]]] = None, logger: Log|None=None, client: Any = None, host: str = "localhost", ready_timeout: float = 60):
+        self.image = image
+        self.size = size
+        self.volumes = volumes
+        self.logger = logger
+        self.host = host
+        self.ready_timeout = ready_timeout
+        self.client = client or DockerContainerManager(image=image, name="", logger=logger).client
+        self.idle: list[PooledContainer] = []
+        self.leases: dict[str, PooledContainer] = {}
+        self.starting = 0
+        self.closed = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, image: str, size: int, **kwargs) -> "DockerContainerPool":
+        with cls._pools_lock:
+            pool = cls._pools.get(image)
+            if not pool:
+                pool = cls._pools[image] = cls(image=image, size=size, **kwargs)
+                pool.remove_stale()
+                atexit.register(pool.shutdown)
+            pool.size = size
+            return pool
+
+    @classmethod
+    def release_owner(cls, owner: str):
+        for pool in list(cls._pools.values()):
+            pool.release(owner)
+
+    async def acquire(self, owner: str) -> PooledContainer:
+        while True:
+            with self._lock:
+                leased = self.leases.get(owner)
+                if leased or not self.idle:
+                    break
+                pooled = self.idle.pop(0)
+            # idle containers can die or get removed while they wait
+            if await asyncio.to_thread(self.is_healthy, pooled):
+                with self._lock:
+                    leased = self.leases[owner] = pooled
+                break
+            threading.Thread(target=self._remove, args=(pooled,), daemon=True).start()
+        if not leased:
+            # pool is empty, start one for this owner right away
+            leased = await asyncio.to_thread(self._create)
+            with self._lock:
+                self.leases[owner] = leased
+        self.refill()
+        return leased
+
+    def release(self, owner: str):
+        with self._lock:
+            leased = self.leases.pop(owner, None)
+        if leased:
+            threading.Thread(target=self._recycle, args=(leased,), daemon=True).start()
+
+    def refill(self):
+        with self._lock:
+            if self.closed: return
+            missing = self.size - len(self.idle) - self.starting
+            self.starting += max(missing, 0)
+        for _ in range(missing):
+            threading.Thread(target=self._start_idle, daemon=True).start()
+
+    async def fill(self):
+        self.refill()
+        while True:
+            with self._lock:
+                if not self.starting: return
+            await asyncio.sleep(0.2)
+
+    def shutdown(self):
+        with self._lock:
+            self.closed = True
+            containers = self.idle + list(self.leases.values())
+            self.idle, self.leases = [], {}
+        # stopping waits for the container, remove them in parallel
+        threads = [threading.Thread(target=self._remove, args=(pooled,), daemon=True) for pooled in containers]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+
+    def remove_stale(self):
+        """Remove pooled containers of this image that a previous run did not clean up."""
+        try:
+            containers = self.client.containers.list(all=True, filters={"ancestor": self.image, "name": self.NAME_PREFIX})
+        except Exception as e:
+            PrintStyle.error(f"Failed to list pooled containers: {e}")
+            return
+        with self._lock:
+            own = {pooled.name for pooled in self.idle + list(self.leases.values())}
+        for container in containers:
+            if container.name.startswith(self.NAME_PREFIX) and container.name not in own:
+                self._remove(PooledContainer(container=container, name=container.name, ssh_port=0))
+
+    def _start_idle(self):
+        try:
+            pooled = self._create()
+            with self._lock:
+                if not self.closed:
+                    self.idle.append(pooled)
+                    pooled = None
+            if pooled: self._remove(pooled)  # started while shutting down
+        except Exception as e:
+            PrintStyle.error(f"Failed to start pooled container: {e}")
+            if self.logger: self.logger.log(type="error", content=f"Failed to start pooled container: {e}")
+        finally:
+            with self._lock:
+                self.starting -= 1
+
+    def _create(self) -> PooledContainer:
+        name = f"{self.NAME_PREFIX}{uuid.uuid4().hex[:8]}"
+        # let docker pick free host ports, every pooled container needs its own
+        container = self.client.containers.run(
+            self.image,
+            detach=True,
+            ports={"22/tcp": None, "80/tcp": None},
+            name=name,
+            volumes=self.volumes, # type: ignore
+        )
+        container.reload()
+        ports = container.ports or {}
+        ssh_port = int((ports.get("22/tcp") or [{}])[0].get("HostPort") or 0)
+        http_port = (ports.get("80/tcp") or [{}])[0].get("HostPort")
+        pooled = PooledContainer(container=container, name=name, ssh_port=ssh_port, http_port=int(http_port) if http_port else None)
+        if not self.wait_ready(pooled):
+            self._remove(pooled)
+            raise Exception(f"Container {name} did not get SSH ready in {self.ready_timeout} seconds")
+        return pooled
+
+    def wait_ready(self, pooled: PooledContainer, timeout: float | None = None) -> bool:
+        return wait_for_ssh(self.host, pooled.ssh_port, timeout or self.ready_timeout)
+
+    def is_healthy(self, pooled: PooledContainer) -> bool:
+        try:
+            pooled.container.reload()
+        except Exception:
+            return False  # removed
+        return pooled.container.status == "running" and self.wait_ready(pooled, self.HEALTH_TIMEOUT)
+
+    def _recycle(self, pooled: PooledContainer):
+        self._remove(pooled)
+        self.refill()
+
+    def _remove(self, pooled: PooledContainer):
+        try:
+            pooled.container.stop()
+            pooled.container.remove()
+        except Exception as e:
+            PrintStyle.error(f"Failed to stop and remove the container: {e}")
+            if self.logger: self.logger.log(type="error", content=f"Failed to stop and remove the container: {e}")
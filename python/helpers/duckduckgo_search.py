@@ -12,19 +12,25 @@
 #     result = api.run(query)
 #     return result
 
+import threading
 from duckduckgo_search import DDGS
 
-def search(query: str, results = 5, region = "wt-wt", time="y") -> list[str]:
+# one long-lived client, DDGS keeps its http session and is not thread safe
+_ddgs: DDGS | None = None
+_lock = threading.Lock()
+
+def search_raw(query: str, results = 5, region = "wt-wt", time="y") -> list[dict]:
+    global _ddgs
+    with _lock:
+        if not _ddgs:
+            _ddgs = DDGS()
+        return list(_ddgs.text(
+            query,
+            region=region,  # Specify region 
+            safesearch="off",  # SafeSearch setting
+            timelimit=time,  # Time limit (y = past year)
+            max_results=results  # Number of results to return
+        ) or [])
 
-    ddgs = DDGS()
-    src = ddgs.text(
-        query,
-        region=region,  # Specify region 
-        safesearch="off",  # SafeSearch setting
-        timelimit=time,  # Time limit (y = past year)
-        max_results=results  # Number of results to return
-    )
-    results = []
-    for s in src:
-        results.append(str(s))
-    return results
\ No newline at end of file
+def search(query: str, results = 5, region = "wt-wt", time="y") -> list[str]:
+    return [str(s) for s in search_raw(query, results, region, time)]
\ No newline at end of file
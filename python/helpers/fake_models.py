@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import json
+import math
+import re
+import time
+from typing import Any, AsyncIterator, Iterator
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from python.helpers import files
+
+# Deterministic offline models for tests and benchmarks, selected with ModelProvider.FAKE.
+# Chat responses are scripted (a list, or a replay file of recorded responses) and played back
+# in order, streamed token by token with a configurable latency.
+
+EMBEDDING_DIMENSIONS = 384
+_TOKEN_PATTERN = re.compile(r"\s*\S+|\s+")
+_WORD_PATTERN = re.compile(r"\w+")
+
+# playback position per model name, the agent creates a new model object for every call
+_positions: dict[str, int] = {}
+
+
+class FakeChatModel(BaseChatModel):
+    responses: list[str] = []
+    token_latency: float = 0.0  # seconds between streamed chunks
+    first_token_latency: float = 0.0  # seconds before the first chunk
+    chunk_tokens: int = 1  # whitespace separated words per chunk
+    name: str = "fake"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def next_response(self, messages: list[BaseMessage]) -> str:
+        position = _positions.get(self.name, 0)
+        _positions[self.name] = position + 1
+        if self.responses:
+            response = self.responses[position % len(self.responses)]
+        else:
+            # nothing scripted, answer with the last message through the response tool
+            last = str(messages[-1].content) if messages else ""
+            response = json.dumps(
+                {
+                    "thoughts": ["Fake model reply"],
+                    "tool_name": "response",
+                    "tool_args": {"text": last[:200]},
+                }
+            )
+        return response
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self.next_response(messages)
+        time.sleep(self.first_token_latency + self.token_latency * len(self._chunks(text)))
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))  # type: ignore
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        text = self.next_response(messages)
+        time.sleep(self.first_token_latency)
+        for chunk in self._chunks(text):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+        yield self._usage_chunk(messages, text)
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        text = self.next_response(messages)
+        await asyncio.sleep(self.first_token_latency)
+        for chunk in self._chunks(text):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+        yield self._usage_chunk(messages, text)
+
+    def _chunks(self, text: str) -> list[str]:
+        tokens = _TOKEN_PATTERN.findall(text)
+        size = max(1, self.chunk_tokens)
+        return ["".join(tokens[i : i + size]) for i in range(0, len(tokens), size)]
+
+    def _usage(self, messages: list[BaseMessage], text: str) -> dict:
+        # word counts stand in for tokens, good enough for accounting
+        input_tokens = sum(len(_WORD_PATTERN.findall(str(m.content))) for m in messages)
+        output_tokens = len(_WORD_PATTERN.findall(text))
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def _usage_chunk(self, messages: list[BaseMessage], text: str) -> ChatGenerationChunk:
+        return ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text))  # type: ignore
+        )
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag of words, texts sharing words end up close to each other."""
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+        for word in _WORD_PATTERN.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        if not norm:
+            vector[0] = 1.0
+            return vector
+        return [v / norm for v in vector]
+
+
+def load_script(path: str) -> list[str]:
+    """Responses from a json list or from json lines of strings or {"response": ...} records."""
+    with open(files.get_abs_path(path), encoding="utf-8") as f:
+        content = f.read().strip()
+    if content.startswith("["):
+        return [_response_text(item) for item in json.loads(content)]
+    return [_response_text(json.loads(line)) for line in content.splitlines() if line.strip()]
+
+
+def get_chat(
+    model_name: str,
+    responses: list[str] | None = None,
+    script: str = "",
+    **kwargs,
+) -> FakeChatModel:
+    # the model name can point to a replay file, handy when selected in settings
+    if not script and not responses and model_name.endswith((".json", ".jsonl")):
+        script = model_name
+    if script:
+        responses = load_script(script)
+    return FakeChatModel(name=model_name, responses=responses or [], **kwargs)
+
+
+def reset(model_name: str = ""):
+    """Start playback from the first response again, for one model name or all of them."""
+    if model_name:
+        _positions.pop(model_name, None)
+    else:
+        _positions.clear()
+
+
+def get_embedding(model_name: str, dimensions: int = EMBEDDING_DIMENSIONS, **kwargs) -> FakeEmbeddings:
+    return FakeEmbeddings(dimensions=dimensions)
+
+
+def _response_text(item: Any) -> str:
+    if isinstance(item, str):
+        return item
+    if isinstance(item, dict) and "response" in item:
+        response = item["response"]
+        return response if isinstance(response, str) else json.dumps(response)
+    return json.dumps(item)
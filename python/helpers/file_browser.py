@@ -5,10 +5,9 @@ import tempfile
 import base64
 from typing import Dict, List, Tuple, Optional, Any
 import zipfile
-from werkzeug.utils import secure_filename
 from datetime import datetime
 
-from python.helpers import files, runtime
+from python.helpers import files, runtime, uploads
 from python.helpers.print_style import PrintStyle
 
 class FileBrowser:
@@ -53,6 +52,12 @@ class FileBrowser:
             PrintStyle.error(f"Error saving file {filename}: {e}")
             return False
 
+    def resolve_dir(self, current_path: str) -> str:
+        target_dir = (self.base_dir / current_path).resolve()
+        if not str(target_dir).startswith(str(self.base_dir)):
+            raise ValueError("Invalid target directory")
+        return str(target_dir)
+
     def save_files(self, files: List, current_path: str = "") -> Tuple[List[str], List[str]]:
         """Save uploaded files and return successful and failed filenames"""
         successful = []
@@ -60,20 +65,17 @@ class FileBrowser:
         
         try:
             # Resolve the target directory path
-            target_dir = (self.base_dir / current_path).resolve()
-            if not str(target_dir).startswith(str(self.base_dir)):
-                raise ValueError("Invalid target directory")
-                
+            target_dir = self.resolve_dir(current_path)
             os.makedirs(target_dir, exist_ok=True)
             
             for file in files:
                 try:
                     if file and self._is_allowed_file(file.filename, file):
-                        filename = secure_filename(file.filename)
-                        file_path = target_dir / filename
-
-                        file.save(str(file_path))
-                        successful.append(filename)
+                        # streamed to disk in chunks, size limited
+                        saved = uploads.save_stream(
+                            file.stream, target_dir, file.filename, self.MAX_FILE_SIZE
+                        )
+                        successful.append(saved["filename"])
                     else:
                         failed.append(file.filename)
                 except Exception as e:
@@ -1,4 +1,5 @@
 from fnmatch import fnmatch
+import io
 import json
 import os, re
 import base64
@@ -288,6 +289,72 @@ def zip_dir(dir_path: str):
     return zip_file_path
 
 
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+class _ZipSink(io.RawIOBase):
+    # unseekable target, zipfile then writes data descriptors and never seeks back
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.size = 0
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        self.size += len(b)
+        self.position += len(b)
+        return len(b)
+
+    def tell(self):
+        return self.position
+
+    def pop(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+def zip_dir_stream(dir_path: str, chunk_size: int = STREAM_CHUNK_SIZE):
+    # same archive as zip_dir, produced chunk by chunk without a temp file
+    full_path = get_abs_path(dir_path)
+    base_name = os.path.basename(full_path)
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zip:
+        for root, _, names in os.walk(full_path):
+            for name in names:
+                file_path = os.path.join(root, name)
+                rel_path = os.path.relpath(file_path, full_path)
+                info = zipfile.ZipInfo.from_file(file_path, os.path.join(base_name, rel_path))
+                info.compress_type = zipfile.ZIP_DEFLATED
+                large = info.file_size * 1.1 > zipfile.ZIP64_LIMIT
+                with open(file_path, "rb") as src, zip.open(info, "w", force_zip64=large) as dest:
+                    while chunk := src.read(chunk_size):
+                        dest.write(chunk)
+                        if sink.size >= chunk_size:
+                            yield sink.pop()
+    # central directory is written on close
+    if sink.size:
+        yield sink.pop()
+
+
+def read_file_chunks(relative_path: str, start: int = 0, end: int | None = None, chunk_size: int = STREAM_CHUNK_SIZE):
+    # yields bytes [start, end) of the file
+    with open(get_abs_path(relative_path), "rb") as f:
+        f.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
 def move_file(relative_path: str, new_path: str):
     abs_path = get_abs_path(relative_path)
     new_abs_path = get_abs_path(new_path)
@@ -5,7 +5,7 @@ from collections.abc import Mapping
 import json
 import math
 from typing import Coroutine, Literal, TypedDict, cast, Union, Dict, List, Any
-from python.helpers import messages, tokens, settings, call_llm
+from python.helpers import messages, tokens, settings, call_llm, tracing, metrics
 from enum import Enum
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, AIMessage
 
@@ -80,6 +80,7 @@ class Message(Record):
         self.ai = ai
         self.content = content
         self.summary: str = ""
+        self._output: OutputMessage | None = None
         self.tokens: int = tokens or self.calculate_tokens()
 
     def get_tokens(self) -> int:
@@ -99,7 +100,11 @@ class Message(Record):
         return False
 
     def output(self):
-        return [OutputMessage(ai=self.ai, content=self.summary or self.content)]
+        # same output object while unchanged, lets LangchainCache reuse converted messages
+        content = self.summary or self.content
+        if not self._output or self._output["content"] is not content:
+            self._output = OutputMessage(ai=self.ai, content=content)
+        return [self._output]
 
     def output_langchain(self):
         return output_langchain(self.output())
@@ -130,10 +135,11 @@ class Topic(Record):
         self.history = history
         self.summary: str = ""
         self.messages: list[Message] = []
+        self._summary_cache = _SummaryCache()
 
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
+            return self._summary_cache.tokens(self.summary)
         else:
             return sum(msg.get_tokens() for msg in self.messages)
 
@@ -146,7 +152,7 @@ class Topic(Record):
 
     def output(self) -> list[OutputMessage]:
         if self.summary:
-            return [OutputMessage(ai=False, content=self.summary)]
+            return [self._summary_cache.output(self.summary)]
         else:
             msgs = [m for r in self.messages for m in r.output()]
             return msgs
@@ -247,10 +253,11 @@ class Bulk(Record):
         self.history = history
         self.summary: str = ""
         self.records: list[Record] = []
+        self._summary_cache = _SummaryCache()
 
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
+            return self._summary_cache.tokens(self.summary)
         else:
             return sum([r.get_tokens() for r in self.records])
 
@@ -258,7 +265,7 @@ class Bulk(Record):
         self, human_label: str = "user", ai_label: str = "ai"
     ) -> list[OutputMessage]:
         if self.summary:
-            return [OutputMessage(ai=False, content=self.summary)]
+            return [self._summary_cache.output(self.summary)]
         else:
             msgs = [m for r in self.records for m in r.output()]
             return msgs
@@ -326,6 +333,10 @@ class History(Record):
     ) -> Message:
         return self.current.add_message(ai, content=content, tokens=tokens)
 
+    def get_frozen_output_count(self) -> int:
+        # outputs of bulks and closed topics, they only change when the history is compressed
+        return sum(len(b.output()) for b in self.bulks) + sum(len(t.output()) for t in self.topics)
+
     def new_topic(self):
         if self.current.messages:
             self.topics.append(self.current)
@@ -357,6 +368,7 @@ class History(Record):
         data = self.to_dict()
         return _json_dumps(data)
 
+    @tracing.traced("history.compress")
     async def compress(self):
         compressed = False
         while True:
@@ -383,6 +395,7 @@ class History(Record):
                     else:
                         compressed_part = await self.compress_bulks()
                     if compressed_part:
+                        metrics.HISTORY_COMPRESSIONS.inc(part=over_part)
                         break
 
             if compressed_part:
@@ -441,6 +454,65 @@ class History(Record):
         return bulk
 
 
+class _SummaryCache:
+    # token count and output of a summary, recomputed only when the summary changes
+    def __init__(self):
+        self.summary = ""
+        self.count = 0
+        self.out: OutputMessage | None = None
+
+    def tokens(self, summary: str) -> int:
+        if summary is not self.summary or not self.count:
+            self.summary, self.count, self.out = summary, tokens.approximate_tokens(summary), None
+        return self.count
+
+    def output(self, summary: str) -> OutputMessage:
+        if not self.out or self.out["content"] is not summary:
+            self.out = OutputMessage(ai=False, content=summary)
+        return self.out
+
+
+class LangchainCache:
+    """Incremental output_langchain, messages converted for the unchanged prefix of the last call are reused."""
+
+    def __init__(self):
+        self.outputs: list[OutputMessage] = []
+        self.messages: list[BaseMessage] = []
+        self.counts: list[int] = []  # grouped message count after each output
+        self.lasts: list[BaseMessage] = []  # last grouped message after each output
+
+    def convert(self, outputs: list[OutputMessage]) -> list[BaseMessage]:
+        same = 0
+        for old, new in zip(self.outputs, outputs):
+            if old is not new:
+                break
+            same += 1
+
+        # the last kept message may have been merged with outputs that changed since
+        if same:
+            messages = self.messages[: self.counts[same - 1] - 1] + [self.lasts[same - 1]]
+        else:
+            messages = []
+        counts, lasts = self.counts[:same], self.lasts[:same]
+
+        for out in outputs[same:]:
+            msg = _output_message_langchain(out)
+            # ensure message type alternation, same as group_messages_abab
+            if messages and isinstance(messages[-1], type(msg)):
+                messages[-1] = type(messages[-1])(content=_merge_outputs(messages[-1].content, msg.content))  # type: ignore
+            else:
+                messages.append(msg)
+            counts.append(len(messages))
+            lasts.append(messages[-1])
+
+        self.outputs, self.messages, self.counts, self.lasts = list(outputs), messages, counts, lasts
+        return list(messages)
+
+    def message_count(self, outputs: int) -> int:
+        # converted messages covering the first outputs of the last convert call
+        return self.counts[min(outputs, len(self.counts)) - 1] if outputs and self.counts else 0
+
+
 def deserialize_history(json_data: str, agent) -> History:
     history = History(agent=agent)
     if json_data:
@@ -512,15 +584,17 @@ def group_messages_abab(messages: list[BaseMessage]) -> list[BaseMessage]:
     return result
 
 
+def _output_message_langchain(m: OutputMessage) -> BaseMessage:
+    if m["ai"]:
+        # return AIMessage(content=serialize_content(m["content"]))
+        return AIMessage(_output_content_langchain(content=m["content"]))  # type: ignore
+    else:
+        # return HumanMessage(content=serialize_content(m["content"]))
+        return HumanMessage(_output_content_langchain(content=m["content"]))  # type: ignore
+
+
 def output_langchain(messages: list[OutputMessage]):
-    result = []
-    for m in messages:
-        if m["ai"]:
-            # result.append(AIMessage(content=serialize_content(m["content"])))
-            result.append(AIMessage(_output_content_langchain(content=m["content"])))  # type: ignore
-        else:
-            # result.append(HumanMessage(content=serialize_content(m["content"])))
-            result.append(HumanMessage(_output_content_langchain(content=m["content"])))  # type: ignore
+    result = [_output_message_langchain(m) for m in messages]
     # ensure message type alternation
     result = group_messages_abab(result)
     return result
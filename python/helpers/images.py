@@ -1,35 +1,197 @@
 from PIL import Image
+import asyncio
+import hashlib
 import io
 import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import TypedDict
+
+from python.helpers import files
+
+# compressed outputs are cached by (path, mtime, size, settings)
+CACHE_FOLDER = "tmp/image_cache"
+CACHE_MAX_FILES = 1000
+MAX_WORKERS = 4
+
+_pool: ProcessPoolExecutor | None = None
+_writes = 0
+
+
+class ImageResult(TypedDict):
+    path: str
+    exists: bool
+    data: bytes | None
+    error: str
+    cached: bool
+    seconds: float
 
 
 def compress_image(image_data: bytes, *, max_pixels: int = 256_000, quality: int = 50) -> bytes:
     """Compress an image by scaling it down and converting to JPEG with quality settings.
-    
+
     Args:
         image_data: Raw image bytes
         max_pixels: Maximum number of pixels in the output image (width * height)
         quality: JPEG quality setting (1-100)
-    
+
     Returns:
         Compressed image as bytes
     """
     # load image from bytes
     img = Image.open(io.BytesIO(image_data))
-    
+
     # calculate scaling factor to get to max_pixels
     current_pixels = img.width * img.height
     if current_pixels > max_pixels:
         scale = math.sqrt(max_pixels / current_pixels)
         new_width = int(img.width * scale)
         new_height = int(img.height * scale)
+        # let the jpeg decoder downscale by powers of two first, much cheaper than decoding full size
+        img.draft("RGB", (new_width, new_height))
         img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-    
+
     # convert to RGB if needed (for JPEG)
-    if img.mode in ('RGBA', 'P'):
+    if img.mode not in ('RGB', 'L'):
         img = img.convert('RGB')
-    
+
     # save as JPEG with compression
     output = io.BytesIO()
     img.save(output, format='JPEG', quality=quality, optimize=True)
     return output.getvalue()
+
+
+def preview_image(image_data: bytes, *, max_size: int = 800, quality: int = 70) -> bytes:
+    """Fit an image into max_size x max_size and return it as JPEG bytes."""
+    img = Image.open(io.BytesIO(image_data))
+    img.draft("RGB", (max_size, max_size))
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    img.thumbnail((max_size, max_size))
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=quality, optimize=True)
+    return output.getvalue()
+
+
+async def compress_image_files(
+    paths: list[str], max_pixels: int = 256_000, quality: int = 50
+) -> list[ImageResult]:
+    """Compress image files in parallel worker processes, served from the disk cache when unchanged."""
+    return await _process_files(paths, "compress", {"max_pixels": max_pixels, "quality": quality})
+
+
+def preview_image_file(path: str, max_size: int = 800, quality: int = 70) -> ImageResult:
+    """Blocking variant for synchronous callers, same worker pool and disk cache."""
+    start = time.perf_counter()
+    params = {"max_size": max_size, "quality": quality}
+    result = ImageResult(path=path, exists=True, data=None, error="", cached=False, seconds=0.0)
+    try:
+        abs_path = files.get_abs_path(path)
+        try:
+            stat = os.stat(abs_path)
+        except FileNotFoundError:
+            result["exists"] = False
+            return result
+
+        key = _cache_key(abs_path, stat, "preview", params)
+        cached = _read_cache(key)
+        if cached is not None:
+            result["data"] = cached
+            result["cached"] = True
+        else:
+            result["data"] = get_pool().submit(_process_worker, abs_path, "preview", params).result()
+            _write_cache(key, result["data"])
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    finally:
+        result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if not _pool:
+        _pool = ProcessPoolExecutor(max_workers=min(MAX_WORKERS, os.cpu_count() or 1))
+    return _pool
+
+
+async def _process_files(paths: list[str], operation: str, params: dict) -> list[ImageResult]:
+    return list(
+        await asyncio.gather(*[_process_file(path, operation, params) for path in paths])
+    )
+
+
+async def _process_file(path: str, operation: str, params: dict) -> ImageResult:
+    start = time.perf_counter()
+    result = ImageResult(path=path, exists=True, data=None, error="", cached=False, seconds=0.0)
+    try:
+        abs_path = files.get_abs_path(path)
+        try:
+            stat = os.stat(abs_path)
+        except FileNotFoundError:
+            result["exists"] = False
+            return result
+
+        key = _cache_key(abs_path, stat, operation, params)
+        cached = await asyncio.to_thread(_read_cache, key)
+        if cached is not None:
+            result["data"] = cached
+            result["cached"] = True
+        else:
+            loop = asyncio.get_running_loop()
+            result["data"] = await loop.run_in_executor(
+                get_pool(), _process_worker, abs_path, operation, params
+            )
+            await asyncio.to_thread(_write_cache, key, result["data"])
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    finally:
+        result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def _process_worker(abs_path: str, operation: str, params: dict) -> bytes:
+    # runs in a worker process
+    with open(abs_path, "rb") as f:
+        data = f.read()
+    if operation == "preview":
+        return preview_image(data, **params)
+    return compress_image(data, **params)
+
+
+def _cache_key(abs_path: str, stat: os.stat_result, operation: str, params: dict) -> str:
+    settings = ",".join(f"{k}={v}" for k, v in sorted(params.items()))
+    raw = f"{abs_path}|{stat.st_mtime_ns}|{stat.st_size}|{operation}|{settings}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _read_cache(key: str) -> bytes | None:
+    try:
+        with open(files.get_abs_path(CACHE_FOLDER, f"{key}.jpg"), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_cache(key: str, data: bytes):
+    global _writes
+    path = files.get_abs_path(CACHE_FOLDER, f"{key}.jpg")
+    files.make_dirs(path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+    # trim the oldest entries now and then
+    _writes += 1
+    if _writes % 50 == 0:
+        folder = files.get_abs_path(CACHE_FOLDER)
+        entries = [os.path.join(folder, name) for name in os.listdir(folder)]
+        if len(entries) > CACHE_MAX_FILES:
+            entries.sort(key=lambda p: os.path.getmtime(p))
+            for old in entries[: len(entries) - CACHE_MAX_FILES]:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
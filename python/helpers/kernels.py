@@ -0,0 +1,61 @@
+import base64
+import json
+import uuid
+import zlib
+from python.helpers import files
+
+# must match the markers in lib/kernels/*
+READY_MARKER = "@@A0-KERNEL-READY@@"
+END_MARKER = "@@A0-KERNEL-END@@"
+
+# below CodeExecution max_exec_timeout, so the kernel can report the timeout itself
+EXEC_TIMEOUT = 170
+# how long the tool waits for a frame to end, a little above the kernel timeout
+OUTPUT_TIMEOUT = EXEC_TIMEOUT + 10
+
+FRAME_LINE_LENGTH = 1000  # keep lines far below the 4096 bytes tty line limit
+
+_launch_commands: dict[str, str] = {}
+
+
+def launch_command(runtime: str) -> str:
+    """Shell command starting a kernel for the runtime, the kernel source is sent inline."""
+    if runtime not in _launch_commands:
+        if runtime == "python":
+            source = _pack(files.read_file_bin("lib/kernels/python_kernel.py"))
+            kernel = f"python3 -u -c \"import base64,zlib;exec(zlib.decompress(base64.b64decode('{source}')))\""
+        elif runtime == "nodejs":
+            source = _pack(files.read_file_bin("lib/kernels/node_kernel.js"))
+            kernel = f"node -e \"eval(require('zlib').inflateSync(Buffer.from('{source}','base64')).toString())\""
+        else:
+            raise ValueError(f"No kernel for runtime '{runtime}'")
+        # frames must not be echoed back by the terminal
+        _launch_commands[runtime] = (
+            f"stty -echo 2>/dev/null; {kernel} 2>&1; stty echo 2>/dev/null"
+        )
+    return _launch_commands[runtime]
+
+
+def new_frame_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def end_marker(frame_id: str) -> str:
+    """End marker line printed by the kernel after the frame with this id."""
+    return f"{END_MARKER}{frame_id}"
+
+
+def encode_frame(
+    code: str = "", timeout: int = EXEC_TIMEOUT, exit: bool = False, id: str = ""
+) -> str:
+    data = json.dumps({"code": code, "timeout": timeout, "exit": exit, "id": id})
+    encoded = base64.b64encode(data.encode("utf-8")).decode("ascii")
+    lines = [
+        encoded[i : i + FRAME_LINE_LENGTH]
+        for i in range(0, len(encoded), FRAME_LINE_LENGTH)
+    ]
+    return "\n".join(lines + ["."])
+
+
+def _pack(source: bytes) -> str:
+    return base64.b64encode(zlib.compress(source, 9)).decode("ascii")
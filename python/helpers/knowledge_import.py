@@ -29,11 +29,67 @@ class KnowledgeImport(TypedDict):
 def calculate_checksum(file_path: str) -> str:
     hasher = hashlib.md5()
     with open(file_path, "rb") as f:
-        buf = f.read()
-        hasher.update(buf)
+        while buf := f.read(1024 * 1024):
+            hasher.update(buf)
     return hasher.hexdigest()
 
 
+# Mapping file extensions to corresponding loader classes
+file_types_loaders = {
+    "txt": TextLoader,
+    "pdf": PyPDFLoader,
+    "csv": CSVLoader,
+    "html": UnstructuredHTMLLoader,
+    # "json": JSONLoader,
+    "json": TextLoader,
+    # "md": UnstructuredMarkdownLoader,
+    "md": TextLoader,
+}
+
+
+def load_knowledge_file(
+    file_path: str,
+    index: Dict[str, KnowledgeImport],
+    metadata: dict[str, Any] = {},
+) -> int | None:
+    # updates the index entry of one file, returns number of documents loaded if it changed
+    ext = file_path.split(".")[-1].lower()
+    if ext not in file_types_loaders:
+        return None
+
+    checksum = calculate_checksum(file_path)
+    file_key = file_path  # os.path.relpath(file_path, knowledge_dir)
+
+    # Load existing data from the index or create a new entry
+    file_data = index.get(file_key, {})
+
+    if file_data.get("checksum") == checksum:
+        file_data["state"] = "original"
+    else:
+        file_data["state"] = "changed"
+
+    loaded = None
+    if file_data["state"] == "changed":
+        file_data["checksum"] = checksum
+        loader_cls = file_types_loaders[ext]
+        loader = loader_cls(
+            file_path,
+            **(
+                text_loader_kwargs
+                if ext in ["txt", "csv", "html", "md"]
+                else {}
+            ),
+        )
+        file_data["documents"] = loader.load_and_split()
+        for doc in file_data["documents"]:
+            doc.metadata = {**doc.metadata, **metadata}
+        loaded = len(file_data["documents"])
+
+    # Update the index
+    index[file_key] = file_data  # type: ignore
+    return loaded
+
+
 def load_knowledge(
     log_item: LogItem | None,
     knowledge_dir: str,
@@ -44,18 +100,6 @@ def load_knowledge(
 
     # from python.helpers.memory import Memory
 
-    # Mapping file extensions to corresponding loader classes
-    file_types_loaders = {
-        "txt": TextLoader,
-        "pdf": PyPDFLoader,
-        "csv": CSVLoader,
-        "html": UnstructuredHTMLLoader,
-        # "json": JSONLoader,
-        "json": TextLoader,
-        # "md": UnstructuredMarkdownLoader,
-        "md": TextLoader,
-    }
-
     cnt_files = 0
     cnt_docs = 0
 
@@ -80,39 +124,11 @@ def load_knowledge(
             )
 
     for file_path in kn_files:
-        ext = file_path.split(".")[-1].lower()
-        if ext in file_types_loaders:
-            checksum = calculate_checksum(file_path)
-            file_key = file_path  # os.path.relpath(file_path, knowledge_dir)
-
-            # Load existing data from the index or create a new entry
-            file_data = index.get(file_key, {})
-
-            if file_data.get("checksum") == checksum:
-                file_data["state"] = "original"
-            else:
-                file_data["state"] = "changed"
-
-            if file_data["state"] == "changed":
-                file_data["checksum"] = checksum
-                loader_cls = file_types_loaders[ext]
-                loader = loader_cls(
-                    file_path,
-                    **(
-                        text_loader_kwargs
-                        if ext in ["txt", "csv", "html", "md"]
-                        else {}
-                    ),
-                )
-                file_data["documents"] = loader.load_and_split()
-                for doc in file_data["documents"]:
-                    doc.metadata = {**doc.metadata, **metadata}
-                cnt_files += 1
-                cnt_docs += len(file_data["documents"])
-                # PrintStyle.standard(f"Imported {len(file_data['documents'])} documents from {file_path}")
-
-            # Update the index
-            index[file_key] = file_data  # type: ignore
+        loaded = load_knowledge_file(file_path, index, metadata)
+        if loaded is not None:
+            cnt_files += 1
+            cnt_docs += loaded
+            # PrintStyle.standard(f"Imported {loaded} documents from {file_path}")
 
     # loop index where state is not set and mark it as removed
     for file_key, file_data in index.items():
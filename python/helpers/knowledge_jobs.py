@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, asdict
+from typing import Literal
+
+from agent import AgentContext
+from python.helpers import defer
+from python.helpers.errors import format_error
+from python.helpers.print_style import PrintStyle
+
+# Background knowledge ingestion, one job per import request.
+# Jobs run one after another on their own loop and only index the files they were given.
+
+MAX_FINISHED_JOBS = 50
+
+JobState = Literal["queued", "running", "done", "error"]
+
+
+@dataclass
+class KnowledgeJob:
+    id: str
+    context_id: str
+    files: list[str]
+    area: str = "main"
+    state: JobState = "queued"
+    processed: int = 0
+    documents: int = 0
+    error: str = ""
+    created: float = field(default_factory=time.time)
+    finished: float = 0.0
+
+    def output(self) -> dict:
+        data = asdict(self)
+        data["total"] = len(self.files)
+        data["files"] = [f.rsplit("/", 1)[-1] for f in self.files]
+        return data
+
+
+_jobs: dict[str, KnowledgeJob] = {}
+_lock = threading.Lock()
+_run_lock: asyncio.Lock | None = None
+
+
+def start(context: AgentContext, file_paths: list[str], area: str = "main") -> KnowledgeJob:
+    job = KnowledgeJob(id=str(uuid.uuid4()), context_id=context.id, files=file_paths, area=area)
+    with _lock:
+        _jobs[job.id] = job
+        _prune()
+    defer.EventLoopThread("KnowledgeImport").run_coroutine(_run(job))
+    return job
+
+
+def get(job_id: str) -> KnowledgeJob | None:
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def list_jobs(context_id: str = "") -> list[KnowledgeJob]:
+    with _lock:
+        return [j for j in _jobs.values() if not context_id or j.context_id == context_id]
+
+
+async def _run(job: KnowledgeJob):
+    global _run_lock
+    if not _run_lock:
+        _run_lock = asyncio.Lock()  # created on the job loop
+    async with _run_lock:
+        from python.helpers.memory import Memory
+
+        job.state = "running"
+        context = AgentContext.get(job.context_id)
+        try:
+            if not context:
+                raise Exception(f"Context {job.context_id} not found")
+
+            def on_progress(processed: int, documents: int):
+                job.processed = processed
+                job.documents = documents
+
+            db = await Memory.get(context.agent0)
+            await db.import_knowledge_files(job.files, job.area, on_progress)
+            job.state = "done"
+            PrintStyle.standard(
+                f"Knowledge import {job.id}: {job.documents} documents from {len(job.files)} files."
+            )
+        except Exception as e:
+            job.state = "error"
+            job.error = format_error(e)
+            PrintStyle.error(f"Knowledge import {job.id} failed: {job.error}")
+        finally:
+            job.finished = time.time()
+
+
+def _prune():
+    finished = sorted(
+        (j for j in _jobs.values() if j.state in ("done", "error")),
+        key=lambda j: j.finished,
+    )
+    for job in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del _jobs[job.id]
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any, List, Sequence
+from typing import Any, Callable, List, Sequence
 from langchain.storage import InMemoryByteStore, LocalFileStore
 from langchain.embeddings import CacheBackedEmbeddings
 
@@ -12,7 +12,7 @@ from langchain_community.vectorstores.utils import (
 )
 from langchain_core.embeddings import Embeddings
 
-import os, json
+import os, json, threading
 
 import numpy as np
 
@@ -20,7 +20,7 @@ from python.helpers.print_style import PrintStyle
 from . import files
 from langchain_core.documents import Document
 import uuid
-from python.helpers import knowledge_import
+from python.helpers import knowledge_import, tracing, metrics
 from python.helpers.log import Log, LogItem
 from enum import Enum
 from agent import Agent, ModelConfig
@@ -28,10 +28,38 @@ import models
 
 
 class MyFaiss(FAISS):
+    # agents and the background knowledge import use the same index from different threads,
+    # faiss and the docstore are not thread safe: index access is locked, embedding is not
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.RLock()
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs) -> List[str]:
+        texts = list(texts)
+        embeddings = self._embed_documents(texts)
+        return self.add_embeddings(zip(texts, embeddings), metadatas=metadatas, ids=ids, **kwargs)
+
+    def add_embeddings(self, *args, **kwargs) -> List[str]:
+        with self.lock:
+            return super().add_embeddings(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with self.lock:
+            return super().delete(*args, **kwargs)
+
+    def similarity_search_with_score_by_vector(self, *args, **kwargs):
+        with self.lock:
+            return super().similarity_search_with_score_by_vector(*args, **kwargs)
+
+    def save_local(self, *args, **kwargs):
+        with self.lock:
+            return super().save_local(*args, **kwargs)
+
     # override aget_by_ids
     def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
         # return all self.docstore._dict[id] in ids
-        return [self.docstore._dict[id] for id in (ids if isinstance(ids, list) else [ids]) if id in self.docstore._dict]  # type: ignore
+        with self.lock:
+            return [self.docstore._dict[id] for id in (ids if isinstance(ids, list) else [ids]) if id in self.docstore._dict]  # type: ignore
 
     async def aget_by_ids(self, ids: Sequence[str], /) -> List[Document]:
         return self.get_by_ids(ids)
@@ -51,6 +79,7 @@ class Memory:
     index: dict[str, "MyFaiss"] = {}
 
     @staticmethod
+    @tracing.traced("memory.get")
     async def get(agent: Agent):
         memory_subdir = agent.config.memory_subdir or "default"
         if Memory.index.get(memory_subdir) is None:
@@ -216,46 +245,72 @@ class Memory:
         if log_item:
             log_item.update(heading="Preloading knowledge...")
 
-        # db abs path
-        db_dir = Memory._abs_db_dir(memory_subdir)
-
-        # Load the index file if it exists
-        index_path = files.get_abs_path(db_dir, "knowledge_import.json")
-
-        # make sure directory exists
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir)
-
-        index: dict[str, knowledge_import.KnowledgeImport] = {}
-        if os.path.exists(index_path):
-            with open(index_path, "r") as f:
-                index = json.load(f)
+        index = self._load_knowledge_index()
 
         # preload knowledge folders
         index = self._preload_knowledge_folders(log_item, kn_dirs, index)
 
         for file in index:
-            if index[file]["state"] in ["changed", "removed"] and index[file].get(
-                "ids", []
-            ):  # for knowledge files that have been changed or removed and have IDs
-                await self.delete_documents_by_ids(
-                    index[file]["ids"]
-                )  # remove original version
-            if index[file]["state"] == "changed":
-                index[file]["ids"] = await self.insert_documents(
-                    index[file]["documents"]
-                )  # insert new version
+            await self._apply_knowledge_entry(index[file])
 
         # remove index where state="removed"
         index = {k: v for k, v in index.items() if v["state"] != "removed"}
+        self._save_knowledge_index(index)
 
+    async def import_knowledge_files(
+        self,
+        file_paths: list[str],
+        area: str = "main",
+        on_progress: Callable[[int, int], None] | None = None,
+    ) -> int:
+        """Index only the given knowledge files, returns the number of documents inserted."""
+        index = self._load_knowledge_index()
+        cnt_docs = 0
+        for i, file_path in enumerate(file_paths):
+            if knowledge_import.load_knowledge_file(file_path, index, {"area": area}) is not None:
+                cnt_docs += await self._apply_knowledge_entry(index[file_path])
+            if on_progress:
+                on_progress(i + 1, cnt_docs)
+        self._save_knowledge_index(index)
+        return cnt_docs
+
+    async def _apply_knowledge_entry(self, entry: knowledge_import.KnowledgeImport) -> int:
+        state = entry.get("state")
+        if state in ["changed", "removed"] and entry.get(
+            "ids", []
+        ):  # for knowledge files that have been changed or removed and have IDs
+            await self.delete_documents_by_ids(entry["ids"])  # remove original version
+        if state == "changed":
+            entry["ids"] = await self.insert_documents(
+                entry["documents"]
+            )  # insert new version
+            return len(entry["ids"])
+        return 0
+
+    def _knowledge_index_path(self) -> str:
+        # db abs path
+        db_dir = Memory._abs_db_dir(self.memory_subdir)
+        # make sure directory exists
+        if not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        return files.get_abs_path(db_dir, "knowledge_import.json")
+
+    def _load_knowledge_index(self) -> dict[str, knowledge_import.KnowledgeImport]:
+        # Load the index file if it exists
+        index_path = self._knowledge_index_path()
+        if os.path.exists(index_path):
+            with open(index_path, "r") as f:
+                return json.load(f)
+        return {}
+
+    def _save_knowledge_index(self, index: dict[str, knowledge_import.KnowledgeImport]):
         # strip state and documents from index and save it
         for file in index:
             if "documents" in index[file]:
                 del index[file]["documents"]  # type: ignore
             if "state" in index[file]:
                 del index[file]["state"]  # type: ignore
-        with open(index_path, "w") as f:
+        with open(self._knowledge_index_path(), "w") as f:
             json.dump(index, f)
 
     def _preload_knowledge_folders(
@@ -285,6 +340,7 @@ class Memory:
 
         return index
 
+    @tracing.traced("memory.search")
     async def search_similarity_threshold(
         self, query: str, limit: int, threshold: float, filter: str = ""
     ):
@@ -295,14 +351,42 @@ class Memory:
             model_config=self.agent.config.embeddings_model, input=query
         )
 
-        return await self.db.asearch(
-            query,
-            search_type="similarity_score_threshold",
-            k=limit,
-            score_threshold=threshold,
-            filter=comparator,
+        with metrics.Timer(metrics.MEMORY_SEARCH, memory_subdir=self.memory_subdir):
+            return await self.db.asearch(
+                query,
+                search_type="similarity_score_threshold",
+                k=limit,
+                score_threshold=threshold,
+                filter=comparator,
+            )
+
+    @tracing.traced("memory.search_areas")
+    async def search_areas(
+        self, query: str, limits: dict[str, int], threshold: float, fetch_k: int = 50
+    ) -> dict[str, list[tuple[Document, float]]]:
+        """One embedding and one index lookup for several areas, up to limits[area] best documents with scores per area."""
+        await self.agent.rate_limiter(
+            model_config=self.agent.config.embeddings_model, input=query
         )
 
+        with metrics.Timer(metrics.MEMORY_SEARCH, memory_subdir=self.memory_subdir):
+            results = await self.db.asimilarity_search_with_relevance_scores(
+                query,
+                k=fetch_k,
+                fetch_k=fetch_k,
+                score_threshold=threshold,
+                filter=lambda metadata: metadata.get("area", "") in limits,
+            )
+
+        # results come sorted by score, the first ones of each area win
+        found: dict[str, list[tuple[Document, float]]] = {area: [] for area in limits}
+        for doc, score in results:
+            area = doc.metadata.get("area", "")
+            if len(found[area]) < limits[area]:
+                found[area].append((doc, score))
+        return found
+
+    @tracing.traced("memory.delete_by_query")
     async def delete_documents_by_query(
         self, query: str, threshold: float, filter: str = ""
     ):
@@ -337,6 +421,7 @@ class Memory:
             self._save_db()  # persist
         return removed
 
+    @tracing.traced("memory.delete_by_ids")
     async def delete_documents_by_ids(self, ids: list[str]):
         # aget_by_ids is not yet implemented in faiss, need to do a workaround
         rem_docs = self.db.get_by_ids(ids)  # existing docs to remove (prevents error)
@@ -353,6 +438,7 @@ class Memory:
         ids = await self.insert_documents([doc])
         return ids[0]
 
+    @tracing.traced("memory.insert")
     async def insert_documents(self, docs: list[Document]):
         ids = [str(uuid.uuid4()) for _ in range(len(docs))]
         timestamp = self.get_timestamp()
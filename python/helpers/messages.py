@@ -21,6 +21,62 @@ def truncate_text(agent, output, threshold=1000):
     return truncated_output
 
 
+class OutputBuffer:
+    """Growing text that only keeps its first and last `keep` characters.
+
+    `line` is the still open last line, it can be rewritten until it is
+    committed with append().
+    """
+
+    def __init__(self, keep: int = 10000):
+        self.keep = keep
+        self.head = ""
+        self.tail = ""
+        self.line = ""
+        self.length = 0  # committed characters, including the dropped middle
+
+    def append(self, text: str):
+        if not text:
+            return
+        self.length += len(text)
+        if len(self.head) < self.keep:
+            self.head += text[: self.keep - len(self.head)]
+        self.tail += text
+        if len(self.tail) > 2 * self.keep:  # trim in batches, amortized O(1)
+            self.tail = self.tail[-self.keep :]
+
+    def __len__(self):
+        return self.length + len(self.line)
+
+    def start(self, length: int) -> str:
+        if len(self.head) >= length:
+            return self.head[:length]
+        return (self.head + self.line)[:length]
+
+    def end(self, length: int) -> str:
+        if length <= 0:
+            return ""
+        if len(self.line) >= length:
+            return self.line[-length:]
+        return self.tail[-(length - len(self.line)) :] + self.line
+
+
+def truncate_buffer(agent, buffer: OutputBuffer, threshold=1000):
+    """Same as truncate_text on the whole buffer, without materializing it."""
+    threshold = min(int(threshold) or buffer.keep, buffer.keep)
+    if len(buffer) <= threshold:
+        return buffer.start(threshold)
+
+    placeholder = agent.read_prompt(
+        "fw.msg_truncated.md", length=(len(buffer) - threshold)
+    )
+
+    start_len = (threshold - len(placeholder)) // 2
+    end_len = threshold - len(placeholder) - start_len
+
+    return buffer.start(start_len) + placeholder + buffer.end(end_len)
+
+
 def truncate_dict_by_ratio(agent, data: dict|list|str, threshold_chars: int, truncate_to: int):
     threshold_chars = int(threshold_chars)
     truncate_to = int(truncate_to)
@@ -0,0 +1,319 @@
+import asyncio
+import math
+import sys
+import threading
+import time
+from typing import Awaitable, Callable
+
+# Counters, gauges and histograms rendered in the Prometheus text format by the metrics api handler.
+# Recording is a dict update under a lock, values that already live elsewhere (contexts, memory
+# indexes, rate limiters, scheduler) are read by collectors only when metrics are scraped.
+
+PREFIX = "a0_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+LAG_INTERVAL = 1.0  # seconds between event loop lag probes
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str):
+        self.name = PREFIX + name
+        self.help = help
+        self._lock = threading.Lock()
+        _registry[self.name] = self
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        return []
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self.values: dict[LabelKey, float] = {}
+
+    def inc(self, value: float = 1.0, **labels: str):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + value
+
+    def replace(self, values: dict[LabelKey, float]):
+        # collectors swap in a complete snapshot, labels that disappeared are dropped
+        with self._lock:
+            self.values = values
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self.values.items()]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels: str):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = buckets
+        self.values: dict[LabelKey, list[float]] = {}  # bucket counts, then sum and count
+
+    def observe(self, value: float, **labels: str):
+        key = _label_key(labels)
+        with self._lock:
+            data = self.values.get(key)
+            if data is None:
+                data = self.values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+
+    def samples(self):
+        result = []
+        with self._lock:
+            items = [(key, list(data)) for key, data in self.values.items()]
+        for key, data in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                result.append((f"{self.name}_bucket", key + (("le", _format_value(bound)),), cumulative))
+            result.append((f"{self.name}_bucket", key + (("le", "+Inf"),), data[-1]))
+            result.append((f"{self.name}_sum", key, data[-2]))
+            result.append((f"{self.name}_count", key, data[-1]))
+        return result
+
+
+class Timer:
+    """Context manager observing the elapsed seconds into a histogram."""
+
+    def __init__(self, histogram: Histogram, **labels: str):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+_registry: dict[str, Metric] = {}
+_collectors: list[Callable[[], Awaitable[None] | None]] = []
+
+
+def collector(func: Callable[[], Awaitable[None] | None]):
+    """Register a function that refreshes gauges right before metrics are rendered."""
+    _collectors.append(func)
+    return func
+
+
+async def render() -> str:
+    start_lag_monitor()
+    for func in _collectors:
+        try:
+            result = func()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception:
+            pass  # a failing collector must not break the others
+    lines = []
+    for metric in list(_registry.values()):
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+def labels(**values: str) -> LabelKey:
+    return _label_key(values)
+
+
+def _label_key(labels: dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: LabelKey) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{k}="{v.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), chr(92) + "n")}"'
+        for k, v in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# metrics recorded by the agent, models, memory, history, search and scheduler
+MODEL_REQUESTS = Counter("model_requests_total", "Model calls per provider and model.")
+MODEL_INPUT_TOKENS = Counter("model_input_tokens_total", "Approximate input tokens sent to models.")
+MODEL_OUTPUT_TOKENS = Counter("model_output_tokens_total", "Approximate output tokens received from models.")
+MODEL_LATENCY = Histogram("model_call_seconds", "Duration of streamed model calls after rate limiting.")
+MODEL_FIRST_TOKEN = Histogram("model_first_token_seconds", "Time from request to the first streamed token.")
+RATE_LIMIT_WAIT = Histogram("rate_limit_wait_seconds", "Time spent waiting for model rate limits.")
+MEMORY_SEARCH = Histogram("memory_search_seconds", "Memory similarity search latency per memory subdir.")
+UTILITY_CACHE = Counter("utility_cache_total", "Utility model response cache lookups by result.")
+RECALL = Histogram("recall_seconds", "Memory recall latency, direct embedding or with a utility model query (llm).")
+HISTORY_COMPRESSIONS = Counter("history_compressions_total", "History compression steps per compressed part.")
+SEARCH_ENGINE = Histogram("search_engine_seconds", "Web search latency per engine and outcome.")
+SCHEDULER_RUNS = Histogram("scheduler_task_run_seconds", "Scheduler task run duration per task type and outcome.", (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600))
+EVENT_LOOP_LAG = Gauge("event_loop_lag_seconds", "Last measured scheduling delay of background event loops.")
+
+_lag_thread: threading.Thread | None = None
+_lag_lock = threading.Lock()
+
+
+def start_lag_monitor():
+    """Probe every background event loop once per LAG_INTERVAL from a daemon thread."""
+    global _lag_thread
+    with _lag_lock:
+        if _lag_thread:
+            return
+        _lag_thread = threading.Thread(target=_lag_monitor, daemon=True, name="MetricsLag")
+        _lag_thread.start()
+
+
+def _lag_monitor():
+    from python.helpers.defer import EventLoopThread
+
+    while True:
+        for name, thread in list(EventLoopThread._instances.items()):
+            loop = getattr(thread, "loop", None)
+            if not loop or not loop.is_running():
+                continue
+            posted = time.perf_counter()
+
+            def probe(name=name, posted=posted):
+                EVENT_LOOP_LAG.set(time.perf_counter() - posted, loop=name)
+
+            try:
+                loop.call_soon_threadsafe(probe)
+            except RuntimeError:
+                pass  # loop closed meanwhile
+        time.sleep(LAG_INTERVAL)
+
+
+# values read from their owners when metrics are scraped
+CONTEXTS = Gauge("contexts", "Agent contexts by state.")
+AGENTS = Gauge("agents", "Agents including subordinates across all contexts.")
+RATE_LIMIT_WINDOW = Gauge("rate_limit_window", "Usage within the current rate limit window per provider, model and key.")
+RATE_LIMIT = Gauge("rate_limit", "Configured rate limits per provider, model and key, 0 is unlimited.")
+PROMPT_CACHE_TOKENS = Counter("prompt_cache_tokens_total", "Provider reported prompt tokens per provider, model and kind.")
+MEMORY_INDEX_SIZE = Gauge("memory_index_documents", "Documents in loaded memory indexes per memory subdir.")
+SCHEDULER_TASKS = Gauge("scheduler_tasks", "Scheduler tasks by type and state.")
+SCHEDULER_DUE = Gauge("scheduler_due_tasks", "Idle scheduler tasks that are due to run.")
+BROWSER_POOL = Gauge("browser_pool", "Browser pool counters summed over all pools.")
+TRANSCRIPTION = Gauge("transcription", "Whisper transcription worker counters.")
+
+
+@collector
+def _collect_agents():
+    from agent import AgentContext
+
+    contexts = list(AgentContext._contexts.values())
+    running = sum(1 for c in contexts if c.task and c.task.is_alive())
+    agents = sum(len(context.agent0.get_agent_tree()) for context in contexts)
+    CONTEXTS.replace({labels(state="running"): running, labels(state="idle"): len(contexts) - running})
+    AGENTS.replace({(): agents})
+
+
+@collector
+def _collect_rate_limits():
+    import models
+
+    window, limits = {}, {}
+    now = time.time()
+    for key, limiter in list(models.rate_limiters.items()):
+        provider, _, model = key.partition("\\")
+        cutoff = now - limiter.timeframe  # entries are only cleaned up on the next wait
+        for name, values in list(limiter.values.items()):
+            window[labels(provider=provider, model=model, key=name)] = sum(v for t, v in list(values) if t > cutoff)
+        for name, limit in limiter.limits.items():
+            limits[labels(provider=provider, model=model, key=name)] = limit
+    RATE_LIMIT_WINDOW.replace(window)
+    RATE_LIMIT.replace(limits)
+
+
+@collector
+def _collect_prompt_cache():
+    from python.helpers import prompt_cache
+
+    values = {}
+    for key, usage in prompt_cache.get_usage().items():
+        provider, _, model = key.partition("\\")
+        for kind in ("input_tokens", "cache_read_tokens", "cache_creation_tokens"):
+            values[labels(provider=provider, model=model, kind=kind.removesuffix("_tokens"))] = usage[kind]
+    PROMPT_CACHE_TOKENS.replace(values)
+
+
+@collector
+def _collect_memory():
+    memory = sys.modules.get("python.helpers.memory")
+    if not memory:
+        return
+    MEMORY_INDEX_SIZE.replace(
+        {labels(memory_subdir=subdir): db.index.ntotal for subdir, db in list(memory.Memory.index.items())}
+    )
+
+
+@collector
+def _collect_scheduler():
+    # only when the scheduler is in use, importing it would initialize it
+    task_scheduler = sys.modules.get("python.helpers.task_scheduler")
+    if not task_scheduler:
+        return
+    tasks, due = {}, 0
+    for task in task_scheduler.TaskScheduler.get().get_tasks():
+        key = labels(type=task.type.value, state=task.state.value)
+        tasks[key] = tasks.get(key, 0) + 1
+        if task.state == task_scheduler.TaskState.IDLE and task.check_schedule():
+            due += 1
+    SCHEDULER_TASKS.replace(tasks)
+    SCHEDULER_DUE.replace({(): due})
+
+
+@collector
+def _collect_browser():
+    browser = sys.modules.get("python.helpers.browser")
+    if not browser:
+        return
+    totals: dict[LabelKey, float] = {}
+    for pool in list(browser.BrowserPool._pools.values()):
+        for name, value in pool.get_metrics().items():
+            key = labels(metric=name)
+            totals[key] = totals.get(key, 0) + value
+    BROWSER_POOL.replace(totals)
+
+
+@collector
+def _collect_transcription():
+    whisper = sys.modules.get("python.helpers.whisper")
+    worker = whisper and whisper.TranscriptionWorker._instance
+    if not worker:
+        return
+    TRANSCRIPTION.replace({labels(metric=name): value for name, value in worker.get_metrics().items()})
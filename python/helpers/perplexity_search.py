@@ -2,10 +2,19 @@
 from openai import OpenAI
 import models
 
+# clients are reused so the underlying connection pool stays warm
+_clients: dict[tuple[str, str], OpenAI] = {}
+
+def get_client(api_key: str, base_url: str) -> OpenAI:
+    client = _clients.get((api_key, base_url))
+    if not client:
+        client = _clients[(api_key, base_url)] = OpenAI(api_key=api_key, base_url=base_url)
+    return client
+
 def perplexity_search(query:str, model_name="llama-3.1-sonar-large-128k-online",api_key=None,base_url="https://api.perplexity.ai"):    
     api_key = api_key or models.get_api_key("perplexity")
 
-    client = OpenAI(api_key=api_key, base_url=base_url)
+    client = get_client(api_key, base_url)
         
     messages = [
     #It is recommended to use only single-turn conversations and avoid system prompts for the online LLMs (sonar-small-online and sonar-medium-online).
@@ -95,12 +95,14 @@ def remove_chat(ctxid):
 
 
 def _serialize_context(context: AgentContext):
-    # serialize agents
-    agents = []
-    agent = context.agent0
-    while agent:
-        agents.append(_serialize_agent(agent))
-        agent = agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+    # serialize agents, the subordinate chain with fan-out siblings nested in each agent
+    agents = _serialize_agents(context.agent0)
+
+    # a sibling can not be resumed once its call is gone, its superior continues instead
+    chain = _get_chain(context.agent0)
+    streaming_agent = context.streaming_agent
+    while streaming_agent and streaming_agent not in chain:
+        streaming_agent = streaming_agent.data.get(Agent.DATA_NAME_SUPERIOR, None)
 
     return {
         "id": context.id,
@@ -111,22 +113,40 @@ def _serialize_context(context: AgentContext):
         ),
         "agents": agents,
         "streaming_agent": (
-            context.streaming_agent.number if context.streaming_agent else 0
+            streaming_agent.number if streaming_agent else 0
         ),
         "log": _serialize_log(context.log),
     }
 
 
+def _get_chain(agent: Agent | None) -> list[Agent]:
+    chain = []
+    while agent:
+        chain.append(agent)
+        agent = agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+    return chain
+
+
+def _serialize_agents(agent: Agent) -> list[dict[str, Any]]:
+    return [_serialize_agent(a) for a in _get_chain(agent)]
+
+
 def _serialize_agent(agent: Agent):
     data = {k: v for k, v in agent.data.items() if not k.startswith("_")}
 
     history = agent.history.serialize()
 
-    return {
+    result = {
         "number": agent.number,
+        "name": agent.agent_name,
         "data": data,
         "history": history,
     }
+    siblings = agent.data.get(Agent.DATA_NAME_SUBORDINATES, None)
+    if siblings:
+        # each sibling is the head of its own chain
+        result["subordinates"] = [_serialize_agents(sub) for sub in siblings]
+    return result
 
 
 def _serialize_log(log: Log):
@@ -164,7 +184,10 @@ def _deserialize_context(data):
     agent0 = _deserialize_agents(agents, config, context)
     streaming_agent = agent0
     while streaming_agent.number != data.get("streaming_agent", 0):
-        streaming_agent = streaming_agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+        subordinate = streaming_agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+        if not subordinate:
+            break
+        streaming_agent = subordinate
 
     context.agent0 = agent0
     context.streaming_agent = streaming_agent
@@ -173,9 +196,12 @@ def _deserialize_context(data):
 
 
 def _deserialize_agents(
-    agents: list[dict[str, Any]], config: AgentConfig, context: AgentContext
+    agents: list[dict[str, Any]],
+    config: AgentConfig,
+    context: AgentContext,
+    superior: Agent | None = None,
 ) -> Agent:
-    prev: Agent | None = None
+    prev: Agent | None = superior
     zero: Agent | None = None
 
     for ag in agents:
@@ -184,6 +210,7 @@ def _deserialize_agents(
             config=config,
             context=context,
         )
+        current.agent_name = ag.get("name", current.agent_name)
         current.data = ag.get("data", {})
         current.history = history.deserialize_history(
             ag.get("history", ""), agent=current
@@ -192,10 +219,19 @@ def _deserialize_agents(
             zero = current
 
         if prev:
-            prev.set_data(Agent.DATA_NAME_SUBORDINATE, current)
+            if prev is not superior:
+                prev.set_data(Agent.DATA_NAME_SUBORDINATE, current)
             current.set_data(Agent.DATA_NAME_SUPERIOR, prev)
         prev = current
 
+        # fan-out siblings report to this agent
+        siblings = ag.get("subordinates", [])
+        if siblings:
+            current.set_data(
+                Agent.DATA_NAME_SUBORDINATES,
+                [_deserialize_agents(sub, config, context, current) for sub in siblings],
+            )
+
     return zero or Agent(0, config, context)
 
 
@@ -1,11 +1,93 @@
 import os, webcolors, html
 import sys
+import queue
+import threading
 from datetime import datetime
-from . import files
+from . import files, dotenv
+
+KEY_HTML_LOG = "PRINT_HTML_LOG"  # set to false to skip the html mirror of the console
+LOG_MAX_BYTES = 10 * 1024 * 1024  # rotate the html log past this size
+LOG_QUEUE_SIZE = 10000
+LOG_BATCH_SIZE = 500
+
+HTML_HEADER = "<html><body style='background-color:black;font-family: Arial, Helvetica, sans-serif;'><pre>\n"
+HTML_FOOTER = "</pre></body></html>"
+
+
+class LogSink:
+    """HTML log file written by a background thread, one open handle, flushed per batch."""
+
+    def __init__(self, logs_dir: str, max_bytes: int = LOG_MAX_BYTES):
+        self.logs_dir = logs_dir
+        self.max_bytes = max_bytes
+        self.queue: queue.Queue[str | None] = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.file = None
+        self.path = ""
+        self.size = 0
+        self.part = 0
+        self._open()
+        self.thread = threading.Thread(target=self._run, daemon=True, name="PrintStyleLog")
+        self.thread.start()
+
+    def write(self, text: str):
+        # blocks only if the writer falls LOG_QUEUE_SIZE fragments behind
+        self.queue.put(text)
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+
+    def _open(self):
+        os.makedirs(self.logs_dir, exist_ok=True)
+        name = datetime.now().strftime("log_%Y%m%d_%H%M%S")
+        if self.part:
+            name += f"_{self.part}"
+        self.path = os.path.join(self.logs_dir, name + ".html")
+        self.file = open(self.path, "w", encoding="utf-8")
+        self.file.write(HTML_HEADER)
+        self.size = len(HTML_HEADER)
+
+    def _rotate(self):
+        self.file.write(HTML_FOOTER)  # type: ignore
+        self.file.close()  # type: ignore
+        self.part += 1
+        self._open()
+        if PrintStyle._sink is self:
+            PrintStyle.log_file_path = self.path
+
+    def _run(self):
+        closing = False
+        while not closing:
+            batch = [self.queue.get()]
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                closing = True
+                batch = [b for b in batch if b is not None]
+            try:
+                text = "".join(batch)  # type: ignore
+                self.file.write(text)  # type: ignore
+                self.size += len(text)
+                if self.size > self.max_bytes:
+                    self._rotate()
+                self.file.flush()  # type: ignore
+            except Exception:
+                pass  # logging must never break the caller
+        self.file.write(HTML_FOOTER)  # type: ignore
+        self.file.close()  # type: ignore
+
 
 class PrintStyle:
     last_endline = True
     log_file_path = None
+    html_log_enabled: bool | None = None  # None reads PRINT_HTML_LOG from the environment
+    _sink: LogSink | None = None
+    _sink_lock = threading.Lock()
+    _styles: dict[tuple, tuple[str, str]] = {}  # ansi prefix and html style per configuration
 
     def __init__(self, bold=False, italic=False, underline=False, font_color="default", background_color="default", padding=False, log_only=False):
         self.bold = bold
@@ -17,13 +99,24 @@ class PrintStyle:
         self.padding_added = False  # Flag to track if padding was added
         self.log_only = log_only
 
-        if PrintStyle.log_file_path is None:
-            logs_dir = files.get_abs_path("logs")
-            os.makedirs(logs_dir, exist_ok=True)
-            log_filename = datetime.now().strftime("log_%Y%m%d_%H%M%S.html")
-            PrintStyle.log_file_path = os.path.join(logs_dir, log_filename)
-            with open(PrintStyle.log_file_path, "w") as f:
-                f.write("<html><body style='background-color:black;font-family: Arial, Helvetica, sans-serif;'><pre>\n")
+        key = (bold, italic, underline, font_color, background_color)
+        style = PrintStyle._styles.get(key)
+        if style is None:
+            style = PrintStyle._styles[key] = (self._build_ansi_start(), self._build_html_style())
+        self._ansi_start, self._html_style = style
+
+    @staticmethod
+    def _get_sink() -> LogSink | None:
+        if PrintStyle._sink:
+            return PrintStyle._sink
+        with PrintStyle._sink_lock:
+            if PrintStyle.html_log_enabled is None:
+                value = dotenv.get_dotenv_value(KEY_HTML_LOG, "true")
+                PrintStyle.html_log_enabled = str(value).lower().strip() not in ("false", "0", "no")
+            if PrintStyle.html_log_enabled and not PrintStyle._sink:
+                PrintStyle._sink = LogSink(files.get_abs_path("logs"))
+                PrintStyle.log_file_path = PrintStyle._sink.path
+        return PrintStyle._sink
 
     def _get_rgb_color_code(self, color, is_background=False):
         try:
@@ -42,9 +135,8 @@ class PrintStyle:
         except ValueError:
             return "", ""
 
-    def _get_styled_text(self, text):
+    def _build_ansi_start(self):
         start = ""
-        end = "\033[0m"  # Reset ANSI code
         if self.bold:
             start += "\033[1m"
         if self.italic:
@@ -55,9 +147,9 @@ class PrintStyle:
         background_color_code, _ = self._get_rgb_color_code(self.background_color, True)
         start += font_color_code
         start += background_color_code
-        return start + text + end
+        return start
 
-    def _get_html_styled_text(self, text):
+    def _build_html_style(self):
         styles = []
         if self.bold:
             styles.append("font-weight: bold;")
@@ -69,9 +161,14 @@ class PrintStyle:
         _, background_color_code = self._get_rgb_color_code(self.background_color, True)
         styles.append(font_color_code)
         styles.append(background_color_code)
-        style_attr = " ".join(styles)
+        return " ".join(styles)
+
+    def _get_styled_text(self, text):
+        return self._ansi_start + text + "\033[0m"  # Reset ANSI code
+
+    def _get_html_styled_text(self, text):
         escaped_text = html.escape(text).replace("\n", "<br>")  # Escape HTML special characters
-        return f'<span style="{style_attr}">{escaped_text}</span>'
+        return f'<span style="{self._html_style}">{escaped_text}</span>'
 
     def _add_padding_if_needed(self):
         if self.padding and not self.padding_added:
@@ -81,14 +178,14 @@ class PrintStyle:
             self.padding_added = True
 
     def _log_html(self, html):
-        with open(PrintStyle.log_file_path, "a", encoding='utf-8') as f: # type: ignore # add encoding='utf-8'
-            f.write(html)
+        sink = PrintStyle._get_sink()
+        if sink:
+            sink.write(html)
 
     @staticmethod
     def _close_html_log():
-        if PrintStyle.log_file_path:
-            with open(PrintStyle.log_file_path, "a") as f:
-                f.write("</pre></body></html>")
+        if PrintStyle._sink:
+            PrintStyle._sink.close()
 
     def get(self, *args, sep=' ', **kwargs):
         text = sep.join(map(str, args))
@@ -99,18 +196,20 @@ class PrintStyle:
         if not PrintStyle.last_endline:
             print()
             self._log_html("<br>")
-        plain_text, styled_text, html_text = self.get(*args, sep=sep, **kwargs)
+        text = sep.join(map(str, args))
         if not self.log_only:
-            print(styled_text, end='\n', flush=True)
-        self._log_html(html_text+"<br>\n")
+            print(self._get_styled_text(text), end='\n', flush=True)
+        if PrintStyle._get_sink():
+            self._log_html(self._get_html_styled_text(text)+"<br>\n")
         PrintStyle.last_endline = True
 
     def stream(self, *args, sep=' ', **kwargs):
         self._add_padding_if_needed()
-        plain_text, styled_text, html_text = self.get(*args, sep=sep, **kwargs)
+        text = sep.join(map(str, args))
         if not self.log_only:
-            print(styled_text, end='', flush=True)
-        self._log_html(html_text)
+            print(self._get_styled_text(text), end='', flush=True)
+        if PrintStyle._get_sink():
+            self._log_html(self._get_html_styled_text(text))
         PrintStyle.last_endline = False
 
     def is_last_line_empty(self):
@@ -0,0 +1,144 @@
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+import models
+
+# Prefix cache friendly prompt layout, enabled by AgentConfig.prompt_cache_layout.
+# Providers cache the longest identical prefix of a request, so everything that changes
+# every iteration (memories, solutions, instruments, current time) goes into the extras at the very end.
+
+# explicit cache breakpoints, other providers cache prefixes automatically
+BREAKPOINT_PROVIDERS = {models.ModelProvider.ANTHROPIC}
+
+# langchain ChatOpenAI only reports usage of streamed calls with stream_usage=True
+STREAM_USAGE_PROVIDERS = {
+    models.ModelProvider.OPENAI,
+    models.ModelProvider.OPENAI_AZURE,
+    models.ModelProvider.DEEPSEEK,
+    models.ModelProvider.OPENROUTER,
+    models.ModelProvider.SAMBANOVA,
+    models.ModelProvider.CEREBRAS,
+    models.ModelProvider.CHUTES,
+}
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+@dataclass
+class Usage:
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+
+    def add(self, other: "Usage"):
+        self.calls += other.calls
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cache_read_tokens += other.cache_read_tokens
+        self.cache_creation_tokens += other.cache_creation_tokens
+
+    def output(self) -> dict:
+        data = asdict(self)
+        data["cache_hit_ratio"] = (
+            self.cache_read_tokens / self.input_tokens if self.input_tokens else 0.0
+        )
+        return data
+
+
+_usage: dict[str, Usage] = {}
+_usage_lock = threading.Lock()
+
+
+def model_kwargs(provider: models.ModelProvider) -> dict:
+    if provider in STREAM_USAGE_PROVIDERS:
+        return {"stream_usage": True}
+    return {}
+
+
+def supports_breakpoints(provider: models.ModelProvider) -> bool:
+    return provider in BREAKPOINT_PROVIDERS
+
+
+def mark_breakpoints(
+    system_text: str,
+    history: list[BaseMessage],
+    frozen: int,
+    extras: list[BaseMessage],
+) -> list[BaseMessage]:
+    """System, history and extras as content blocks with cache breakpoints after the system prompt,
+    after the frozen history (summarized bulks and closed topics, first frozen messages) and after the last history message.
+    """
+    system = SystemMessage(content=[_block(system_text, cache=True)])
+    history = list(history)
+    # the frozen part survives until the next compression
+    if 0 < frozen < len(history):
+        history[frozen - 1] = _with_breakpoint(history[frozen - 1])
+    # extras stay behind the last breakpoint as separate blocks
+    if history:
+        last = history[-1]
+        if extras and isinstance(last, HumanMessage) and isinstance(extras[0], HumanMessage):
+            history[-1] = HumanMessage(
+                content=_blocks(last.content, cache=True) + _blocks(extras[0].content)  # type: ignore
+            )
+            extras = extras[1:]
+        else:
+            history[-1] = _with_breakpoint(last)
+    # keep user/ai alternation
+    for msg in extras:
+        if history and isinstance(history[-1], type(msg)):
+            history[-1] = type(msg)(content=_blocks(history[-1].content) + _blocks(msg.content))  # type: ignore
+        else:
+            history.append(msg)
+    return [system, *history]
+
+
+def parse_usage(chunk: Any) -> Usage | None:
+    """Usage of a streamed chunk from langchain usage_metadata, None when the chunk carries none."""
+    meta = getattr(chunk, "usage_metadata", None)
+    if not meta:
+        return None
+    details = meta.get("input_token_details") or {}
+    return Usage(
+        calls=0,
+        input_tokens=meta.get("input_tokens", 0) or 0,
+        output_tokens=meta.get("output_tokens", 0) or 0,
+        cache_read_tokens=details.get("cache_read", 0) or 0,
+        cache_creation_tokens=details.get("cache_creation", 0) or 0,
+    )
+
+
+def record_usage(provider: models.ModelProvider, name: str, usage: Usage):
+    usage.calls = 1
+    key = f"{provider.name}\\{name}"
+    with _usage_lock:
+        _usage.setdefault(key, Usage()).add(usage)
+
+
+def get_usage() -> dict[str, dict]:
+    with _usage_lock:
+        return {key: usage.output() for key, usage in _usage.items()}
+
+
+def _with_breakpoint(msg: BaseMessage) -> BaseMessage:
+    return type(msg)(content=_blocks(msg.content, cache=True))  # type: ignore
+
+
+def _block(text: str, cache: bool = False) -> dict:
+    block: dict = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = CACHE_CONTROL
+    return block
+
+
+def _blocks(content: str | list, cache: bool = False) -> list:
+    if isinstance(content, str):
+        return [_block(content, cache)]
+    blocks = [b if isinstance(b, dict) else _block(str(b)) for b in content]
+    if cache and blocks:
+        blocks[-1] = {**blocks[-1], "cache_control": CACHE_CONTROL}
+    return blocks
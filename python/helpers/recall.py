@@ -0,0 +1,79 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from langchain_core.documents import Document
+
+from agent import Agent, LoopData
+from python.helpers import metrics
+from python.helpers.memory import Memory
+
+# Direct recall shared by the memory and solution recall extensions.
+# The latest user message and the recent history are embedded as they are and searched
+# once across all memory areas, the extensions only ask the utility model for a query
+# when the best direct result of their areas scores below GOOD_SCORE.
+
+DATA_NAME_DIRECT = "_recall_direct"
+USER_MESSAGE_CHARS = 2000
+HISTORY_CHARS = 2000
+THRESHOLD = 0.6
+GOOD_SCORE = 0.7
+LIMITS = {
+    Memory.Area.MAIN.value: 3,
+    Memory.Area.FRAGMENTS.value: 3,
+    Memory.Area.SOLUTIONS.value: 2,
+    Memory.Area.INSTRUMENTS.value: 2,
+}
+
+
+@dataclass
+class Recall:
+    query: str
+    found: dict[str, list[tuple[Document, float]]] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def best(self, areas: list[str], limit: int) -> list[tuple[Document, float]]:
+        """Highest scoring documents of the given areas."""
+        docs = [result for area in areas for result in self.found.get(area, [])]
+        docs.sort(key=lambda result: result[1], reverse=True)
+        return docs[:limit]
+
+
+def is_good(results: list[tuple[Document, float]]) -> bool:
+    return bool(results) and results[0][1] >= GOOD_SCORE
+
+
+def get_direct(agent: Agent, loop_data: LoopData) -> asyncio.Task:
+    """Direct recall of this iteration, started by whichever extension asks first."""
+    key = (id(loop_data), loop_data.iteration)
+    cached = agent.get_data(DATA_NAME_DIRECT)
+    if cached and cached[0] == key:
+        return cached[1]
+    task = asyncio.create_task(_search_direct(agent, loop_data))
+    agent.set_data(DATA_NAME_DIRECT, (key, task))
+    return task
+
+
+def get_direct_query(agent: Agent, loop_data: LoopData) -> str:
+    user = loop_data.user_message.output_text() if loop_data.user_message else ""
+    recent = agent.history.current.output_text()[-HISTORY_CHARS:]
+    if user and user in recent:
+        return recent  # the user message is still part of the recent history
+    return f"{user[:USER_MESSAGE_CHARS]}\n\n{recent}".strip()
+
+
+async def search(agent: Agent, query: str, limits: dict[str, int], mode: str, start: float = 0.0) -> Recall:
+    """Search the areas with one lookup, timed from start (query generation included) or from now."""
+    start = start or time.perf_counter()
+    db = await Memory.get(agent)
+    found = await db.search_areas(query, limits, THRESHOLD)
+    seconds = time.perf_counter() - start
+    metrics.RECALL.observe(seconds, mode=mode)
+    return Recall(query=query, found=found, seconds=seconds)
+
+
+async def _search_direct(agent: Agent, loop_data: LoopData) -> Recall:
+    query = get_direct_query(agent, loop_data)
+    if not query:
+        return Recall(query="")
+    return await search(agent, query, LIMITS, "direct")
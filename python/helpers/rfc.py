@@ -1,9 +1,14 @@
+import asyncio
+import hashlib
+import hmac
 import importlib
 import inspect
 import json
-from typing import Any, TypedDict
+import os
+import struct
+from typing import Any, AsyncIterator, BinaryIO, Iterator, TypedDict
 import aiohttp
-from python.helpers import crypto
+from python.helpers import crypto, defer, web_fetch
 
 from python.helpers import dotenv
 
@@ -12,6 +17,27 @@ from python.helpers import dotenv
 # Call function via http request
 # Secured by pre-shared key
 
+# v2 wire format: a random nonce followed by frames of
+# [type:1][length:4][payload][hmac:32]. Every hmac covers the previous one,
+# so frames can not be reordered, dropped or replayed into another call.
+# Bytes in args and results travel as raw DATA frames instead of base64 json.
+
+CONTENT_TYPE = "application/x-a0-rfc"
+NONCE_SIZE = 16
+MAC_SIZE = 32
+CHUNK_SIZE = 1024 * 1024
+FRAME_HEADER = struct.Struct("!BI")
+MAX_FRAME_SIZE = 4 * CHUNK_SIZE  # of DATA frames
+
+FRAME_CALL = 1  # json call, bytes replaced by placeholders
+FRAME_RESULT = 2  # json result, bytes replaced by placeholders
+FRAME_DATA = 3  # chunk of the current bytes value
+FRAME_END = 4  # end of the current bytes value
+FRAME_ERROR = 5  # error text
+FRAME_STREAM = 6  # result is a stream of DATA frames closed by END
+
+BYTES_KEY = "__rfc_bytes__"
+
 
 class RFCInput(TypedDict):
     module: str
@@ -28,17 +54,33 @@ class RFCCall(TypedDict):
 async def call_rfc(
     url: str, password: str, module: str, function_name: str, args: list, kwargs: dict
 ):
-    input = RFCInput(
-        module=module,
-        function_name=function_name,
-        args=args,
-        kwargs=kwargs,
-    )
-    call = RFCCall(
-        rfc_input=json.dumps(input), hash=crypto.hash_data(json.dumps(input), password)
-    )
-    result = await _send_json_data(url, call)
-    return result
+    async with _post_call(url, password, module, function_name, args, kwargs) as reader:
+        frame_type, payload = await reader.read_frame()
+        if frame_type == FRAME_STREAM:
+            # caller did not ask for a stream, collect it
+            return b"".join([chunk async for chunk in reader.read_data()])
+        if frame_type != FRAME_RESULT:
+            raise Exception(f"Unexpected RFC frame {frame_type}")
+        return await _read_result(reader, payload)
+
+
+async def call_rfc_stream(
+    url: str, password: str, module: str, function_name: str, args: list, kwargs: dict
+) -> AsyncIterator[bytes]:
+    """Call a remote function returning an iterator of bytes and yield its chunks as they arrive."""
+    async with _post_call(url, password, module, function_name, args, kwargs) as reader:
+        frame_type, payload = await reader.read_frame()
+        if frame_type == FRAME_STREAM:
+            async for chunk in reader.read_data():
+                yield chunk
+        elif frame_type == FRAME_RESULT:
+            # plain result, bytes are yielded, anything else is an error
+            result = await _read_result(reader, payload)
+            if not isinstance(result, bytes):
+                raise Exception("RFC result is not a stream")
+            yield result
+        else:
+            raise Exception(f"Unexpected RFC frame {frame_type}")
 
 
 async def handle_rfc(rfc_call: RFCCall, password: str):
@@ -51,6 +93,31 @@ async def handle_rfc(rfc_call: RFCCall, password: str):
     )
 
 
+async def handle_rfc_stream(stream: BinaryIO, password: str) -> Iterator[bytes]:
+    """Read a v2 call from a binary request stream, run it and return the response frames."""
+    nonce = _read_exact(stream, NONCE_SIZE)
+    reader = _FrameReader(_SyncSource(stream), password, nonce)
+    writer = _FrameWriter(password, nonce + b"response")
+
+    try:
+        frame_type, payload = reader.read_frame_sync()
+        if frame_type != FRAME_CALL:
+            raise Exception("Invalid RFC call")
+        input: RFCInput = json.loads(payload)
+        blobs = [b"".join(reader.read_data_sync()) for _ in range(input["blobs"])]  # type: ignore
+        args = _restore_bytes(input["args"], blobs)
+        kwargs = _restore_bytes(input["kwargs"], blobs)
+        result = await _call_function(
+            input["module"], input["function_name"], *args, **kwargs
+        )
+    except Exception as e:
+        return iter([writer.frame(FRAME_ERROR, str(e).encode())])
+
+    if inspect.isasyncgen(result) or inspect.isgenerator(result):
+        return _stream_frames(writer, result)
+    return _result_frames(writer, result)
+
+
 async def _call_function(module: str, function_name: str, *args, **kwargs):
     func = _get_function(module, function_name)
     if inspect.iscoroutinefunction(func):
@@ -67,15 +134,234 @@ def _get_function(module: str, function_name: str):
     return func
 
 
-async def _send_json_data(url: str, data):
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            url,
-            json=data,
-        ) as response:
-            if response.status == 200:
-                result = await response.json()
-                return result
-            else:
-                error = await response.text()
-                raise Exception(error)
+async def _read_result(reader: "_FrameReader", payload: bytes):
+    data = json.loads(payload)
+    blobs = [b"".join([c async for c in reader.read_data()]) for _ in range(data["blobs"])]
+    return _restore_bytes(data["result"], blobs)
+
+
+def _result_frames(writer: "_FrameWriter", result) -> Iterator[bytes]:
+    blobs: list = []
+    result = _extract_bytes(result, blobs)
+    data = json.dumps({"result": result, "blobs": len(blobs)}).encode()
+    yield writer.frame(FRAME_RESULT, data)
+    for blob in blobs:
+        yield from writer.data_frames(blob)
+
+
+def _stream_frames(writer: "_FrameWriter", result) -> Iterator[bytes]:
+    yield writer.frame(FRAME_STREAM, b"")
+    try:
+        if inspect.isasyncgen(result):
+            # response generators run outside the request loop
+            result = defer.iterate_sync(result)
+        for chunk in result:
+            yield from writer.chunk_frames(chunk)
+        yield writer.frame(FRAME_END, b"")
+    except Exception as e:
+        yield writer.frame(FRAME_ERROR, str(e).encode())
+
+
+def _extract_bytes(obj, blobs: list):
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        blobs.append(obj)
+        return {BYTES_KEY: len(blobs) - 1}
+    if isinstance(obj, dict):
+        return {k: _extract_bytes(v, blobs) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_extract_bytes(v, blobs) for v in obj]
+    return obj
+
+
+def _restore_bytes(obj, blobs: list[bytes]):
+    if isinstance(obj, dict):
+        if len(obj) == 1 and BYTES_KEY in obj:
+            return blobs[obj[BYTES_KEY]]
+        return {k: _restore_bytes(v, blobs) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_restore_bytes(v, blobs) for v in obj]
+    return obj
+
+
+class _FrameWriter:
+    def __init__(self, password: str, seed: bytes):
+        self.key = password.encode()
+        self.mac = seed
+
+    def frame(self, frame_type: int, payload: bytes | memoryview) -> bytes:
+        header = FRAME_HEADER.pack(frame_type, len(payload))
+        mac = hmac.new(self.key, self.mac, hashlib.sha256)
+        mac.update(header)
+        mac.update(payload)
+        self.mac = mac.digest()
+        return b"".join((header, payload, self.mac))
+
+    def chunk_frames(self, chunk: bytes) -> Iterator[bytes]:
+        view = memoryview(chunk)
+        for i in range(0, len(view), CHUNK_SIZE):
+            yield self.frame(FRAME_DATA, view[i : i + CHUNK_SIZE])
+
+    def data_frames(self, blob: bytes) -> Iterator[bytes]:
+        yield from self.chunk_frames(blob)
+        yield self.frame(FRAME_END, b"")
+
+    @staticmethod
+    def frames_size(payload_sizes: list[int]) -> int:
+        return sum(FRAME_HEADER.size + size + MAC_SIZE for size in payload_sizes)
+
+
+class _SyncSource:
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+
+    def read(self, n: int) -> bytes:
+        return _read_exact(self.stream, n)
+
+
+class _FrameReader:
+    def __init__(self, source, password: str, seed: bytes):
+        self.source = source
+        self.key = password.encode()
+        self.mac = seed
+
+    def _verify(self, header: bytes, payload: bytes, mac: bytes):
+        expected = hmac.new(self.key, self.mac, hashlib.sha256)
+        expected.update(header)
+        expected.update(payload)
+        digest = expected.digest()
+        if not hmac.compare_digest(digest, mac):
+            raise Exception("Invalid RFC hash")
+        self.mac = digest
+
+    def _check(self, frame_type: int, payload: bytes) -> tuple[int, bytes]:
+        if frame_type == FRAME_ERROR:
+            raise Exception(payload.decode(errors="replace"))
+        return frame_type, payload
+
+    # blocking variant used by the flask handler
+    def read_frame_sync(self) -> tuple[int, bytes]:
+        header = self.source.read(FRAME_HEADER.size)
+        frame_type, length = FRAME_HEADER.unpack(header)
+        _check_size(frame_type, length)
+        payload = self.source.read(length)
+        self._verify(header, payload, self.source.read(MAC_SIZE))
+        return self._check(frame_type, payload)
+
+    def read_data_sync(self) -> Iterator[bytes]:
+        while True:
+            frame_type, payload = self.read_frame_sync()
+            if frame_type == FRAME_END:
+                return
+            if frame_type != FRAME_DATA:
+                raise Exception(f"Unexpected RFC frame {frame_type}")
+            yield payload
+
+    # async variant used by the client on the aiohttp response
+    async def read_frame(self) -> tuple[int, bytes]:
+        header = await self.source.readexactly(FRAME_HEADER.size)
+        frame_type, length = FRAME_HEADER.unpack(header)
+        _check_size(frame_type, length)
+        payload = await self.source.readexactly(length)
+        self._verify(header, payload, await self.source.readexactly(MAC_SIZE))
+        return self._check(frame_type, payload)
+
+    async def read_data(self) -> AsyncIterator[bytes]:
+        while True:
+            frame_type, payload = await self.read_frame()
+            if frame_type == FRAME_END:
+                return
+            if frame_type != FRAME_DATA:
+                raise Exception(f"Unexpected RFC frame {frame_type}")
+            yield payload
+
+
+def _check_size(frame_type: int, length: int):
+    # bytes travel in chunks, json frames are as large as the values they carry
+    if frame_type == FRAME_DATA and length > MAX_FRAME_SIZE:
+        raise Exception("RFC frame too large")
+
+
+def _read_exact(stream: BinaryIO, n: int) -> bytes:
+    if not n:
+        return b""  # werkzeug treats an empty read at the end of the body as a disconnect
+    data = stream.read(n)
+    while len(data) < n:
+        more = stream.read(n - len(data))
+        if not more:
+            raise Exception("RFC stream ended unexpectedly")
+        data += more
+    return data
+
+
+class _post_call:
+    """Send a v2 call over the pooled session, yields a frame reader for the response."""
+
+    def __init__(self, url: str, password: str, module: str, function_name: str, args: list, kwargs: dict):
+        self.url = url
+        self.password = password
+        blobs: list = []
+        input = RFCInput(
+            module=module,
+            function_name=function_name,
+            args=_extract_bytes(list(args), blobs),
+            kwargs=_extract_bytes(kwargs, blobs),
+        )
+        self.call = json.dumps({**input, "blobs": len(blobs)}).encode()
+        self.blobs = blobs
+        self.nonce = os.urandom(NONCE_SIZE)
+        self.response: aiohttp.ClientResponse | None = None
+
+    def _body(self) -> Iterator[bytes]:
+        writer = _FrameWriter(self.password, self.nonce)
+        yield self.nonce
+        yield writer.frame(FRAME_CALL, self.call)
+        for blob in self.blobs:
+            yield from writer.data_frames(blob)
+
+    def _body_size(self) -> int:
+        sizes = [len(self.call)]
+        for blob in self.blobs:
+            sizes += [min(CHUNK_SIZE, len(blob) - i) for i in range(0, len(blob), CHUNK_SIZE)]
+            sizes.append(0)
+        return NONCE_SIZE + _FrameWriter.frames_size(sizes)
+
+    async def __aenter__(self) -> _FrameReader:
+        async def body():
+            for part in self._body():
+                yield part
+
+        self.response = await get_session().post(
+            self.url,
+            data=body(),
+            headers={
+                "Content-Type": CONTENT_TYPE,
+                "Content-Length": str(self._body_size()),
+            },
+        )
+        if self.response.status != 200:
+            error = await self.response.text()
+            self.response.release()
+            raise Exception(error)
+        return _FrameReader(self.response.content, self.password, self.nonce + b"response")
+
+    async def __aexit__(self, *exc):
+        if self.response:
+            self.response.release()
+
+
+# one keep-alive session per event loop, concurrent calls share its connection pool
+_sessions: dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+
+def get_session() -> aiohttp.ClientSession:
+    return web_fetch.loop_session(
+        _sessions,
+        lambda: aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=16, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=10),
+        ),
+    )
+
+
+async def close_session():
+    await web_fetch.close_loop_session(_sessions)
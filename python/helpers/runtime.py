@@ -1,6 +1,6 @@
 import argparse
 import inspect
-from typing import TypeVar, Callable, Awaitable, Union, overload, cast
+from typing import AsyncIterator, Iterator, TypeVar, Callable, Awaitable, Union, overload, cast
 from python.helpers import dotenv, rfc, settings
 import asyncio
 import threading
@@ -84,10 +84,36 @@ async def call_development_function(func: Union[Callable[..., T], Callable[...,
             return func(*args, **kwargs) # type: ignore
 
 
+async def call_development_stream(func: Callable[..., Union[Iterator[bytes], AsyncIterator[bytes]]], *args, **kwargs) -> AsyncIterator[bytes]:
+    # like call_development_function for generators of bytes, chunks are forwarded as they come
+    if is_development():
+        async for chunk in rfc.call_rfc_stream(
+            url=_get_rfc_url(),
+            password=_get_rfc_password(),
+            module=func.__module__,
+            function_name=func.__name__,
+            args=list(args),
+            kwargs=kwargs,
+        ):
+            yield chunk
+    else:
+        result = func(*args, **kwargs)
+        if inspect.isasyncgen(result):
+            async for chunk in result:
+                yield chunk
+        else:
+            for chunk in result: # type: ignore
+                yield chunk
+
+
 async def handle_rfc(rfc_call: rfc.RFCCall):
     return await rfc.handle_rfc(rfc_call=rfc_call, password=_get_rfc_password())
 
 
+async def handle_rfc_stream(stream):
+    return await rfc.handle_rfc_stream(stream=stream, password=_get_rfc_password())
+
+
 def _get_rfc_password() -> str:
     password = dotenv.get_dotenv_value(dotenv.KEY_RFC_PASSWORD)
     if not password:
@@ -111,8 +137,14 @@ def call_development_function_sync(func: Union[Callable[..., T], Callable[..., A
     # run async function in sync manner
     result_queue = queue.Queue()
     
+    async def call():
+        try:
+            return await call_development_function(func, *args, **kwargs)
+        finally:
+            await rfc.close_session()  # the session belongs to this short-lived loop
+
     def run_in_thread():
-        result = asyncio.run(call_development_function(func, *args, **kwargs))
+        result = asyncio.run(call())
         result_queue.put(result)
     
     thread = threading.Thread(target=run_in_thread)
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from python.helpers import dotenv, searxng, duckduckgo_search, perplexity_search, metrics
+
+# Search service: fans a query out to all engines concurrently,
+# merges and de-duplicates their results and caches them for a while
+
+ENGINE_TIMEOUT = 10  # seconds per engine
+CACHE_TTL = 300
+CACHE_SIZE = 256
+RESULTS_PER_ENGINE = 10
+
+
+@dataclass
+class SearchResult:
+    title: str
+    url: str
+    content: str
+    engines: list[str] = field(default_factory=list)
+    score: float = 0.0
+
+
+@dataclass
+class SearchResponse:
+    query: str
+    results: list[SearchResult] = field(default_factory=list)
+    answers: list[str] = field(default_factory=list)  # free text answers (perplexity)
+    errors: dict[str, str] = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)
+
+    def format(self, limit: int = RESULTS_PER_ENGINE) -> str:
+        outputs = [f"{r.title}\n{r.url}\n{r.content}" for r in self.results[:limit]]
+        outputs += self.answers
+        return "\n\n".join(outputs).strip()
+
+
+_cache: dict[tuple[str, tuple[str, ...]], tuple[float, SearchResponse]] = {}
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    path = parts.path.rstrip("/")
+    return f"{host}{path}" + (f"?{parts.query}" if parts.query else "")
+
+
+async def search(
+    query: str,
+    engines: list[str] | tuple[str, ...] = ("searxng",),
+    timeout: float = ENGINE_TIMEOUT,
+) -> SearchResponse:
+    engines = tuple(e for e in engines if e in ENGINES)
+    key = (normalize_query(query), engines)
+    cached = _cache.get(key)
+    if cached and time.time() - cached[0] < CACHE_TTL:
+        return cached[1]
+
+    response = SearchResponse(query=query)
+    outcomes = await asyncio.gather(
+        *[_run_engine(name, query, timeout) for name in engines]
+    )
+
+    ranked: list[list[SearchResult]] = []
+    for name, (outcome, duration) in zip(engines, outcomes):
+        response.timings[name] = duration
+        if isinstance(outcome, BaseException):
+            response.errors[name] = str(outcome) or type(outcome).__name__
+        elif isinstance(outcome, str):
+            if outcome:
+                response.answers.append(outcome)
+        else:
+            ranked.append(outcome)
+    response.results = merge_results(ranked)
+
+    # failed lookups are not cached so the next call can retry them
+    if not response.errors:
+        _store(key, response)
+    return response
+
+
+def merge_results(ranked: list[list[SearchResult]]) -> list[SearchResult]:
+    # reciprocal rank fusion over engines, duplicates merged by normalized url
+    merged: dict[str, SearchResult] = {}
+    for results in ranked:
+        for rank, result in enumerate(results):
+            key = normalize_url(result.url) or result.title
+            existing = merged.get(key)
+            if not existing:
+                existing = merged[key] = SearchResult(
+                    title=result.title, url=result.url, content=result.content
+                )
+            elif len(result.content) > len(existing.content):
+                existing.content = result.content
+            existing.engines += [e for e in result.engines if e not in existing.engines]
+            existing.score += 1 / (60 + rank)
+    return sorted(merged.values(), key=lambda r: r.score, reverse=True)
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def _store(key, response: SearchResponse):
+    now = time.time()
+    if len(_cache) >= CACHE_SIZE:
+        for k in [k for k, (t, _) in _cache.items() if now - t >= CACHE_TTL]:
+            del _cache[k]
+        while len(_cache) >= CACHE_SIZE:
+            del _cache[next(iter(_cache))]  # oldest insert first
+    _cache[key] = (now, response)
+
+
+async def _run_engine(name: str, query: str, timeout: float):
+    start = time.perf_counter()
+    try:
+        outcome = await asyncio.wait_for(ENGINES[name](query), timeout)
+    except Exception as e:
+        outcome = e
+        if isinstance(e, asyncio.TimeoutError):
+            outcome = TimeoutError(f"{name} timed out after {timeout}s")
+    duration = time.perf_counter() - start
+    metrics.SEARCH_ENGINE.observe(
+        duration, engine=name, outcome="error" if isinstance(outcome, BaseException) else "ok"
+    )
+    return outcome, duration
+
+
+async def _searxng(query: str) -> list[SearchResult]:
+    data = await searxng.search(query)
+    return [
+        SearchResult(
+            title=item.get("title", ""),
+            url=item.get("url", ""),
+            content=item.get("content", ""),
+            engines=["searxng"],
+        )
+        for item in data.get("results", [])[:RESULTS_PER_ENGINE]
+    ]
+
+
+async def _duckduckgo(query: str) -> list[SearchResult]:
+    data = await asyncio.to_thread(
+        duckduckgo_search.search_raw, query, RESULTS_PER_ENGINE
+    )
+    return [
+        SearchResult(
+            title=item.get("title", ""),
+            url=item.get("href", ""),
+            content=item.get("body", ""),
+            engines=["duckduckgo"],
+        )
+        for item in data
+    ]
+
+
+async def _perplexity(query: str) -> str:
+    if not dotenv.get_dotenv_value("API_KEY_PERPLEXITY"):
+        raise Exception("No API key provided for Perplexity")
+    return await asyncio.to_thread(perplexity_search.perplexity_search, query) or ""
+
+
+ENGINES = {
+    "searxng": _searxng,
+    "duckduckgo": _duckduckgo,
+    "perplexity": _perplexity,
+}
@@ -1,12 +1,18 @@
 import aiohttp
-from python.helpers import runtime
+from python.helpers import runtime, web_fetch
 
 URL = "http://localhost:8888/search"
+TIMEOUT = 10
 
 async def search(query:str):
     return await runtime.call_development_function(_search, query=query)
 
 async def _search(query:str):
-    async with aiohttp.ClientSession() as session:
-        async with session.post(URL, data={"q": query, "format": "json"}) as response:
-            return await response.json()
+    # pooled session, keeps the connection to searxng alive between queries
+    session = web_fetch.get_session()
+    async with session.post(
+        URL,
+        data={"q": query, "format": "json"},
+        timeout=aiohttp.ClientTimeout(total=TIMEOUT),
+    ) as response:
+        return await response.json()
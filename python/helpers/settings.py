@@ -2,6 +2,7 @@ import json
 import os
 import re
 import subprocess
+from contextlib import contextmanager
 from typing import Any, Literal, TypedDict
 
 import models
@@ -100,11 +101,17 @@ PASSWORD_PLACEHOLDER = "****PSWD****"
 
 SETTINGS_FILE = files.get_abs_path("tmp/settings.json")
 _settings: Settings | None = None
+_overrides: dict = {}  # in memory only, see override()
 
 
 def convert_out(settings: Settings) -> SettingsOutput:
     from models import ModelProvider
 
+    # the fake provider is only for tests and benchmarks
+    provider_options = [
+        {"value": p.name, "label": p.value} for p in ModelProvider if p != ModelProvider.FAKE
+    ]
+
     # main model section
     chat_model_fields: list[SettingsField] = []
     chat_model_fields.append(
@@ -114,7 +121,7 @@ def convert_out(settings: Settings) -> SettingsOutput:
             "description": "Select provider for main chat model used by Agent Zero",
             "type": "select",
             "value": settings["chat_model_provider"],
-            "options": [{"value": p.name, "label": p.value} for p in ModelProvider],
+            "options": provider_options,
         }
     )
     chat_model_fields.append(
@@ -217,7 +224,7 @@ def convert_out(settings: Settings) -> SettingsOutput:
             "description": "Select provider for utility model used by the framework",
             "type": "select",
             "value": settings["util_model_provider"],
-            "options": [{"value": p.name, "label": p.value} for p in ModelProvider],
+            "options": provider_options,
         }
     )
     util_model_fields.append(
@@ -287,7 +294,7 @@ def convert_out(settings: Settings) -> SettingsOutput:
             "description": "Select provider for embedding model used by the framework",
             "type": "select",
             "value": settings["embed_model_provider"],
-            "options": [{"value": p.name, "label": p.value} for p in ModelProvider],
+            "options": provider_options,
         }
     )
     embed_model_fields.append(
@@ -347,7 +354,7 @@ def convert_out(settings: Settings) -> SettingsOutput:
             "description": "Select provider for web browser model used by <a href='https://github.com/browser-use/browser-use' target='_blank'>browser-use</a> framework",
             "type": "select",
             "value": settings["browser_model_provider"],
-            "options": [{"value": p.name, "label": p.value} for p in ModelProvider],
+            "options": provider_options,
         }
     )
     browser_model_fields.append(
@@ -726,10 +733,22 @@ def get_settings() -> Settings:
         _settings = _read_settings_file()
     if not _settings:
         _settings = get_default_settings()
-    norm = normalize_settings(_settings)
+    norm = normalize_settings({**_settings, **_overrides})  # type: ignore
     return norm
 
 
+@contextmanager
+def override(**values):
+    """Temporarily replace settings for this process, nothing is written to the settings file."""
+    global _overrides
+    previous = _overrides
+    _overrides = {**previous, **values}
+    try:
+        yield
+    finally:
+        _overrides = previous
+
+
 def set_settings(settings: Settings):
     global _settings
     previous = _settings
@@ -851,10 +870,8 @@ def _apply_settings(previous: Settings | None):
         for ctx in AgentContext._contexts.values():
             ctx.config = initialize()  # reinitialize context config with new settings
             # apply config to agents
-            agent = ctx.agent0
-            while agent:
+            for agent in ctx.agent0.get_agent_tree():
                 agent.config = ctx.config
-                agent = agent.get_data(agent.DATA_NAME_SUBORDINATE)
 
         # reload whisper model if necessary
         task = defer.DeferredTask().start_task(
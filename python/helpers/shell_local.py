@@ -1,16 +1,33 @@
-import select
+import asyncio
+import codecs
+import os
+import signal
 import subprocess
-import time
+import threading
 import sys
 from typing import Optional, Tuple
+from python.helpers.messages import OutputBuffer
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
 
 class LocalInteractiveSession:
     def __init__(self):
         self.process = None
-        self.full_output = ''
+        self.full_output = OutputBuffer()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        # output pushed by the reader thread, consumed by read_output
+        self._pending: list[bytes] = []
+        self._pending_lock = threading.Lock()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._reader: threading.Thread | None = None
 
     async def connect(self):
         # Start a new subprocess with the appropriate shell for the OS
+        # binary unbuffered pipes, the reader thread sees every byte as soon as it is written
         if sys.platform.startswith('win'):
             # Windows
             self.process = subprocess.Popen(
@@ -18,8 +35,7 @@ class LocalInteractiveSession:
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1
+                bufsize=0
             )
         else:
             # macOS and Linux
@@ -28,45 +44,95 @@ class LocalInteractiveSession:
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1
+                bufsize=0
             )
+        self._reader = threading.Thread(
+            target=self._read_loop,
+            args=(self.process.stdout.fileno(),),  # type: ignore
+            daemon=True,
+            name="local-shell-reader",
+        )
+        self._reader.start()
 
     def close(self):
         if self.process:
             self.process.terminate()
             self.process.wait()
+        self._notify()
+
+    def _read_loop(self, fd: int):
+        # blocking reads live here, select() can not see data already buffered by python
+        try:
+            while True:
+                data = os.read(fd, 4096)
+                if not data:
+                    break  # process exited
+                with self._pending_lock:
+                    self._pending.append(data)
+                self._notify()
+        except OSError:
+            pass  # pipe closed
+        finally:
+            self._notify()
+
+    def _notify(self):
+        with self._pending_lock:
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    async def wait_output(self, timeout: float) -> bool:
+        """Wait until the reader thread pushes new output or the timeout expires."""
+        if not self.process:
+            return False
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._pending_lock:
+            if self._pending or not (self._reader and self._reader.is_alive()):
+                return bool(self._pending)
+            self._waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return False
+        with self._pending_lock:
+            return bool(self._pending)
 
-    def send_command(self, command: str):
+    def send_command(self, command: str, trim_echo: bool = True):
         if not self.process:
             raise Exception("Shell not connected")
-        self.full_output = ""
-        self.process.stdin.write(command + '\n') # type: ignore
+        self.full_output = OutputBuffer()
+        self.process.stdin.write((command + '\n').encode()) # type: ignore
         self.process.stdin.flush() # type: ignore
- 
-    async def read_output(self, timeout: float = 0, reset_full_output: bool = False) -> Tuple[str, Optional[str]]:
+
+    def interrupt(self):
+        """Ctrl-C for the commands started by the shell, pipes have no terminal to send it."""
+        if not self.process:
+            raise Exception("Shell not connected")
+        try:
+            with open(f"/proc/{self.process.pid}/task/{self.process.pid}/children") as f:
+                children = [int(pid) for pid in f.read().split()]
+        except OSError:
+            return  # no procfs, nothing to interrupt
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGINT)
+            except OSError:
+                pass  # already exited
+
+    async def read_output(self, timeout: float = 0, reset_full_output: bool = False) -> Tuple[OutputBuffer, Optional[str]]:
         if not self.process:
             raise Exception("Shell not connected")
 
         if reset_full_output:
-            self.full_output = ""
-        partial_output = ''
-        start_time = time.time()
-        
-        while (timeout <= 0 or time.time() - start_time < timeout):
-            rlist, _, _ = select.select([self.process.stdout], [], [], 0.1)
-            if rlist:
-                line = self.process.stdout.readline()  # type: ignore
-                if line:
-                    partial_output += line
-                    self.full_output += line
-                    time.sleep(0.1)
-                else:
-                    break  # No more output
-            else:
-                break  # No data available
+            self.full_output = OutputBuffer()
+
+        with self._pending_lock:
+            chunks, self._pending = self._pending, []
+        partial_output = self._decoder.decode(b"".join(chunks))
+        self.full_output.append(partial_output)
 
         if not partial_output:
             return self.full_output, None
-        
-        return self.full_output, partial_output
\ No newline at end of file
+
+        return self.full_output, partial_output
@@ -1,11 +1,94 @@
 import asyncio
+import codecs
+import threading
 import paramiko
-import time
 import re
 from typing import Tuple
 from python.helpers.log import Log
+from python.helpers.messages import OutputBuffer
 from python.helpers.print_style import PrintStyle
-from python.helpers.strings import calculate_valid_match_lengths
+from python.helpers.strings import IncrementalMatcher
+
+
+KEEPALIVE_INTERVAL = 30  # seconds between SSH keepalive packets
+
+ANSI_ESCAPE = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
+
+# parts of the command echo that the terminal adds or rewrites
+ECHO_IGNORE_PATTERNS = [
+    re.compile(rb"\x1b\[\?\d{4}[a-zA-Z](?:> )?"),  # ANSI escape sequences
+    re.compile(rb"\r"),  # Carriage return
+    re.compile(rb">\s"),  # Greater-than symbol
+]
+
+
+class _PooledConnection:
+    def __init__(self, client: paramiko.SSHClient):
+        self.client = client
+        self.refs = 0
+
+
+class SSHConnectionPool:
+    """One SSH connection per (host, port, user), shared by all shell channels."""
+
+    _connections: dict[tuple[str, int, str], _PooledConnection] = {}
+    _key_locks: dict[tuple[str, int, str], threading.Lock] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def acquire(
+        cls, hostname: str, port: int, username: str, password: str
+    ) -> paramiko.SSHClient:
+        # blocking, call from a worker thread
+        key = (hostname, port, username)
+        with cls._lock:
+            key_lock = cls._key_locks.setdefault(key, threading.Lock())
+        # connecting holds only the lock of this host, a slow host does not block the others
+        with key_lock:
+            with cls._lock:
+                conn = cls._connections.get(key)
+                transport = conn.client.get_transport() if conn else None
+                if conn and transport and transport.is_active():
+                    conn.refs += 1
+                    return conn.client
+                if conn:
+                    del cls._connections[key]
+            if conn:
+                conn.client.close()
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(
+                hostname,
+                port,
+                username,
+                password,
+                allow_agent=False,
+                look_for_keys=False,
+            )
+            client.get_transport().set_keepalive(KEEPALIVE_INTERVAL)  # type: ignore
+            conn = _PooledConnection(client)
+            conn.refs = 1
+            with cls._lock:
+                cls._connections[key] = conn
+            return client
+
+    @classmethod
+    def release(cls, client: paramiko.SSHClient):
+        with cls._lock:
+            for key, conn in list(cls._connections.items()):
+                if conn.client is client:
+                    conn.refs -= 1
+                    if conn.refs <= 0:
+                        del cls._connections[key]
+                        client.close()
+                    return
+        # connection was replaced after it died, close the stale one
+        client.close()
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
 
 
 class SSHInteractiveSession:
@@ -21,35 +104,51 @@ class SSHInteractiveSession:
         self.port = port
         self.username = username
         self.password = password
-        self.client = paramiko.SSHClient()
-        self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        self.client: paramiko.SSHClient | None = None
         self.shell = None
-        self.full_output = b""
+        self.full_output = OutputBuffer()
+        self._line = ""  # raw open line of full_output
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
         self.last_command = b""
-        self.trimmed_command_length = 0  # Initialize trimmed_command_length
+        self.echo_matcher: IncrementalMatcher | None = None
+        # output pushed by the reader thread, consumed by read_output
+        self._pending: list[bytes] = []
+        self._pending_lock = threading.Lock()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._reader: threading.Thread | None = None
 
     async def connect(self):
         # try 3 times with wait and then except
         errors = 0
         while True:
             try:
-                self.client.connect(
+                self.client = await asyncio.to_thread(
+                    SSHConnectionPool.acquire,
                     self.hostname,
                     self.port,
                     self.username,
                     self.password,
-                    allow_agent=False,
-                    look_for_keys=False,
                 )
-                self.shell = self.client.invoke_shell(width=160, height=48)
+                # new channel multiplexed over the pooled connection
+                self.shell = await asyncio.to_thread(
+                    self.client.invoke_shell, width=160, height=48
+                )
+                self._reader = threading.Thread(
+                    target=self._read_loop,
+                    args=(self.shell,),
+                    daemon=True,
+                    name=f"ssh-reader-{self.hostname}:{self.port}",
+                )
+                self._reader.start()
                 # self.shell.send(f'PS1="{SSHInteractiveSession.ps1_label}"'.encode())
                 # return
                 while True:  # wait for end of initial output
                     full, part = await self.read_output()
                     if full and not part:
                         return
-                    time.sleep(0.1)
+                    await self.wait_output(timeout=0.1)
             except Exception as e:
+                self._release()
                 errors += 1
                 if errors < 3:
                     PrintStyle.standard(f"SSH Connection attempt {errors}...")
@@ -59,93 +158,146 @@ class SSHInteractiveSession:
                         temp=True,
                     )
 
-                    time.sleep(5)
+                    await asyncio.sleep(5)
                 else:
                     raise e
 
     def close(self):
+        self._release()
+
+    def _release(self):
         if self.shell:
             self.shell.close()
+            self.shell = None
         if self.client:
-            self.client.close()
+            SSHConnectionPool.release(self.client)
+            self.client = None
+        self._notify()
+
+    def _read_loop(self, shell: paramiko.Channel):
+        # blocking reads live here so the event loop never waits on the socket
+        try:
+            while True:
+                data = self.receive_bytes(shell=shell)
+                if not data:
+                    break  # channel closed
+                with self._pending_lock:
+                    self._pending.append(data)
+                self._notify()
+        except Exception:
+            pass  # channel torn down, read_output reports it on next use
+        finally:
+            self._notify()
+
+    def _notify(self):
+        with self._pending_lock:
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
 
-    def send_command(self, command: str):
+    def has_output(self) -> bool:
+        with self._pending_lock:
+            return bool(self._pending)
+
+    async def wait_output(self, timeout: float) -> bool:
+        """Wait until the reader thread pushes new output or the timeout expires."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._pending_lock:
+            if self._pending or not self.shell:
+                return bool(self._pending)
+            self._waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+            return self.has_output()
+        except asyncio.TimeoutError:
+            return False
+
+    def send_command(self, command: str, trim_echo: bool = True):
         if not self.shell:
             raise Exception("Shell not connected")
-        self.full_output = b""
+        self.reset_full_output()
         # if len(command) > 10: # if command is long, add end_comment to split output
         #     command = (command + " \\\n" +SSHInteractiveSession.end_comment + "\n")
         # else:
         command = command + "\n"
         self.last_command = command.encode()
-        self.trimmed_command_length = 0
+        # the shell echoes the command back, trim it from the output as it arrives
+        self.echo_matcher = IncrementalMatcher(
+            self.last_command if trim_echo else b"",
+            deviation_threshold=8,
+            deviation_reset=2,
+            ignore_patterns=ECHO_IGNORE_PATTERNS,
+        )
         self.shell.send(self.last_command)
 
+    def interrupt(self):
+        """Send Ctrl-C, the terminal interrupts the foreground process."""
+        if not self.shell:
+            raise Exception("Shell not connected")
+        self.shell.send(b"\x03")
+
     async def read_output(
         self, timeout: float = 0, reset_full_output: bool = False
-    ) -> Tuple[str, str]:
+    ) -> Tuple[OutputBuffer, str]:
         if not self.shell:
             raise Exception("Shell not connected")
 
         if reset_full_output:
-            self.full_output = b""
-        partial_output = b""
-        leftover = b""
-        start_time = time.time()
-
-        while self.shell.recv_ready() and (
-            timeout <= 0 or time.time() - start_time < timeout
-        ):
+            self.reset_full_output()
+        partial_output = ""
 
-            # data = self.shell.recv(1024)
-            data = self.receive_bytes()
+        with self._pending_lock:
+            chunks, self._pending = self._pending, []
 
+        for data in chunks:
             # Trim own command from output
-            if (
-                self.last_command
-                and len(self.last_command) > self.trimmed_command_length
-            ):
-                command_to_trim = self.last_command[self.trimmed_command_length :]
-                data_to_trim = leftover + data
-
-                trim_com, trim_out = calculate_valid_match_lengths(
-                    command_to_trim,
-                    data_to_trim,
-                    deviation_threshold=8,
-                    deviation_reset=2,
-                    ignore_patterns=[
-                        rb"\x1b\[\?\d{4}[a-zA-Z](?:> )?",  # ANSI escape sequences
-                        rb"\r",  # Carriage return
-                        rb">\s",  # Greater-than symbol
-                    ],
-                    debug=False,
-                )
+            if self.echo_matcher and not self.echo_matcher.done:
+                data = data[self.echo_matcher.feed(data) :]
 
-                leftover = b""
-                if trim_com > 0 and trim_out > 0:
-                    data = data_to_trim[trim_out:]
-                    leftover = data
-                    self.trimmed_command_length += trim_com
+            text = self._decoder.decode(data)
+            partial_output += text
+            self._append_output(text)
 
-            partial_output += data
-            self.full_output += data
-            await asyncio.sleep(0.1)  # Prevent busy waiting
+        return self.full_output, self.clean_string(partial_output)
 
-        # Decode once at the end
-        decoded_partial_output = partial_output.decode("utf-8", errors="replace")
-        decoded_full_output = self.full_output.decode("utf-8", errors="replace")
+    def reset_full_output(self):
+        self.full_output = OutputBuffer()
+        self._line = ""
 
-        decoded_partial_output = self.clean_string(decoded_partial_output)
-        decoded_full_output = self.clean_string(decoded_full_output)
+    def _append_output(self, text: str):
+        # clean only the new text, the open last line is kept raw until it ends
+        lines = (self._line + text).split("\n")
+        self._line = self._compact_line(lines.pop())
+        if lines:
+            self.full_output.append(
+                "".join(self.clean_line(line) + "\n" for line in lines)
+            )
+        keep = self.full_output.keep
+        if len(self._line) > 2 * keep:
+            # a long line without newline, commit all but its end so it stays bounded
+            head, self._line = self._line[:-keep], self._line[-keep:]
+            self.full_output.append(ANSI_ESCAPE.sub("", head.split("\r")[-1]))
+        self.full_output.line = self.clean_line(self._line)
 
-        return decoded_full_output, decoded_partial_output
+    def _compact_line(self, line: str) -> str:
+        # progress bars keep rewriting one line with \r, only the last
+        # non-empty part and the one still being written can be shown
+        parts = line.split("\r")
+        if len(parts) <= 2:
+            return line
+        current = parts[-1]
+        for part in reversed(parts[:-1]):
+            if part.strip():
+                return part + "\r" + current
+        return current
 
-    def receive_bytes(self, num_bytes=1024):
-        if not self.shell:
+    def receive_bytes(self, num_bytes=1024, shell: paramiko.Channel | None = None):
+        shell = shell or self.shell
+        if not shell:
             raise Exception("Shell not connected")
         # Receive initial chunk of data
-        shell = self.shell
-        data = self.shell.recv(num_bytes)
+        data = shell.recv(num_bytes)
 
         # Helper function to ensure that we receive exactly `num_bytes`
         def recv_all(num_bytes):
@@ -188,10 +340,15 @@ class SSHInteractiveSession:
 
         return data
 
+    def clean_line(self, line: str) -> str:
+        line = ANSI_ESCAPE.sub("", line)
+        # Handle carriage returns '\r' by taking the last non-empty part
+        parts = [part for part in line.split("\r") if part.strip()]
+        return parts[-1].rstrip() if parts else ""
+
     def clean_string(self, input_string):
         # Remove ANSI escape codes
-        ansi_escape = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
-        cleaned = ansi_escape.sub("", input_string)
+        cleaned = ANSI_ESCAPE.sub("", input_string)
 
         # Replace '\r\n' with '\n'
         cleaned = cleaned.replace("\r\n", "\n")
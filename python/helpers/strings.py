@@ -18,17 +18,10 @@ def calculate_valid_match_lengths(first: bytes | str, second: bytes | str,
     matched_since_deviation = 0
     last_matched_i, last_matched_j = 0, 0  # Track the last matched index
 
+    compiled = _compile_patterns(ignore_patterns)
+
     def skip_ignored_patterns(s, index):
-        """Skip characters in `s` that match any pattern in `ignore_patterns` starting from `index`."""
-        while index < len(s):
-            for pattern in ignore_patterns:
-                match = re.match(pattern, s[index:])
-                if match:
-                    index += len(match.group(0))
-                    break
-            else:
-                break
-        return index
+        return _skip_patterns(compiled, s, index)
 
     while i < first_length and j < second_length:
         # Skip ignored patterns
@@ -91,6 +84,173 @@ def calculate_valid_match_lengths(first: bytes | str, second: bytes | str,
     # Return the last matched positions instead of the current indices
     return last_matched_i, last_matched_j
 
+def _compile_patterns(patterns: list) -> list[re.Pattern]:
+    return [re.compile(p) for p in patterns]
+
+
+def _skip_patterns(patterns: list[re.Pattern], s: bytes | str, index: int) -> int:
+    """Skip characters in `s` that match any of `patterns` starting from `index`."""
+    while index < len(s):
+        for pattern in patterns:
+            # match at offset instead of slicing, no copy of the remainder
+            match = pattern.match(s, index)
+            if match and match.end() > index:
+                index = match.end()
+                break
+        else:
+            break
+    return index
+
+
+def _next_pattern(patterns: list[re.Pattern], s: bytes | str, index: int, cache: dict | None = None) -> int:
+    """Start of the first pattern match in `s` at or after `index`, or len(s).
+
+    `cache` keeps the last match start per pattern, valid while `index` has not passed it.
+    """
+    result = len(s)
+    for pattern in patterns:
+        start = cache.get(pattern, -1) if cache is not None else -1
+        if start < index:
+            match = pattern.search(s, index)
+            start = match.start() if match else len(s)
+            if cache is not None:
+                cache[pattern] = start
+        result = min(result, start)
+    return result
+
+
+def _common_run(
+    patterns: list[re.Pattern],
+    first: bytes | str,
+    i: int,
+    second: bytes | str,
+    j: int,
+    first_cache: dict | None = None,
+    second_cache: dict | None = None,
+) -> int:
+    """Length of the equal run of first[i:] and second[j:] that contains no ignored pattern."""
+    if first[i] != second[j]:
+        return 0
+    limit = min(
+        _next_pattern(patterns, first, i, first_cache) - i,
+        _next_pattern(patterns, second, j, second_cache) - j,
+    )
+    if limit <= 0:
+        return 0
+    # binary search on slice equality
+    low, high = 1, limit
+    while low < high:
+        mid = (low + high + 1) // 2
+        if first[i : i + mid] == second[j : j + mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class IncrementalMatcher:
+    """Streaming version of calculate_valid_match_lengths.
+
+    Matches `first` against `second` arriving in chunks, carrying positions and
+    deviation state between calls, so every byte of `second` is inspected once.
+    """
+
+    def __init__(
+        self,
+        first: bytes | str,
+        deviation_threshold: int = 5,
+        deviation_reset: int = 5,
+        ignore_patterns: list[bytes | str | re.Pattern] = [],
+    ):
+        self.first = first
+        self.deviation_threshold = deviation_threshold
+        self.deviation_reset = deviation_reset
+        self.patterns = _compile_patterns(ignore_patterns)
+        self.i = 0
+        self.deviations = 0
+        self.matched_since_deviation = 0
+        self.done = not first
+        self._first_patterns: dict = {}  # next ignored pattern per pattern in first
+
+    def feed(self, second: bytes | str) -> int:
+        """Return how many leading characters of `second` belong to the match."""
+        if self.done:
+            return 0
+
+        first = self.first
+        first_length = len(first)
+        second_length = len(second)
+        j = 0
+        last_matched_j = 0
+        last_was_match = False
+        second_patterns: dict = {}
+        stepped = False
+
+        while self.i < first_length and j < second_length:
+            i = self.i = _skip_patterns(self.patterns, first, self.i)
+            j = _skip_patterns(self.patterns, second, j)
+            if j >= second_length and not stepped:
+                # the chunk ended in ignored characters only, they belong to the echo
+                last_matched_j = j
+
+            # equal run up to the next ignored pattern, compared as slices instead of per character
+            run = (
+                _common_run(self.patterns, first, i, second, j, self._first_patterns, second_patterns)
+                if i < first_length and j < second_length
+                else 0
+            )
+            if run:
+                self.i += run
+                j += run
+                last_matched_j = j
+                last_was_match = stepped = True
+                matched = self.matched_since_deviation + run
+                if matched >= self.deviation_reset:
+                    self.deviations = 0
+                    matched %= max(1, self.deviation_reset)
+                self.matched_since_deviation = matched
+            elif i < first_length and j < second_length and first[i] == second[j]:
+                self.i += 1
+                j += 1
+                last_matched_j = j
+                last_was_match = stepped = True
+                self.matched_since_deviation += 1
+
+                if self.matched_since_deviation >= self.deviation_reset:
+                    self.deviations = 0
+                    self.matched_since_deviation = 0
+            elif i < first_length and j < second_length:
+                last_was_match = False
+                stepped = True
+                look_ahead = self.deviation_threshold - self.deviations
+                for k in range(1, look_ahead + 1):
+                    if i + k < first_length and first[i + k] == second[j]:
+                        self.i += k
+                        break
+                    if j + k < second_length and first[i] == second[j + k]:
+                        j += k
+                        break
+                else:
+                    self.i += 1
+                    j += 1
+
+                self.deviations += 1
+                self.matched_since_deviation = 0
+
+                if self.deviations > self.deviation_threshold:
+                    self.done = True
+                    break
+
+        if self.i >= first_length:
+            self.done = True
+
+        # ignored characters right after the last match are part of it too
+        if last_was_match:
+            last_matched_j = _skip_patterns(self.patterns, second, last_matched_j)
+
+        return last_matched_j
+
+
 def format_key(key: str) -> str:
     """Format a key string to be more readable.
     Converts camelCase and snake_case to Title Case with spaces."""
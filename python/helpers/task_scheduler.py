@@ -3,6 +3,7 @@ from datetime import datetime, timezone, timedelta
 import os
 import random
 import threading
+import time
 from urllib.parse import urlparse
 import uuid
 from enum import Enum
@@ -22,6 +23,7 @@ from python.helpers.print_style import PrintStyle
 from python.helpers.defer import DeferredTask
 from python.helpers.files import get_abs_path, make_dirs, read_file, write_file
 from python.helpers.localization import Localization
+from python.helpers import metrics
 import pytz
 from typing import Annotated
 
@@ -771,6 +773,8 @@ class TaskScheduler:
 
             # the agent instance - init in try block
             agent = None
+            started = time.perf_counter()
+            outcome = "error"
 
             try:
                 self._printer.print(f"Scheduler Task '{current_task.name}' started")
@@ -837,6 +841,7 @@ class TaskScheduler:
                 self._printer.print(f"Scheduler Task '{current_task.name}' completed: {result}")
                 await self._persist_chat(current_task, context)
                 await current_task.on_success(result)
+                outcome = "success"
 
                 # Explicitly verify task was updated in storage after success
                 await self._tasks.reload()
@@ -860,6 +865,10 @@ class TaskScheduler:
                 if agent:
                     agent.handle_critical_exception(e)
             finally:
+                metrics.SCHEDULER_RUNS.observe(
+                    time.perf_counter() - started, type=current_task.type.value, outcome=outcome
+                )
+
                 # Call on_finish for task-specific cleanup
                 await current_task.on_finish()
 
@@ -12,6 +12,8 @@ class Response:
 
 class Tool:
 
+    read_only = False  # no side effects, may run concurrently with other read-only tools
+
     def __init__(self, agent: Agent, name: str, method: str | None, args: dict[str,str], message: str, **kwargs) -> None:
         self.agent = agent
         self.name = name
@@ -0,0 +1,290 @@
+import atexit
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable
+
+from python.helpers import dotenv, files
+from python.helpers.print_style import PrintStyle
+
+# Nested timing spans for the agent loop, written to logs/trace_*.jsonl.
+# TRACE_EXPORT=jsonl writes one span per line, TRACE_EXPORT=otlp writes OTLP/JSON export requests
+# (one per line, readable by the OpenTelemetry collector otlpjsonfile receiver).
+# With tracing off, span() returns a shared no-op object and traced() adds one flag check per call.
+
+KEY_TRACE_EXPORT = "TRACE_EXPORT"
+SERVICE_NAME = "agent-zero"
+QUEUE_SIZE = 10000
+BATCH_SIZE = 200
+
+_exporter: "_Exporter | None" = None
+_current: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("trace_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "events", "error", "_token")
+
+    def __init__(self, name: str, parent: "Span | None", attributes: dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else _random_id(16)
+        self.span_id = _random_id(8)
+        self.parent_id = parent.span_id if parent else ""
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.events: list[tuple[str, int, dict[str, Any]]] = []
+        self.error = ""
+        self._token: contextvars.Token | None = None
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def event(self, name: str, **attributes: Any):
+        self.events.append((name, time.time_ns(), attributes))
+
+    def end(self, error: BaseException | None = None):
+        if self.end_ns:
+            return
+        self.end_ns = time.time_ns()
+        if error:
+            self.error = f"{type(error).__name__}: {error}"
+        if self._token:
+            try:
+                _current.reset(self._token)
+            except ValueError:
+                _current.set(None)  # ended from another context
+            self._token = None
+        if _exporter:
+            _exporter.export(self)
+
+    @property
+    def seconds(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end(exc)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.end(exc)
+
+
+class _NoopSpan:
+    # stands in for Span when tracing is off
+    name = ""
+    seconds = 0.0
+
+    def set(self, **attributes: Any):
+        pass
+
+    def event(self, name: str, **attributes: Any):
+        pass
+
+    def end(self, error: BaseException | None = None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def is_enabled() -> bool:
+    return _exporter is not None
+
+
+def span(name: str, **attributes: Any) -> Span | _NoopSpan:
+    """Start a span as child of the current one, use with `with` or call end()."""
+    if not _exporter:
+        return NOOP_SPAN
+    new = Span(name, _current.get(), attributes)
+    new._token = _current.set(new)
+    return new
+
+
+def current() -> Span | _NoopSpan:
+    """The innermost open span of this task, for adding attributes and events."""
+    return (_current.get() if _exporter else None) or NOOP_SPAN
+
+
+def traced(name: str | None = None):
+    """Decorator wrapping an async function in a span."""
+
+    def decorator(func: Callable):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not _exporter:
+                return await func(*args, **kwargs)
+            with span(span_name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def configure(export: str = "", path: str = ""):
+    """Enable tracing with the "jsonl" or "otlp" exporter, an empty value disables it."""
+    global _exporter
+    if _exporter:
+        _exporter.close()
+        _exporter = None
+    export = export.lower().strip()
+    if export in ("", "false", "0", "no", "none"):
+        return
+    if export not in ("jsonl", "otlp", "true", "1", "yes"):
+        raise Exception(f"Unknown trace exporter: {export}")
+    if not path:
+        path = files.get_abs_path("logs", datetime.now().strftime("trace_%Y%m%d_%H%M%S.jsonl"))
+    _exporter = _Exporter(path, otlp=export == "otlp")
+
+
+def close():
+    if _exporter:
+        _exporter.close()
+
+
+class _Exporter:
+    def __init__(self, path: str, otlp: bool):
+        self.path = path
+        self.otlp = otlp
+        self.queue: queue.Queue[Span | None] = queue.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.thread = threading.Thread(target=self._run, daemon=True, name="Tracing")
+        self.thread.start()
+
+    def export(self, span: Span):
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1  # never block the agent for tracing
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+
+    def _run(self):
+        closing = False
+        with open(self.path, "a", encoding="utf-8") as f:
+            while not closing:
+                batch = [self.queue.get()]
+                while len(batch) < BATCH_SIZE:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in batch:
+                    closing = True
+                spans: list[Span] = [s for s in batch if s is not None]
+                if not spans:
+                    continue
+                try:
+                    if self.otlp:
+                        f.write(json.dumps(_otlp_request(spans), default=str) + "\n")
+                    else:
+                        f.writelines(json.dumps(_jsonl_record(s), default=str) + "\n" for s in spans)
+                    f.flush()
+                except Exception:
+                    pass  # tracing must never break the caller
+
+
+def _jsonl_record(span: Span) -> dict:
+    return {
+        "name": span.name,
+        "trace_id": span.trace_id,
+        "span_id": span.span_id,
+        "parent_id": span.parent_id,
+        "start": span.start_ns / 1e9,
+        "duration_ms": (span.end_ns - span.start_ns) / 1e6,
+        "attributes": span.attributes,
+        "events": [
+            {"name": name, "time": ts / 1e9, "attributes": attrs} for name, ts, attrs in span.events
+        ],
+        "error": span.error,
+    }
+
+
+def _otlp_request(spans: list[Span]) -> dict:
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "python.helpers.tracing"},
+                        "spans": [_otlp_span(s) for s in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+def _otlp_span(span: Span) -> dict:
+    data = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "parentSpanId": span.parent_id,
+        "name": span.name,
+        "kind": 1,  # internal
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": _otlp_attributes(span.attributes),
+        "events": [
+            {"name": name, "timeUnixNano": str(ts), "attributes": _otlp_attributes(attrs)}
+            for name, ts, attrs in span.events
+        ],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    return data
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict]:
+    result = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            result.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            result.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            result.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            result.append({"key": key, "value": {"stringValue": str(value)}})
+    return result
+
+
+def _random_id(size: int) -> str:
+    return random.getrandbits(size * 8).to_bytes(size, "big").hex()
+
+
+try:
+    configure(dotenv.get_dotenv_value(KEY_TRACE_EXPORT, "") or "")
+except Exception as e:
+    # a typo in .env must not keep the app from starting
+    PrintStyle.error(f"Tracing disabled: {e}")
+atexit.register(close)
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import threading
+from typing import BinaryIO, TypedDict
+
+from werkzeug.utils import secure_filename
+
+from python.helpers import files, runtime
+
+# Chunked uploads written straight to disk, size limited and checksummed on the fly
+
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_SIZE = 100 * 1024 * 1024  # per file
+RFC_CHUNK_SIZE = 8 * 1024 * 1024  # bytes per rfc call in development mode
+PART_SUFFIX = ".part"
+
+
+class UploadedFile(TypedDict):
+    filename: str
+    path: str
+    size: int
+    sha256: str
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def save_stream(
+    stream: BinaryIO, target_dir: str, filename: str, max_size: int = MAX_UPLOAD_SIZE
+) -> UploadedFile:
+    """Copy an upload stream into target_dir chunk by chunk, the file only appears once complete."""
+    filename = secure_filename(filename)
+    if not filename:
+        raise Exception("Invalid file name")
+    path = files.get_abs_path(target_dir, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    hasher = hashlib.sha256()
+    size = 0
+    part = path + PART_SUFFIX
+    try:
+        with open(part, "wb") as out:
+            while chunk := stream.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(
+                        f"File {filename} exceeds the upload limit of {max_size} bytes"
+                    )
+                hasher.update(chunk)
+                out.write(chunk)
+        os.replace(part, path)
+    except BaseException:
+        _remove(part)
+        raise
+    return UploadedFile(filename=filename, path=path, size=size, sha256=hasher.hexdigest())
+
+
+async def save_stream_remote(
+    stream: BinaryIO, target_dir: str, filename: str, max_size: int = MAX_UPLOAD_SIZE
+) -> UploadedFile:
+    """Like save_stream, but writes on the development target over rfc in bounded chunks."""
+    filename = secure_filename(filename)
+    if not filename:
+        raise Exception("Invalid file name")
+
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := stream.read(RFC_CHUNK_SIZE):
+            if size + len(chunk) > max_size:
+                raise UploadTooLarge(
+                    f"File {filename} exceeds the upload limit of {max_size} bytes"
+                )
+            hasher.update(chunk)
+            await runtime.call_development_function(
+                write_chunk, target_dir, filename, size, chunk
+            )
+            size += len(chunk)
+        return await runtime.call_development_function(
+            finish_chunks, target_dir, filename, size, hasher.hexdigest()
+        )
+    except BaseException:
+        await runtime.call_development_function(abort_chunks, target_dir, filename)
+        raise
+
+
+# receiving side of save_stream_remote, hash state is kept between calls
+_pending: dict[str, "hashlib._Hash"] = {}
+_pending_lock = threading.Lock()
+
+
+def write_chunk(target_dir: str, filename: str, offset: int, data: bytes):
+    part = files.get_abs_path(target_dir, secure_filename(filename)) + PART_SUFFIX
+    with _pending_lock:
+        if offset == 0:
+            os.makedirs(os.path.dirname(part), exist_ok=True)
+            _pending[part] = hashlib.sha256()
+            mode = "wb"
+        elif part not in _pending or os.path.getsize(part) != offset:
+            raise Exception(f"Upload of {filename} out of sequence at {offset}")
+        else:
+            mode = "ab"
+        with open(part, mode) as out:
+            out.write(data)
+        _pending[part].update(data)
+
+
+def finish_chunks(target_dir: str, filename: str, size: int, sha256: str) -> UploadedFile:
+    filename = secure_filename(filename)
+    path = files.get_abs_path(target_dir, filename)
+    part = path + PART_SUFFIX
+    with _pending_lock:
+        hasher = _pending.pop(part, None)
+    if not size:
+        # nothing was sent, create the empty file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(part, "wb").close()
+        hasher = hashlib.sha256()
+    if not hasher or hasher.hexdigest() != sha256 or os.path.getsize(part) != size:
+        _remove(part)
+        raise Exception(f"Checksum mismatch for uploaded file {filename}")
+    os.replace(part, path)
+    return UploadedFile(filename=filename, path=path, size=size, sha256=sha256)
+
+
+def abort_chunks(target_dir: str, filename: str):
+    part = files.get_abs_path(target_dir, secure_filename(filename)) + PART_SUFFIX
+    with _pending_lock:
+        _pending.pop(part, None)
+    _remove(part)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import threading
+
+from python.helpers import files
+
+# Content addressed disk cache of utility model responses, keyed by model and prompt.
+# Reads touch the file, the least recently used entries are removed once the folder outgrows CACHE_MAX_BYTES.
+
+CACHE_FOLDER = "tmp/utility_cache"
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+TRIM_EVERY = 50  # writes between size checks
+
+_lock = threading.Lock()
+_writes = 0
+
+
+def get_key(provider: str, model: str, kwargs: dict, system: str, message: str) -> str:
+    raw = json.dumps([provider, model, kwargs, system, message], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def read(key: str) -> str | None:
+    path = _path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        os.utime(path)  # most recently used
+        return content
+    except OSError:
+        return None
+
+
+def write(key: str, content: str):
+    global _writes
+    path = _path(key)
+    files.make_dirs(path)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+    with _lock:
+        _writes += 1
+        if _writes % TRIM_EVERY:
+            return
+    trim()
+
+
+def trim(max_bytes: int = CACHE_MAX_BYTES):
+    """Remove least recently used entries until the cache fits into max_bytes."""
+    folder = files.get_abs_path(CACHE_FOLDER)
+    entries = []
+    try:
+        for entry in os.scandir(folder):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except OSError:
+        return
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def _path(key: str) -> str:
+    return files.get_abs_path(CACHE_FOLDER, f"{key}.txt")
@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import aiohttp
+
+from python.helpers import files
+
+# Shared HTTP client with an on-disk cache honouring ETag / Last-Modified
+
+CACHE_FOLDER = "tmp/web_cache"
+CACHE_TTL = 3600  # seconds a cached page is served without revalidation
+FETCH_TIMEOUT = 10
+MAX_CONTENT_LENGTH = 10 * 1024 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+USER_AGENT = "Mozilla/5.0 (compatible; AgentZero/1.0)"
+
+
+@dataclass
+class FetchResult:
+    url: str
+    content: bytes
+    content_type: str
+    encoding: str
+    from_cache: bool = False
+
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+# one session per event loop, aiohttp sessions can not be shared across loops
+_sessions: dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+_guards: dict[aiohttp.ClientSession, asyncio.Task] = {}
+
+
+def get_session() -> aiohttp.ClientSession:
+    return loop_session(
+        _sessions,
+        lambda: aiohttp.ClientSession(
+            headers={"User-Agent": USER_AGENT},
+            connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300),
+        ),
+    )
+
+
+def loop_session(
+    sessions: dict[asyncio.AbstractEventLoop, aiohttp.ClientSession],
+    create: Callable[[], aiohttp.ClientSession],
+) -> aiohttp.ClientSession:
+    """Session of the running loop from `sessions`, closed on that loop when it shuts down."""
+    loop = asyncio.get_running_loop()
+    session = sessions.get(loop)
+    if not session or session.closed:
+        # loops closed without cancelling their tasks, nothing can be closed there anymore
+        for other in [l for l in sessions if l.is_closed()]:
+            _guards.pop(sessions.pop(other), None)
+        session = sessions[loop] = create()
+        # asyncio.run and asgiref cancel leftover tasks before closing their loop,
+        # the cancelled guard then closes the session on its own loop
+        _guards[session] = loop.create_task(_close_on_shutdown(sessions, loop, session))
+    return session
+
+
+async def close_loop_session(sessions: dict[asyncio.AbstractEventLoop, aiohttp.ClientSession]):
+    session = sessions.pop(asyncio.get_running_loop(), None)
+    if not session:
+        return
+    guard = _guards.pop(session, None)
+    if guard:
+        guard.cancel()
+    await session.close()
+
+
+async def _close_on_shutdown(sessions: dict, loop: asyncio.AbstractEventLoop, session: aiohttp.ClientSession):
+    try:
+        await loop.create_future()  # never resolves, only cancelled
+    finally:
+        if sessions.get(loop) is session:
+            del sessions[loop]
+        _guards.pop(session, None)
+        await session.close()
+
+
+async def close_session():
+    await close_loop_session(_sessions)
+
+
+async def fetch(url: str, timeout: float = FETCH_TIMEOUT, ttl: float = CACHE_TTL) -> FetchResult:
+    key = hashlib.sha256(url.encode()).hexdigest()
+    meta = await asyncio.to_thread(_read_meta, key) or {}
+    cached = await asyncio.to_thread(_read_cached, key, meta) if meta else None
+
+    if cached and time.time() - meta["fetched_at"] < ttl:
+        return cached
+
+    # revalidate stale entries instead of downloading them again
+    headers = {}
+    if cached:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    session = get_session()
+    async with session.get(
+        url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
+    ) as response:
+        if response.status == 304 and cached:
+            meta["fetched_at"] = time.time()
+            await asyncio.to_thread(_write_meta, key, meta)
+            return cached
+
+        response.raise_for_status()
+        if (response.content_length or 0) > MAX_CONTENT_LENGTH:
+            raise Exception(f"Content too large: {response.content_length} bytes")
+        # read to the end, content-length may be missing or wrong
+        chunks, size = [], 0
+        async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_CONTENT_LENGTH:
+                raise Exception(f"Content too large: over {MAX_CONTENT_LENGTH} bytes")
+            chunks.append(chunk)
+        content = b"".join(chunks)
+        result = FetchResult(
+            url=str(response.url),
+            content=content,
+            content_type=response.content_type,
+            encoding=_get_encoding(response),
+        )
+        cache_control = response.headers.get("Cache-Control", "").lower()
+        if "no-store" not in cache_control:
+            meta = {
+                "url": result.url,
+                "content_type": result.content_type,
+                "encoding": result.encoding,
+                "etag": response.headers.get("ETag", ""),
+                "last_modified": response.headers.get("Last-Modified", ""),
+                "fetched_at": time.time(),
+            }
+            await asyncio.to_thread(_write_cached, key, meta, content)
+        return result
+
+
+def _get_encoding(response: aiohttp.ClientResponse) -> str:
+    try:
+        return response.get_encoding()
+    except Exception:
+        return "utf-8"
+
+
+def _cache_path(key: str, ext: str) -> str:
+    return files.get_abs_path(CACHE_FOLDER, f"{key}.{ext}")
+
+
+def _read_meta(key: str) -> dict | None:
+    try:
+        with open(_cache_path(key, "json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _write_meta(key: str, meta: dict):
+    path = _cache_path(key, "json")
+    files.make_dirs(path)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, path)
+
+
+def _read_cached(key: str, meta: dict) -> FetchResult | None:
+    try:
+        with open(_cache_path(key, "bin"), "rb") as f:
+            content = f.read()
+    except OSError:
+        return None
+    return FetchResult(
+        url=meta["url"],
+        content=content,
+        content_type=meta["content_type"],
+        encoding=meta["encoding"],
+        from_cache=True,
+    )
+
+
+def _write_cached(key: str, meta: dict, content: bytes):
+    path = _cache_path(key, "bin")
+    files.make_dirs(path)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+    _write_meta(key, meta)
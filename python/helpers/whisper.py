@@ -1,16 +1,34 @@
+import asyncio
 import base64
+import json
+import queue
+import subprocess
+import threading
+import time
 import warnings
+from typing import Callable
+
+import numpy as np
+import torch
 import whisper
-import tempfile
-import asyncio
-from python.helpers import runtime, rfc, settings
+from python.helpers import runtime
 from python.helpers.print_style import PrintStyle
 
 # Suppress FutureWarning from torch.load
 warnings.filterwarnings("ignore", category=FutureWarning)
 
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+CHUNK_SAMPLES = whisper.audio.N_SAMPLES  # 30 s, the window whisper decodes at once
+MAX_BATCH = 8  # short clips decoded together
+STREAM_SECTION = MAX_BATCH * CHUNK_SAMPLES  # audio transcribed between partial results
+# same quality thresholds as whisper.transcribe
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
 _model = None
 _model_name = ""
+_model_lock = threading.Lock()
 is_updating_model = False  # Tracks whether the model is currently updating
 
 async def preload(model_name:str):
@@ -19,21 +37,23 @@ async def preload(model_name:str):
     except Exception as e:
         if not runtime.is_development():
             raise e
-        
-async def _preload(model_name:str):
-    global _model, _model_name, is_updating_model
 
-    while is_updating_model:
-        await asyncio.sleep(0.1)
+async def _preload(model_name:str):
+    # loading blocks, waiters queue on the lock instead of polling
+    await asyncio.to_thread(_load_model, model_name)
 
-    try:
-        is_updating_model = True
+def _load_model(model_name: str):
+    global _model, _model_name, is_updating_model
+    with _model_lock:
         if not _model or _model_name != model_name:
+            try:
+                is_updating_model = True
                 PrintStyle.standard(f"Loading Whisper model: {model_name}")
                 _model = whisper.load_model(name=model_name) # type: ignore
                 _model_name = model_name
-    finally:
-        is_updating_model = False
+            finally:
+                is_updating_model = False
+        return _model
 
 async def is_downloading():
     return await runtime.call_development_function(_is_downloading)
@@ -42,19 +62,219 @@ def _is_downloading():
     return is_updating_model
 
 async def transcribe(model_name:str, audio_bytes_b64: str):
-    return await runtime.call_development_function(_transcribe, model_name, audio_bytes_b64)
-
+    # raw bytes over rfc, no second base64 round
+    audio_bytes = base64.b64decode(audio_bytes_b64)
+    return await runtime.call_development_function(_transcribe, model_name, audio_bytes)
 
-async def _transcribe(model_name:str, audio_bytes_b64: str):
-    await _preload(model_name)
-    
-    # Decode audio bytes if encoded as a base64 string
+def transcribe_stream(model_name: str, audio_bytes_b64: str):
+    """Partial transcripts of a long recording as json lines, one per transcribed section."""
     audio_bytes = base64.b64decode(audio_bytes_b64)
+    return runtime.call_development_stream(_transcribe_stream, model_name, audio_bytes)
+
+async def get_metrics():
+    return await runtime.call_development_function(_get_metrics)
+
+
+async def _transcribe(model_name:str, audio_bytes: bytes):
+    audio = await asyncio.to_thread(decode_audio, audio_bytes)
+    return await TranscriptionWorker.get().transcribe(model_name, audio)
+
+async def _transcribe_stream(model_name: str, audio_bytes: bytes):
+    audio = await asyncio.to_thread(decode_audio, audio_bytes)
+    loop = asyncio.get_running_loop()
+    partials: asyncio.Queue[str] = asyncio.Queue()
+
+    def on_partial(text: str):
+        loop.call_soon_threadsafe(partials.put_nowait, text)
+
+    task = asyncio.ensure_future(
+        TranscriptionWorker.get().transcribe(model_name, audio, on_partial)
+    )
+    while not task.done() or not partials.empty():
+        getter = asyncio.ensure_future(partials.get())
+        await asyncio.wait([getter, task], return_when=asyncio.FIRST_COMPLETED)
+        if getter.done():
+            yield (json.dumps({"text": getter.result(), "done": False}) + "\n").encode()
+        else:
+            getter.cancel()
+    result = task.result()
+    yield (json.dumps({"text": result["text"], "language": result["language"], "done": True}) + "\n").encode()
+
+def _get_metrics():
+    return TranscriptionWorker.get().get_metrics()
+
+
+def decode_audio(data: bytes, sr: int = SAMPLE_RATE) -> np.ndarray:
+    # same conversion as whisper.load_audio, fed through stdin instead of a temp file
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr),
+        "-",
+    ]
+    try:
+        out = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='replace')}") from e
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+class _Job:
+    def __init__(self, model_name: str, audio: np.ndarray, loop: asyncio.AbstractEventLoop, on_partial: Callable[[str], None] | None):
+        self.model_name = model_name
+        self.audio = audio
+        self.loop = loop
+        self.future: asyncio.Future = loop.create_future()
+        self.on_partial = on_partial
+
+    def resolve(self, result=None, error: Exception | None = None):
+        def _set():
+            if self.future.done():
+                return
+            if error:
+                self.future.set_exception(error)
+            else:
+                self.future.set_result(result)
+        self.loop.call_soon_threadsafe(_set)
+
+
+class TranscriptionWorker:
+    """Single thread owning the model, concurrent requests are drained from the queue and decoded in batches."""
+
+    _instance: "TranscriptionWorker | None" = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls) -> "TranscriptionWorker":
+        with cls._lock:
+            if not cls._instance:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        self.queue: queue.Queue[_Job] = queue.Queue()
+        self.clips = 0
+        self.batches = 0
+        self.audio_seconds = 0.0
+        self.processing_seconds = 0.0
+        self.last_rtf = 0.0
+        self.thread = threading.Thread(target=self._run, daemon=True, name="Whisper")
+        self.thread.start()
+
+    async def transcribe(self, model_name: str, audio: np.ndarray, on_partial: Callable[[str], None] | None = None) -> dict:
+        job = _Job(model_name, audio, asyncio.get_running_loop(), on_partial)
+        self.queue.put(job)
+        return await job.future
+
+    def get_metrics(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "clips": self.clips,
+            "batches": self.batches,
+            "audio_seconds": self.audio_seconds,
+            "processing_seconds": self.processing_seconds,
+            # processing time per second of audio, below 1 is faster than real time
+            "real_time_factor": self.processing_seconds / self.audio_seconds if self.audio_seconds else 0.0,
+            "last_real_time_factor": self.last_rtf,
+        }
+
+    def _run(self):
+        while True:
+            jobs = [self.queue.get()]
+            while len(jobs) < MAX_BATCH:
+                try:
+                    jobs.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            # one model per batch, keep the order of arrival otherwise
+            for model_name in dict.fromkeys(job.model_name for job in jobs):
+                self._process(model_name, [job for job in jobs if job.model_name == model_name])
+
+    def _process(self, model_name: str, jobs: list[_Job]):
+        start = time.perf_counter()
+        try:
+            model = _load_model(model_name)
+        except Exception as e:
+            for job in jobs:
+                job.resolve(error=e)
+            return
+
+        # short clips fit one window and share a single decode call
+        short = [job for job in jobs if len(job.audio) <= CHUNK_SAMPLES]
+        if short:
+            try:
+                results = self._decode(model, [job.audio for job in short])
+                for job, result in zip(short, results):
+                    if self._needs_fallback(result):
+                        # let transcribe retry at higher temperatures
+                        job.resolve(self._transcribe(model, job.audio))
+                    else:
+                        job.resolve(self._result(result, len(job.audio)))
+            except Exception as e:
+                for job in short:
+                    job.resolve(error=e)
+
+        # longer recordings need timestamp seeking across windows, whisper.transcribe does that
+        for job in jobs:
+            if len(job.audio) <= CHUNK_SAMPLES:
+                continue
+            try:
+                if not job.on_partial:
+                    job.resolve(self._transcribe(model, job.audio))
+                    continue
+                # streamed in sections, the text so far is the prompt of the next one
+                result = {"text": "", "language": "", "segments": []}
+                for i in range(0, len(job.audio), STREAM_SECTION):
+                    section = self._transcribe(
+                        model, job.audio[i : i + STREAM_SECTION], result["text"], i / SAMPLE_RATE
+                    )
+                    result["text"] = (result["text"] + " " + section["text"]).strip()
+                    result["language"] = result["language"] or section["language"]
+                    result["segments"] += section["segments"]
+                    job.on_partial(result["text"])
+                job.resolve(result)
+            except Exception as e:
+                job.resolve(error=e)
+
+        duration = time.perf_counter() - start
+        audio_seconds = sum(len(job.audio) for job in jobs) / SAMPLE_RATE
+        self.clips += len(jobs)
+        self.batches += 1
+        self.audio_seconds += audio_seconds
+        self.processing_seconds += duration
+        self.last_rtf = duration / audio_seconds if audio_seconds else 0.0
+
+    def _decode(self, model, clips: list[np.ndarray]):
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(clip)), model.dims.n_mels)
+            for clip in clips
+        ]).to(model.device)
+        options = whisper.DecodingOptions(fp16=model.device.type == "cuda")
+        return whisper.decode(model, mels, options)
+
+    def _needs_fallback(self, result) -> bool:
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            return False  # silence, empty text is the right answer
+        return (
+            result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+            or result.avg_logprob < LOGPROB_THRESHOLD
+        )
 
-    # Create temp audio file
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as audio_file:
-        audio_file.write(audio_bytes)
+    def _transcribe(self, model, audio: np.ndarray, prompt: str = "", offset: float = 0.0) -> dict:
+        result = model.transcribe(
+            audio, fp16=model.device.type == "cuda", initial_prompt=prompt or None
+        )
+        segments = [
+            {"id": s["id"], "start": s["start"] + offset, "end": s["end"] + offset, "text": s["text"]}
+            for s in result["segments"]
+        ]
+        return {"text": result["text"].strip(), "language": result["language"], "segments": segments}
 
-    # Transcribe the audio file
-    result = _model.transcribe(audio_file.name, fp16=False) # type: ignore
-    return result
+    def _result(self, result, length: int) -> dict:
+        silent = result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD
+        text = "" if silent else result.text.strip()
+        return {
+            "text": text,
+            "language": result.language,
+            "segments": [{"id": 0, "start": 0.0, "end": length / SAMPLE_RATE, "text": text}] if text else [],
+        }
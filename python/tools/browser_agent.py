@@ -1,11 +1,11 @@
 import asyncio
-import json
+import threading
 import time
 from agent import Agent, InterventionException
 
 import models
 from python.helpers.tool import Tool, Response
-from python.helpers import files, defer, persist_chat
+from python.helpers import files, defer, persist_chat, strings
 from python.helpers.browser_use import browser_use
 from python.extensions.message_loop_start._10_iteration_no import get_iter_no
 from pydantic import BaseModel
@@ -13,6 +13,23 @@ import uuid
 from python.helpers.dirty_json import DirtyJson
 from langchain_core.messages import SystemMessage
 
+SCREENSHOT_INTERVAL = 2  # minimum seconds between step screenshots
+SCREENSHOT_QUALITY = 60  # jpeg quality
+LOG_LINE_LENGTH = 150
+
+
+def _shorten(text, length=LOG_LINE_LENGTH) -> str:
+    text = " ".join(str(text).split())
+    if len(text) > length:
+        text = text[:length] + "..."
+    return text
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
 class State:
     @staticmethod
     async def create(agent: Agent):
@@ -26,7 +43,14 @@ class State:
         self.use_agent = None
         self.browser = None
         self.iter_no = 0
-
+        self.screenshot_path = ""
+        # step events published by the browser-use step callback
+        self.events: list[str] = []
+        self.screenshot = ""
+        self.last_screenshot = 0.0
+        self._screenshot_task: asyncio.Task | None = None
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
 
     def __del__(self):
         self.kill_task()
@@ -64,6 +88,9 @@ class State:
             )
             if self.agent.context.task:
                 self.agent.context.task.add_child_task(self.task, terminate_thread=True)
+        with self._lock:
+            self.events = []
+        self.screenshot = ""
         self.task.start_task(self._run_task, task)
         return self.task
 
@@ -75,8 +102,96 @@ class State:
             self.use_agent = None
             self.browser = None
             self.iter_no = 0
+            self._screenshot_task = None
+        self._notify()
+
+    def publish(self, *events: str):
+        with self._lock:
+            self.events.extend(events)
+        self._notify()
+
+    def _notify(self):
+        with self._lock:
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    async def wait_update(self, cursor: int, timeout: float) -> bool:
+        """Wait until events beyond cursor are published, the task ends or the timeout expires."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if len(self.events) > cursor or not self.task or self.task.is_ready():
+                return len(self.events) > cursor
+            self._waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        return len(self.events) > cursor
+
+    def on_step(self, browser_state, model_output, n_steps: int):
+        # called by browser-use on the browser thread once the next action is chosen
+        events = []
+        for result in self._last_results():
+            if result.error:
+                events.append(f"Result: error: {_shorten(result.error)}")
+            elif result.extracted_content:
+                events.append(f"Result: {_shorten(result.extracted_content)}")
+        cs = getattr(model_output, "current_state", None)
+        if cs:
+            if cs.memory:
+                events.append(f"Step {n_steps} memory: {_shorten(cs.memory)}")
+            events.append(f"Step {n_steps} goal: {_shorten(cs.next_goal)}")
+        for action in getattr(model_output, "action", None) or []:
+            data = action.model_dump(exclude_unset=True, exclude_none=True)
+            for name, params in data.items():
+                events.append(f"Action: {name} {_shorten(params)}")
+        self.publish(*events)
+        self.schedule_screenshot()
+
+    def _last_results(self):
+        ua = self.use_agent
+        if not ua:
+            return []
+        # attribute moved into agent state in newer browser-use versions
+        state = getattr(ua, "state", None)
+        results = getattr(state, "last_result", None) or getattr(ua, "_last_result", None)
+        return results or []
+
+    def schedule_screenshot(self):
+        if self._screenshot_task and not self._screenshot_task.done():
+            return
+        if time.time() - self.last_screenshot < SCREENSHOT_INTERVAL:
+            return
+        self.last_screenshot = time.time()
+        self._screenshot_task = asyncio.create_task(self._take_screenshot())
+
+    async def _take_screenshot(self):
+        try:
+            page = await self.get_page()
+            if not page or not self.screenshot_path:
+                return
+            files.make_dirs(self.screenshot_path)
+            await page.screenshot(
+                path=self.screenshot_path,
+                type="jpeg",
+                quality=SCREENSHOT_QUALITY,
+                full_page=False,
+                timeout=3000,
+            )
+            self.screenshot = f"img://{self.screenshot_path}&t={str(time.time())}"
+            self._notify()
+        except Exception:
+            pass  # page navigating or closed, next step will retry
 
     async def _run_task(self, task: str):
+        try:
+            return await self._run_agent(task)
+        finally:
+            self._notify()
+
+    async def _run_agent(self, task: str):
 
         agent = self.agent
 
@@ -123,6 +238,7 @@ class State:
             use_vision=self.agent.config.browser_model.vision,
             system_prompt_class=CustomSystemPrompt,
             controller=controller,
+            register_new_step_callback=self.on_step,
         )
 
         self.iter_no = get_iter_no(self.agent)
@@ -163,22 +279,26 @@ class BrowserAgent(Tool):
         self.guid = str(uuid.uuid4())
         reset = str(reset).lower().strip() == "true"
         await self.prepare_state(reset=reset)
+        self.state.screenshot_path = files.get_abs_path(
+            persist_chat.get_chat_folder_path(self.agent.context.id),
+            "browser",
+            "screenshots",
+            f"{self.guid}.jpg",
+        )
         task = self.state.start_task(message)
 
-        # wait for browser agent to finish and update progress
+        # wait for step events from the browser agent and update progress
+        cursor = 0
+        screenshot = ""
         while not task.is_ready():
             await self.agent.handle_intervention()
-            await asyncio.sleep(1)
-            try:
-                update = await self.get_update()
-                log = update.get("log")
-                if log:
-                    self.update_progress("\n".join(log))
-                screenshot = update.get("screenshot", None)
-                if screenshot:
-                    self.log.update(screenshot=screenshot)
-            except Exception as e:
-                pass
+            await self.state.wait_update(cursor, timeout=1)
+            if len(self.state.events) > cursor:
+                cursor = len(self.state.events)
+                self.update_progress("\n".join(self.state.events[:cursor]))
+            if self.state.screenshot != screenshot:
+                screenshot = self.state.screenshot
+                self.log.update(screenshot=screenshot)
 
         # collect result
         result = await task.result()
@@ -202,71 +322,6 @@ class BrowserAgent(Tool):
     # async def after_execution(self, response, **kwargs):
     #     await self.agent.hist_add_tool_result(self.name, response.message)
 
-    async def get_update(self):
-        await self.prepare_state()
-
-        result = {}
-        agent = self.agent
-        ua = self.state.use_agent
-        page = await self.state.get_page()
-        ctx = self.state.context
-
-        if ua and page:
-            try:
-
-                async def _get_update():
-
-                    await agent.wait_if_paused()
-
-                    log = []
-
-                    # dom_service = browser_use.DomService(page)
-                    # dom_state = await browser_use.utils.time_execution_sync('get_clickable_elements')(
-                    #     dom_service.get_clickable_elements
-                    # )()
-                    # elements = dom_state.element_tree
-                    # selector_map = dom_state.selector_map
-                    # el_text = elements.clickable_elements_to_string()
-
-                    for message in ua.message_manager.get_messages():
-                        if message.type == "system":
-                            continue
-                        if message.type == "ai":
-                            try:
-                                data = json.loads(message.content)  # type: ignore
-                                cs = data.get("current_state")
-                                if cs:
-                                    log.append("AI:" + cs["memory"])
-                                    log.append("AI:" + cs["next_goal"])
-                            except Exception:
-                                pass
-                        if message.type == "human":
-                            content = str(message.content).strip()
-                            part = content.split("\n", 1)[0].split(",", 1)[0]
-                            if part:
-                                if len(part) > 150:
-                                    part = part[:150] + "..."
-                                log.append("FW:" + part)
-                    result["log"] = log
-
-                    path = files.get_abs_path(
-                        persist_chat.get_chat_folder_path(agent.context.id),
-                        "browser",
-                        "screenshots",
-                        f"{self.guid}.png",
-                    )
-                    files.make_dirs(path)
-                    await page.screenshot(path=path, full_page=False, timeout=3000)
-                    result["screenshot"] = f"img://{path}&t={str(time.time())}"
-
-                if self.state.task:
-                    await self.state.task.execute_inside(_get_update)
-
-            except Exception as e:
-                pass
-
-        return result
-
     async def prepare_state(self, reset=False):
         self.state = self.agent.get_data("_browser_agent_state")
         if not self.state or reset:
@@ -1,20 +1,26 @@
-from agent import Agent, UserMessage
+import asyncio
+from agent import Agent, HandledException, UserMessage
+from python.helpers import errors
 from python.helpers.tool import Tool, Response
 
 
 class Delegation(Tool):
 
-    async def execute(self, message="", reset="", **kwargs):
+    async def execute(self, message="", reset="", messages=None, **kwargs):
+        # several messages fan out to sibling subordinates running concurrently
+        if isinstance(messages, str):
+            messages = [messages]
+        if messages and len(messages) > 1:
+            return await self.fan_out([str(m) for m in messages])
+        if messages:
+            message = str(messages[0])
+
         # create subordinate agent using the data object on this agent and set superior agent to his data object
         if (
             self.agent.get_data(Agent.DATA_NAME_SUBORDINATE) is None
             or str(reset).lower().strip() == "true"
         ):
-            sub = Agent(
-                self.agent.number + 1, self.agent.config, self.agent.context
-            )
-            sub.set_data(Agent.DATA_NAME_SUPERIOR, self.agent)
-            self.agent.set_data(Agent.DATA_NAME_SUBORDINATE, sub)
+            self.agent.set_data(Agent.DATA_NAME_SUBORDINATE, self.create_subordinate())
 
         # add user message to subordinate agent
         subordinate: Agent = self.agent.get_data(Agent.DATA_NAME_SUBORDINATE)
@@ -23,3 +29,63 @@ class Delegation(Tool):
         result = await subordinate.monologue()
         # result
         return Response(message=result, break_loop=False)
+
+    def create_subordinate(self, name: str = "") -> Agent:
+        sub = Agent(self.agent.number + 1, self.agent.config, self.agent.context)
+        if name:
+            sub.agent_name = name
+        sub.set_data(Agent.DATA_NAME_SUPERIOR, self.agent)
+        return sub
+
+    async def fan_out(self, messages: list[str]) -> Response:
+        # fresh siblings every time, they share the context log and the model rate limiters
+        siblings = [
+            self.create_subordinate(f"Agent {self.agent.number + 1}.{i + 1}")
+            for i in range(len(messages))
+        ]
+        self.agent.set_data(Agent.DATA_NAME_SUBORDINATES, siblings)
+        semaphore = asyncio.Semaphore(max(1, self.agent.config.subordinate_concurrency))
+        parent_task = asyncio.current_task()
+        running = set(siblings)
+
+        async def run(sub: Agent, message: str):
+            try:
+                async with semaphore:
+                    sub.hist_add_user_message(UserMessage(message=message, attachments=[]))
+                    return await sub.monologue()
+            except HandledException as e:
+                # already logged by the sibling, the others keep going unless we are being cancelled
+                if parent_task and parent_task.cancelling():
+                    raise
+                return f"Error: {errors.error_text(e)}"
+            finally:
+                running.discard(sub)
+
+        async def forward_interventions():
+            # the user talks to this agent, pass messages on to the siblings still working
+            while running:
+                msg = self.agent.intervention
+                if msg:
+                    self.agent.intervention = None
+                    for sub in running:
+                        sub.intervention = msg
+                await asyncio.sleep(0.1)
+
+        forwarder = asyncio.ensure_future(forward_interventions())
+        try:
+            results = await asyncio.gather(
+                *[run(sub, msg) for sub, msg in zip(siblings, messages)],
+                return_exceptions=True,
+            )
+        finally:
+            forwarder.cancel()
+
+        parts = []
+        for sub, result in zip(siblings, results):
+            if isinstance(result, BaseException):
+                errors.handle_error(result)  # type: ignore
+                if isinstance(result, HandledException):
+                    raise result  # the parent task was cancelled
+                result = f"Error: {errors.error_text(result)}"  # type: ignore
+            parts.append(f"# {sub.agent_name}\n{result}")
+        return Response(message="\n\n".join(parts), break_loop=False)
@@ -1,14 +1,14 @@
 import asyncio
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import shlex
 import time
 from python.helpers.tool import Tool, Response
-from python.helpers import files, rfc_exchange
+from python.helpers import files, kernels, rfc_exchange
 from python.helpers.print_style import PrintStyle
 from python.helpers.shell_local import LocalInteractiveSession
 from python.helpers.shell_ssh import SSHInteractiveSession
-from python.helpers.docker import DockerContainerManager
-from python.helpers.messages import truncate_text
+from python.helpers.docker import DockerContainerManager, DockerContainerPool, PooledContainer
+from python.helpers.messages import truncate_buffer
 import re
 
 
@@ -16,6 +16,9 @@ import re
 class State:
     shells: dict[int, LocalInteractiveSession | SSHInteractiveSession]
     docker: DockerContainerManager | None
+    kernels: dict[int, str] = field(default_factory=dict)  # session -> kernel runtime
+    frames: dict[int, str] = field(default_factory=dict)  # session -> id of the last kernel frame
+    container: PooledContainer | None = None  # leased from the warm pool
 
 
 class CodeExecution(Tool):
@@ -44,8 +47,16 @@ class CodeExecution(Tool):
                 command=self.args["code"], session=session
             )
         elif runtime == "output":
+            end_marker = (
+                kernels.end_marker(self.state.frames.get(session, ""))
+                if session in self.state.kernels
+                else None
+            )
             response = await self.get_terminal_output(
-                session=session, first_output_timeout=60, between_output_timeout=5
+                session=session,
+                first_output_timeout=60,
+                between_output_timeout=5,
+                end_marker=end_marker,
             )
         elif runtime == "reset":
             response = await self.reset_terminal(session=session)
@@ -75,62 +86,92 @@ class CodeExecution(Tool):
         self.state = self.agent.get_data("_cet_state")
         if not self.state or reset:
 
+            docker = self.state.docker if self.state else None
+            container = self.state.container if self.state else None
+
             # initialize docker container if execution in docker is configured
             if not self.state and self.agent.config.code_exec_docker_enabled:
-                docker = DockerContainerManager(
-                    logger=self.agent.context.log,
-                    name=self.agent.config.code_exec_docker_name,
-                    image=self.agent.config.code_exec_docker_image,
-                    ports=self.agent.config.code_exec_docker_ports,
-                    volumes=self.agent.config.code_exec_docker_volumes,
-                )
-                docker.start_container()
-            else:
-                docker = self.state.docker if self.state else None
+                if self.agent.config.code_exec_docker_pool_size > 0:
+                    pool = await asyncio.to_thread(
+                        DockerContainerPool.get,
+                        image=self.agent.config.code_exec_docker_image,
+                        size=self.agent.config.code_exec_docker_pool_size,
+                        volumes=self.agent.config.code_exec_docker_volumes,
+                        logger=self.agent.context.log,
+                    )
+                    container = await pool.acquire(self.agent.context.id)
+                else:
+                    docker = await asyncio.to_thread(
+                        DockerContainerManager,
+                        logger=self.agent.context.log,
+                        name=self.agent.config.code_exec_docker_name,
+                        image=self.agent.config.code_exec_docker_image,
+                        ports=self.agent.config.code_exec_docker_ports,
+                        volumes=self.agent.config.code_exec_docker_volumes,
+                    )
+                    await docker.start_container_async()
 
             # initialize shells dictionary if not exists
             shells = {} if not self.state else self.state.shells.copy()
+            running_kernels = {} if not self.state else self.state.kernels.copy()
+            frames = {} if not self.state else self.state.frames.copy()
 
             # Only reset the specified session if provided
             if session is not None and session in shells:
                 shells[session].close()
                 del shells[session]
+                running_kernels.pop(session, None)
+                frames.pop(session, None)
             elif reset and not session:
                 # Close all sessions if full reset requested
                 for s in list(shells.keys()):
                     shells[s].close()
                 shells = {}
+                running_kernels = {}
+                frames = {}
 
             # initialize local or remote interactive shell interface for session 0 if needed
             if 0 not in shells:
-                if self.agent.config.code_exec_ssh_enabled:
-                    pswd = (
-                        self.agent.config.code_exec_ssh_pass
-                        if self.agent.config.code_exec_ssh_pass
-                        else await rfc_exchange.get_root_password()
-                    )
-                    shell = SSHInteractiveSession(
-                        self.agent.context.log,
-                        self.agent.config.code_exec_ssh_addr,
-                        self.agent.config.code_exec_ssh_port,
-                        self.agent.config.code_exec_ssh_user,
-                        pswd,
-                    )
-                else:
-                    shell = LocalInteractiveSession()
-
+                shell = await self.create_shell(container)
                 shells[0] = shell
                 await shell.connect()
 
-            self.state = State(shells=shells, docker=docker)
+            self.state = State(
+                shells=shells,
+                docker=docker,
+                kernels=running_kernels,
+                frames=frames,
+                container=container,
+            )
         self.agent.set_data("_cet_state", self.state)
 
+    async def create_shell(self, container: PooledContainer | None = None):
+        if self.agent.config.code_exec_ssh_enabled:
+            pswd = (
+                self.agent.config.code_exec_ssh_pass
+                if self.agent.config.code_exec_ssh_pass
+                else await rfc_exchange.get_root_password()
+            )
+            return SSHInteractiveSession(
+                self.agent.context.log,
+                self.agent.config.code_exec_ssh_addr,
+                # pooled containers get their own host port
+                container.ssh_port if container else self.agent.config.code_exec_ssh_port,
+                self.agent.config.code_exec_ssh_user,
+                pswd,
+            )
+        return LocalInteractiveSession()
+
     async def execute_python_code(self, session: int, code: str, reset: bool = False):
+        if self.use_kernel():
+            return await self.kernel_session(session, "python", code, reset)
         escaped_code = shlex.quote(code)
         command = f"ipython -c {escaped_code}"
         return await self.terminal_session(session, command, reset)
 
     async def execute_nodejs_code(self, session: int, code: str, reset: bool = False):
+        if self.use_kernel():
+            return await self.kernel_session(session, "nodejs", code, reset)
         escaped_code = shlex.quote(code)
         command = f"node /exe/node_eval.js {escaped_code}"
         return await self.terminal_session(session, command, reset)
@@ -138,9 +179,76 @@ class CodeExecution(Tool):
     async def execute_terminal_command(
         self, session: int, command: str, reset: bool = False
     ):
+        await self.stop_kernel(session)
         return await self.terminal_session(session, command, reset)
 
-    async def terminal_session(self, session: int, command: str, reset: bool = False):
+    def use_kernel(self) -> bool:
+        # persistent kernel can be requested per call, config sets the default
+        kernel = self.args.get("kernel")
+        if kernel is None:
+            return self.agent.config.code_exec_kernels
+        return str(kernel).lower().strip() in ("true", "1", "yes")
+
+    async def kernel_session(
+        self, session: int, runtime: str, code: str, reset: bool = False
+    ):
+        if reset:
+            await self.reset_terminal(session)
+        if self.state.kernels.get(session) != runtime:
+            await self.stop_kernel(session)
+            response = await self.terminal_session(
+                session,
+                kernels.launch_command(runtime),
+                end_marker=kernels.READY_MARKER,
+            )
+            if not self.marker_seen(session, kernels.READY_MARKER):
+                # kernel failed to start or hangs, start over with a clean shell next time
+                await self.prepare_state(reset=True, session=session)
+                return response
+            self.state.kernels[session] = runtime
+
+        # the id tells this frame's end apart from a late end of an earlier one
+        frame_id = kernels.new_frame_id()
+        self.state.frames[session] = frame_id
+        end_marker = kernels.end_marker(frame_id)
+        response = await self.terminal_session(
+            session,
+            kernels.encode_frame(code=code, id=frame_id),
+            end_marker=end_marker,
+            trim_echo=False,
+            first_output_timeout=kernels.OUTPUT_TIMEOUT,
+            between_output_timeout=kernels.OUTPUT_TIMEOUT,
+            max_exec_timeout=kernels.OUTPUT_TIMEOUT,
+        )
+        if not self.marker_seen(session, end_marker):
+            # the kernel died or did not report its own timeout
+            await self.prepare_state(reset=True, session=session)
+        return response
+
+    def marker_seen(self, session: int, marker: str) -> bool:
+        shell = self.state.shells.get(session)
+        return bool(shell) and marker in shell.full_output.end(len(marker) + 64)  # type: ignore
+
+    async def stop_kernel(self, session: int):
+        if not self.state.kernels.pop(session, None):
+            return
+        self.state.frames.pop(session, None)
+        if shell := self.state.shells.get(session):
+            shell.interrupt()  # a running execution would not read the exit frame
+            shell.send_command(kernels.encode_frame(exit=True), trim_echo=False)
+            await self.get_terminal_output(
+                session, first_output_timeout=2, between_output_timeout=2
+            )
+
+    async def terminal_session(
+        self,
+        session: int,
+        command: str,
+        reset: bool = False,
+        end_marker: str | None = None,
+        trim_echo: bool = True,
+        **output_args,
+    ):
 
         await self.agent.handle_intervention()  # wait for intervention and handle it, if paused
         # try again on lost connection
@@ -151,30 +259,18 @@ class CodeExecution(Tool):
                     await self.reset_terminal()
 
                 if session not in self.state.shells:
-                    if self.agent.config.code_exec_ssh_enabled:
-                        pswd = (
-                            self.agent.config.code_exec_ssh_pass
-                            if self.agent.config.code_exec_ssh_pass
-                            else await rfc_exchange.get_root_password()
-                        )
-                        shell = SSHInteractiveSession(
-                            self.agent.context.log,
-                            self.agent.config.code_exec_ssh_addr,
-                            self.agent.config.code_exec_ssh_port,
-                            self.agent.config.code_exec_ssh_user,
-                            pswd,
-                        )
-                    else:
-                        shell = LocalInteractiveSession()
+                    shell = await self.create_shell(self.state.container)
                     self.state.shells[session] = shell
                     await shell.connect()
 
-                self.state.shells[session].send_command(command)
+                self.state.shells[session].send_command(command, trim_echo=trim_echo)
 
                 PrintStyle(
                     background_color="white", font_color="#1B4F72", bold=True
                 ).print(f"{self.agent.agent_name} code execution output")
-                return await self.get_terminal_output(session)
+                return await self.get_terminal_output(
+                    session, end_marker=end_marker, **output_args
+                )
 
             except Exception as e:
                 if i == 1:
@@ -193,6 +289,7 @@ class CodeExecution(Tool):
         between_output_timeout=15,  # Wait up to x seconds between outputs
         max_exec_timeout=180,  #hard cap on total runtime
         sleep_time=0.1,
+        end_marker: str | None = None,  # printed by kernels when execution ends
     ):
         # Common shell prompt regex patterns (add more as needed)
         prompt_patterns = [
@@ -203,12 +300,12 @@ class CodeExecution(Tool):
 
         start_time = time.time()
         last_output_time = start_time
-        full_output = ""
         truncated_output = ""
         got_output = False
 
         while True:
-            await asyncio.sleep(sleep_time)
+            # shells push output to waiters, sleep_time only bounds the wait
+            await self.state.shells[session].wait_output(timeout=sleep_time)
             full_output, partial_output = await self.state.shells[session].read_output(
                 timeout=3, reset_full_output=reset_full_output
             )
@@ -219,23 +316,33 @@ class CodeExecution(Tool):
             now = time.time()
             if partial_output:
                 PrintStyle(font_color="#85C1E9").stream(partial_output)
-                # full_output += partial_output # Append new output
-                truncated_output = truncate_text(
-                    agent=self.agent, output=full_output, threshold=10000
+                # shells keep only head and tail of the output, this stays O(threshold)
+                truncated_output = truncate_buffer(
+                    agent=self.agent, buffer=full_output, threshold=10000
                 )
                 self.log.update(content=truncated_output)
                 last_output_time = now
                 got_output = True
 
+                # Kernels mark the end of execution explicitly
+                if end_marker:
+                    if end_marker in full_output.end(len(end_marker) + 64):
+                        marker_pos = truncated_output.rfind(end_marker)
+                        if marker_pos >= 0:
+                            truncated_output = truncated_output[:marker_pos].rstrip()
+                        self.log.update(content=truncated_output)
+                        return truncated_output
+
                 # Check for shell prompt at the end of output
-                last_lines = truncated_output.splitlines()[-3:] if truncated_output else []
-                for line in last_lines:
-                    for pat in prompt_patterns:
-                        if pat.search(line.strip()):
-                            PrintStyle.info(
-                                "Detected shell prompt, returning output early."
-                            )
-                            return truncated_output
+                else:
+                    last_lines = truncated_output.splitlines()[-3:] if truncated_output else []
+                    for line in last_lines:
+                        for pat in prompt_patterns:
+                            if pat.search(line.strip()):
+                                PrintStyle.info(
+                                    "Detected shell prompt, returning output early."
+                                )
+                                return truncated_output
 
             # Check for max execution time
             if now - start_time > max_exec_timeout:
@@ -1,41 +1,32 @@
-import os
 import asyncio
-from python.helpers import dotenv, memory, perplexity_search, duckduckgo_search
+from python.helpers import memory, search
 from python.helpers.tool import Tool, Response
 from python.helpers.print_style import PrintStyle
 from python.helpers.errors import handle_error
-from python.helpers.searxng import search as searxng
 from python.tools.memory_load import DEFAULT_THRESHOLD as DEFAULT_MEMORY_THRESHOLD
 
 SEARCH_ENGINE_RESULTS = 10
 
 
 class Knowledge(Tool):
+    read_only = True
+
     async def execute(self, question="", **kwargs):
-        # Create tasks for all three search methods
+        # Run online search and memory search concurrently
         tasks = [
-            self.searxng_search(question),
-            # self.perplexity_search(question),
-            # self.duckduckgo_search(question),
+            self.online_search(question),
             self.mem_search(question),
         ]
-
-        # Run all tasks concurrently
         results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # perplexity_result, duckduckgo_result, memory_result = results
-        searxng_result, memory_result = results
+        search_result, memory_result = results
 
         # Handle exceptions and format results
-        # perplexity_result = self.format_result(perplexity_result, "Perplexity")
-        # duckduckgo_result = self.format_result(duckduckgo_result, "DuckDuckGo")
-        searxng_result = self.format_result_searxng(searxng_result, "Search Engine")
+        search_result = self.format_result_search(search_result, "Search Engine")
         memory_result = self.format_result(memory_result, "Memory")
 
         msg = self.agent.read_prompt(
             "tool.knowledge.response.md",
-            #   online_sources = ((perplexity_result + "\n\n") if perplexity_result else "") + str(duckduckgo_result),
-            online_sources=((searxng_result + "\n\n") if searxng_result else ""),
+            online_sources=((search_result + "\n\n") if search_result else ""),
             memory=memory_result,
         )
 
@@ -45,26 +36,8 @@ class Knowledge(Tool):
 
         return Response(message=msg, break_loop=False)
 
-    async def perplexity_search(self, question):
-        if dotenv.get_dotenv_value("API_KEY_PERPLEXITY"):
-            return await asyncio.to_thread(
-                perplexity_search.perplexity_search, question
-            )
-        else:
-            PrintStyle.hint(
-                "No API key provided for Perplexity. Skipping Perplexity search."
-            )
-            self.agent.context.log.log(
-                type="hint",
-                content="No API key provided for Perplexity. Skipping Perplexity search.",
-            )
-            return None
-
-    async def duckduckgo_search(self, question):
-        return await asyncio.to_thread(duckduckgo_search.search, question)
-
-    async def searxng_search(self, question):
-        return await searxng(question)
+    async def online_search(self, question):
+        return await search.search(question, engines=self.agent.config.search_engines)
 
     async def mem_search(self, question: str):
         db = await memory.Memory.get(self.agent)
@@ -80,13 +53,19 @@ class Knowledge(Tool):
             return f"{source} search failed: {str(result)}"
         return result if result else ""
 
-    def format_result_searxng(self, result, source):
+    def format_result_search(self, result, source):
         if isinstance(result, Exception):
             handle_error(result)
             return f"{source} search failed: {str(result)}"
-
-        outputs = []
-        for item in result["results"]:
-            outputs.append(f"{item['title']}\n{item['url']}\n{item['content']}")
-
-        return "\n\n".join(outputs[:SEARCH_ENGINE_RESULTS]).strip()
+        return format_search_response(result, source)
+
+
+def format_search_response(response: search.SearchResponse, source: str) -> str:
+    text = response.format(SEARCH_ENGINE_RESULTS)
+    if response.errors:
+        for engine, error in response.errors.items():
+            PrintStyle.error(f"{source} {engine} failed: {error}")
+        if not text:
+            errors = "; ".join(f"{e}: {m}" for e, m in response.errors.items())
+            return f"{source} search failed: {errors}"
+    return text
@@ -7,6 +7,8 @@ DEFAULT_LIMIT = 10
 
 class MemoryLoad(Tool):
 
+    read_only = True
+
     async def execute(self, query="", threshold=DEFAULT_THRESHOLD, limit=DEFAULT_LIMIT, filter="", **kwargs):
         db = await Memory.get(self.agent)
         docs = await db.search_similarity_threshold(query=query, limit=limit, threshold=threshold, filter=filter)
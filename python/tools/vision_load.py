@@ -1,7 +1,7 @@
 import base64
 from python.helpers.print_style import PrintStyle
 from python.helpers.tool import Tool, Response
-from python.helpers import runtime, files, images
+from python.helpers import runtime, images
 from mimetypes import guess_type
 from python.helpers import history
 
@@ -12,42 +12,41 @@ TOKENS_ESTIMATE = 1500
 
 
 class VisionLoad(Tool):
+    read_only = True
+
     async def execute(self, paths: list[str] = [], **kwargs) -> Response:
 
         self.images_dict = {}
         template: list[dict[str, str]] = []  # type: ignore
 
-        for path in paths:
-            if not await runtime.call_development_function(files.exists, str(path)):
-                continue
+        # only images, unique paths, in order
+        image_paths = []
+        for path in map(str, paths):
+            mime_type, _ = guess_type(path)
+            if mime_type and mime_type.startswith("image/") and path not in image_paths:
+                image_paths.append(path)
 
-            if path not in self.images_dict:
-                mime_type, _ = guess_type(str(path))
-                if mime_type and mime_type.startswith("image/"):
-                    try:
-                        # Read binary file
-                        file_content = await runtime.call_development_function(
-                            files.read_file_base64, str(path)
-                        )
-                        file_content = base64.b64decode(file_content)
-                        # Compress and convert to JPEG
-                        compressed = images.compress_image(
-                            file_content, max_pixels=MAX_PIXELS, quality=QUALITY
-                        )
-                        # Encode as base64
-                        file_content_b64 = base64.b64encode(compressed).decode("utf-8")
+        # compressed in parallel next to the files, cached results come back instantly
+        results = await runtime.call_development_function(
+            images.compress_image_files, image_paths, MAX_PIXELS, QUALITY
+        ) if image_paths else []
 
-                        # DEBUG: Save compressed image
-                        # await runtime.call_development_function(
-                        #     files.write_file_base64, str(path), file_content_b64
-                        # )
+        timings = {}
+        for result in results:
+            path = result["path"]
+            if not result["exists"]:
+                continue
+            timings[path] = f"{result['seconds'] * 1000:.0f} ms" + (" (cached)" if result["cached"] else "")
+            if result["data"]:
+                # Encode as base64, always JPEG after compression
+                self.images_dict[path] = base64.b64encode(result["data"]).decode("utf-8")
+            else:
+                self.images_dict[path] = None
+                PrintStyle().error(f"Error processing image {path}: {result['error']}")
+                self.agent.context.log.log("warning", f"Error processing image {path}: {result['error']}")
 
-                        # Construct the data URL (always JPEG after compression)
-                        self.images_dict[path] = file_content_b64
-                    except Exception as e:
-                        self.images_dict[path] = None
-                        PrintStyle().error(f"Error processing image {path}: {e}")
-                        self.agent.context.log.log("warning", f"Error processing image {path}: {e}")
+        if timings:
+            self.log.update(timings=timings)
 
         return Response(message="dummy", break_loop=False)
 
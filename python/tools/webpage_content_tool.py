@@ -1,12 +1,16 @@
-import requests
+import asyncio
+import aiohttp
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 from newspaper import Article
 from python.helpers.tool import Tool, Response
 from python.helpers.errors import handle_error
+from python.helpers import web_fetch
 
 
 class WebpageContentTool(Tool):
+    read_only = True
+
     async def execute(self, url="", **kwargs):
         if not url:
             return Response(message="Error: No URL provided.", break_loop=False)
@@ -17,26 +21,29 @@ class WebpageContentTool(Tool):
             if not all([parsed_url.scheme, parsed_url.netloc]):
                 return Response(message="Error: Invalid URL format.", break_loop=False)
 
-            # Fetch webpage content
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-
-            # Use newspaper3k for article extraction
-            article = Article(url)
-            article.download()
-            article.parse()
+            # Fetch webpage content once, served from cache when still fresh
+            page = await web_fetch.fetch(url)
 
-            # If it's not an article, fall back to BeautifulSoup
-            if not article.text:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                text_content = ' '.join(soup.stripped_strings)
-            else:
-                text_content = article.text
+            # parsing is CPU bound, keep it off the event loop
+            text_content = await asyncio.to_thread(extract_text, page.url, page.text())
 
             return Response(message=f"Webpage content:\n\n{text_content}", break_loop=False)
 
-        except requests.RequestException as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             return Response(message=f"Error fetching webpage: {str(e)}", break_loop=False)
         except Exception as e:
             handle_error(e)
-            return Response(message=f"An error occurred: {str(e)}", break_loop=False)
\ No newline at end of file
+            return Response(message=f"An error occurred: {str(e)}", break_loop=False)
+
+
+def extract_text(url: str, html: str) -> str:
+    # Use newspaper3k for article extraction on the already downloaded html
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+
+    # If it's not an article, fall back to BeautifulSoup
+    if not article.text:
+        soup = BeautifulSoup(html, 'html.parser')
+        return ' '.join(soup.stripped_strings)
+    return article.text
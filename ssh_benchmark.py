@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import json
+import os
+import pty
+import socket
+import statistics
+import subprocess
+import threading
+import time
+
+import paramiko
+
+from python.helpers import strings
+from python.helpers.log import Log
+from python.helpers.shell_ssh import SSHInteractiveSession
+
+# Echo trimming benchmark of the SSH shell against a local stand-in server.
+# The stand-in is a paramiko ServerInterface that runs bash on a pty for every shell channel,
+# so the echo carries the real terminal rewrites ("> " continuation prompts, CRLF, escapes).
+# Reports the round trip per heredoc command and the time spent in IncrementalMatcher.feed.
+
+USERNAME = "bench"
+PASSWORD = "bench"
+DONE_MARKER = "@@bench-done@@"
+
+
+class StandInServer(paramiko.ServerInterface):
+    def __init__(self):
+        self.shell_requested = threading.Event()
+
+    def check_auth_password(self, username, password):
+        if (username, password) == (USERNAME, PASSWORD):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.shell_requested.set()
+        return True
+
+
+def serve(listener: socket.socket, host_key: paramiko.PKey):
+    while True:
+        try:
+            client, _ = listener.accept()
+        except OSError:
+            return  # listener closed
+        threading.Thread(target=_serve_client, args=(client, host_key), daemon=True).start()
+
+
+def _serve_client(client: socket.socket, host_key: paramiko.PKey):
+    transport = paramiko.Transport(client)
+    transport.add_server_key(host_key)
+    server = StandInServer()
+    transport.start_server(server=server)
+    while transport.is_active():
+        channel = transport.accept(timeout=1)
+        if channel is None:
+            continue
+        server.shell_requested.wait(10)
+        threading.Thread(target=_run_shell, args=(channel,), daemon=True).start()
+
+
+def _run_shell(channel: paramiko.Channel):
+    master, slave = pty.openpty()
+    env = {**os.environ, "PS1": "$ ", "TERM": "xterm"}
+    process = subprocess.Popen(
+        ["/bin/bash", "--norc", "--noprofile", "-i"],
+        stdin=slave, stdout=slave, stderr=slave, env=env, start_new_session=True,
+    )
+    os.close(slave)
+
+    def to_channel():
+        try:
+            while data := os.read(master, 4096):
+                channel.sendall(data)
+        except OSError:
+            pass  # bash exited
+        channel.close()
+
+    threading.Thread(target=to_channel, daemon=True).start()
+    try:
+        while data := channel.recv(4096):
+            os.write(master, data)
+    finally:
+        process.kill()
+        os.close(master)
+
+
+def heredoc(lines: int) -> str:
+    body = "".join(f"line {i} some text here for the heredoc\n" for i in range(lines))
+    return f"cat <<'EOF' >/dev/null\n{body}EOF\necho {DONE_MARKER}"
+
+
+async def run_command(session: SSHInteractiveSession, command: str, timeout: float) -> str:
+    session.send_command(command)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        full, _ = await session.read_output()
+        # the buffer keeps only the start and the end of long outputs
+        if DONE_MARKER in full.end(200).replace(f"echo {DONE_MARKER}", ""):
+            return full.start(len(full))
+        await session.wait_output(timeout=0.5)
+    raise TimeoutError(f"No {DONE_MARKER} within {timeout}s")
+
+
+async def run(args) -> dict:
+    host_key = paramiko.RSAKey.generate(2048)
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    threading.Thread(target=serve, args=(listener, host_key), daemon=True).start()
+
+    # time spent trimming the echo, wrapped the same way benchmark.py wraps agent phases
+    feed_times: list[float] = []
+    original_feed = strings.IncrementalMatcher.feed
+
+    def timed_feed(self, second):
+        start = time.perf_counter()
+        try:
+            return original_feed(self, second)
+        finally:
+            feed_times.append(time.perf_counter() - start)
+
+    strings.IncrementalMatcher.feed = timed_feed  # type: ignore
+    session = SSHInteractiveSession(Log(), "127.0.0.1", listener.getsockname()[1], USERNAME, PASSWORD)
+    round_trips, trims, leaked = [], [], 0
+    try:
+        await session.connect()
+        command = heredoc(args.lines)
+        for _ in range(args.runs):
+            feed_times.clear()
+            start = time.perf_counter()
+            output = await run_command(session, command, args.timeout)
+            round_trips.append(time.perf_counter() - start)
+            trims.append(sum(feed_times))
+            if "some text here for the heredoc" in output:
+                leaked += 1  # part of the echo was not trimmed
+    finally:
+        strings.IncrementalMatcher.feed = original_feed  # type: ignore
+        session.close()
+        listener.close()
+
+    return {
+        "runs": len(round_trips),
+        "command_bytes": len(command.encode()) + 1,
+        "round_trip_mean_ms": statistics.fmean(round_trips) * 1000,
+        "round_trip_p50_ms": statistics.median(round_trips) * 1000,
+        "trim_mean_ms": statistics.fmean(trims) * 1000,
+        "trim_max_ms": max(trims) * 1000,
+        "untrimmed_runs": leaked,
+    }
+
+
+def print_report(result: dict):
+    print(
+        f"{result['runs']} runs of a {result['command_bytes']} byte heredoc, "
+        f"round trip {result['round_trip_mean_ms']:.1f} ms mean, {result['round_trip_p50_ms']:.1f} ms p50"
+    )
+    print(f"echo trimming {result['trim_mean_ms']:.2f} ms mean, {result['trim_max_ms']:.2f} ms max")
+    if result["untrimmed_runs"]:
+        print(f"echo left in the output of {result['untrimmed_runs']} runs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSH shell echo trimming benchmark against a local stand-in server")
+    parser.add_argument("--runs", type=int, default=20, help="heredoc commands to send")
+    parser.add_argument("--lines", type=int, default=270, help="heredoc lines, 270 is about 11 KB")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds to wait for one command")
+    parser.add_argument("--json", default="", help="also write the report to this file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# tests import the app modules the same way the app does, from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True, scope="session")
+def html_log(tmp_path_factory):
+    # PrintStyle mirrors the console into logs/, keep test runs out of the repository
+    from python.helpers.print_style import LogSink, PrintStyle
+
+    sink = LogSink(str(tmp_path_factory.mktemp("logs")))
+    PrintStyle._sink, PrintStyle.log_file_path = sink, sink.path
+    yield
+    sink.close()
@@ -0,0 +1,72 @@
+import itertools
+import threading
+
+# In-memory stand-in for the parts of the docker SDK client the container pool uses.
+
+
+class FakeNotFound(Exception):
+    pass
+
+
+class FakeContainer:
+    def __init__(self, client: "FakeClient", image: str, name: str, ports: dict):
+        self.client = client
+        self.image = image
+        self.name = name
+        self.id = name
+        self.status = "running"
+        self.ports = {
+            port: [{"HostPort": str(next(client.host_ports))}]
+            for port in (ports or {})
+        }
+
+    def reload(self):
+        if self.name not in self.client.containers.by_name:
+            raise FakeNotFound(self.name)
+
+    def stop(self):
+        self.status = "exited"
+
+    def remove(self):
+        with self.client.lock:
+            self.client.containers.by_name.pop(self.name, None)
+            self.client.removed.append(self.name)
+
+
+class FakeContainers:
+    def __init__(self, client: "FakeClient"):
+        self.client = client
+        self.by_name: dict[str, FakeContainer] = {}
+
+    def run(self, image: str, detach: bool = True, ports=None, name: str = "", volumes=None):
+        container = FakeContainer(self.client, image, name, ports)
+        with self.client.lock:
+            self.by_name[name] = container
+            self.client.started.append(name)
+        return container
+
+    def list(self, all: bool = False, filters: dict | None = None):
+        filters = filters or {}
+        with self.client.lock:
+            containers = list(self.by_name.values())
+        return [
+            c
+            for c in containers
+            if (all or c.status == "running")
+            and c.image == filters.get("ancestor", c.image)
+            and filters.get("name", "") in c.name
+        ]
+
+    def get(self, name: str) -> FakeContainer:
+        if name not in self.by_name:
+            raise FakeNotFound(name)
+        return self.by_name[name]
+
+
+class FakeClient:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.host_ports = itertools.count(40000)
+        self.started: list[str] = []
+        self.removed: list[str] = []
+        self.containers = FakeContainers(self)
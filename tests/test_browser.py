@@ -0,0 +1,105 @@
+import asyncio
+import functools
+import http.server
+import threading
+
+import pytest
+
+from python.helpers import browser as browser_module
+from python.helpers.browser import Browser, BrowserPool
+
+
+class FakeContext:
+    def __init__(self, browser: "FakeBrowser"):
+        self.browser = browser
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **kwargs):
+        return FakeContext(self)
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.launched: list[FakeBrowser] = []
+        self.chromium = self
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+    async def launch(self, **kwargs):
+        browser = FakeBrowser()
+        self.launched.append(browser)
+        return browser
+
+
+def test_relaunch_closes_old_leases(monkeypatch):
+    playwright = FakePlaywright()
+    monkeypatch.setattr(browser_module, "async_playwright", lambda: playwright)
+
+    async def run():
+        pool = BrowserPool()
+        old = await pool.lease()
+        playwright.launched[0].connected = False  # chromium crashed
+
+        new = await pool.lease()
+        assert old.closed and not old.connected()
+        assert not new.closed and new.connected()
+        assert pool.leases == [new]
+        assert len(playwright.launched) == 2
+        await pool.shutdown()
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def static_server(tmp_path):
+    (tmp_path / "index.html").write_text(
+        "<html><head><title>Static</title></head>"
+        "<body><p>line1<br>line2</p><input name='q' placeholder='Search'></body></html>"
+    )
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=str(tmp_path))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/index.html"
+    server.shutdown()
+
+
+def test_reconnects_after_browser_disconnect(static_server):
+    async def run():
+        browser = Browser()
+        try:
+            await browser.open(static_server)
+        except Exception as e:
+            pytest.skip(f"chromium is not available: {e}")
+        try:
+            dom = await browser.get_clean_dom()
+            assert "line1 line2" in dom and "<title>Static</title>" in dom and 'placeholder="Search"' in dom
+
+            old = browser.lease
+            assert old
+            await old.pool.browser.close()  # type: ignore
+            await browser.open(static_server)
+            assert browser.lease is not old and old.closed
+            assert "line1 line2" in await browser.get_clean_dom()
+        finally:
+            await browser.close()
+            await BrowserPool.get().shutdown()
+
+    asyncio.run(run())
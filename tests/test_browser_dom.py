@@ -0,0 +1,61 @@
+import re
+
+import pytest
+
+from python.helpers.browser import Browser
+
+pytest.importorskip("bs4")
+from dom_benchmark import big_page, reference_clean_dom  # noqa: E402
+
+SELECTOR = Browser.selector_name
+
+PAGES = [
+    "<html><head><title>Static</title><style>p{}</style></head>"
+    "<body><p>line1<br>line2</p><hr>after rule</body></html>",
+    f'<div {SELECTOR}="1a"><a href="/x" {SELECTOR}="2a" aria-label="Home">Home</a>'
+    f'<span>one</span><span class="c">two</span><script>var x = 1;</script>three</div>',
+    f'<ul><li>first</li><li>second<svg><path d="M0"/></svg></li></ul>'
+    f'<input {SELECTOR}="3a" type="text" name="q" placeholder="Search" value="">'
+    f'<p invisible="true">hidden</p><p><strong>bold</strong> text</p>',
+    "<table><tr><td>a</td><td>b</td></tr><tr><th>c</th></tr></table>"
+    '<button name="go" type="submit">Go</button><noscript>js</noscript>tail text',
+]
+
+
+def normalize(html: str) -> str:
+    # the reference pretty printed, whitespace next to tags, attribute order
+    # and the void element syntax are not significant
+    def tag(match: re.Match) -> str:
+        name, attrs = match.group(1), re.findall(r'[\w-]+="[^"]*"', match.group(2))
+        return "<" + " ".join([name] + sorted(attrs)) + ">"
+
+    html = re.sub(r"<(\w+)([^>]*?)/?>", tag, html)
+    html = re.sub(r"\s*(<[^>]*>)\s*", r"\1", html)
+    return re.sub(r"\s+", " ", html).strip()
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_matches_reference(page):
+    assert normalize(Browser().clean_dom(page)) == normalize(reference_clean_dom(page))
+
+
+def test_removed_tags_keep_words_apart():
+    dom = Browser().clean_dom("<p>line1<br>line2</p><div>a<script>x</script>b</div>")
+    assert "line1 line2" in dom
+    assert "a b" in dom
+
+
+def test_title_kept():
+    dom = Browser().clean_dom("<html><head><title>Static</title></head><body>x</body></html>")
+    assert "<title>Static</title>" in dom
+
+
+def test_empty():
+    assert Browser().clean_dom("") == ""
+    assert Browser().clean_dom("  <!-- only a comment -->  ") == ""
+
+
+def test_large_page():
+    dom = Browser().clean_dom(big_page(2000))
+    assert "link 1999" in dom
+    assert "track(" not in dom
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+from python.helpers.docker import DockerContainerPool
+from tests.fake_docker import FakeClient
+
+
+class FakePool(DockerContainerPool):
+    # no SSH server behind fake containers, running means ready
+    def wait_ready(self, pooled, timeout=None):
+        return pooled.container.status == "running"
+
+
+def wait_until(condition, timeout: float = 5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def make_pool(client: FakeClient, size: int = 2) -> FakePool:
+    pool = FakePool(image="a0", size=size, client=client)
+    asyncio.run(pool.fill())
+    return pool
+
+
+def test_lease_and_refill():
+    client = FakeClient()
+    pool = make_pool(client)
+    assert len(pool.idle) == 2
+
+    leased = asyncio.run(pool.acquire("ctx1"))
+    assert asyncio.run(pool.acquire("ctx1")) is leased
+    assert leased.ssh_port and leased.http_port
+    wait_until(lambda: len(pool.idle) == 2)
+
+    pool.release("ctx1")
+    wait_until(lambda: leased.name in client.removed)
+    assert "ctx1" not in pool.leases
+
+
+def test_dead_idle_container_is_skipped():
+    client = FakeClient()
+    pool = make_pool(client)
+    dead = pool.idle[0]
+    dead.container.stop()
+
+    leased = asyncio.run(pool.acquire("ctx1"))
+    assert leased is not dead
+    assert leased.container.status == "running"
+    wait_until(lambda: dead.name in client.removed)
+
+
+def test_removed_idle_container_is_skipped():
+    client = FakeClient()
+    pool = make_pool(client, size=1)
+    gone = pool.idle[0]
+    gone.container.remove()
+
+    leased = asyncio.run(pool.acquire("ctx1"))
+    assert leased is not gone
+
+
+def test_stale_containers_removed_and_shutdown():
+    client = FakeClient()
+    client.containers.run("a0", name="A0-pool-stale")
+    client.containers.run("a0", name="other")
+    client.containers.run("other-image", name="A0-pool-foreign")
+
+    pool = FakePool(image="a0", size=1, client=client)
+    pool.remove_stale()
+    assert client.removed == ["A0-pool-stale"]
+
+    asyncio.run(pool.fill())
+    asyncio.run(pool.acquire("ctx1"))
+    pool.shutdown()
+    assert not pool.idle and not pool.leases
+    assert sorted(client.containers.by_name) == ["A0-pool-foreign", "other"]
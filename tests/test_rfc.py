@@ -0,0 +1,48 @@
+import io
+import json
+
+import pytest
+
+from python.helpers import rfc
+
+PASSWORD = "secret"
+SEED = b"0" * rfc.NONCE_SIZE
+
+
+def read_result(frames: bytes):
+    reader = rfc._FrameReader(rfc._SyncSource(io.BytesIO(frames)), PASSWORD, SEED)
+    frame_type, payload = reader.read_frame_sync()
+    assert frame_type == rfc.FRAME_RESULT
+    data = json.loads(payload)
+    blobs = [b"".join(reader.read_data_sync()) for _ in range(data["blobs"])]
+    return rfc._restore_bytes(data["result"], blobs)
+
+
+def result_frames(result) -> bytes:
+    return b"".join(rfc._result_frames(rfc._FrameWriter(PASSWORD, SEED), result))
+
+
+def test_large_json_result():
+    result = {"text": "x" * (5 * rfc.MAX_FRAME_SIZE), "items": list(range(1000))}
+    assert read_result(result_frames(result)) == result
+
+
+def test_bytes_split_into_chunks():
+    blob = bytes(range(256)) * (3 * rfc.CHUNK_SIZE // 256 + 7)
+    result = {"data": blob, "nested": [b"small"]}
+    assert read_result(result_frames(result)) == result
+
+
+def test_oversized_data_frame_rejected():
+    writer = rfc._FrameWriter(PASSWORD, SEED)
+    frames = writer.frame(rfc.FRAME_RESULT, json.dumps({"result": {rfc.BYTES_KEY: 0}, "blobs": 1}).encode())
+    frames += writer.frame(rfc.FRAME_DATA, b"x" * (rfc.MAX_FRAME_SIZE + 1))
+    with pytest.raises(Exception, match="too large"):
+        read_result(frames)
+
+
+def test_tampered_frame_rejected():
+    frames = bytearray(result_frames({"a": 1}))
+    frames[rfc.FRAME_HEADER.size] ^= 1
+    with pytest.raises(Exception, match="Invalid RFC hash"):
+        read_result(bytes(frames))
@@ -0,0 +1,108 @@
+import asyncio
+import http.server
+import json
+import threading
+
+import pytest
+
+from python.helpers import runtime, search, searxng, web_fetch
+from python.helpers.search import SearchResult, merge_results, normalize_url
+
+SEARXNG_RESULTS = [
+    {"title": "Example", "url": "https://www.example.com/page/", "content": "short"},
+    {"title": "Docs", "url": "https://docs.example.com/a?x=1", "content": "docs"},
+    {"title": "Example again", "url": "https://example.com/page", "content": "a longer snippet"},
+]
+
+
+@pytest.fixture
+def fake_searxng(monkeypatch):
+    requests = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+            requests.append(body)
+            data = json.dumps({"query": body, "results": SEARXNG_RESULTS}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(searxng, "URL", f"http://127.0.0.1:{server.server_port}/search")
+    monkeypatch.setattr(runtime, "is_development", lambda: False)  # no RFC to a container
+    search.clear_cache()
+    yield requests
+    search.clear_cache()
+    server.shutdown()
+
+
+def run_search(*args, **kwargs) -> search.SearchResponse:
+    async def run():
+        try:
+            return await search.search(*args, **kwargs)
+        finally:
+            await web_fetch.close_session()
+
+    return asyncio.run(run())
+
+
+def test_searxng_results_merged_and_cached(fake_searxng):
+    response = run_search("Example  Query")
+    assert not response.errors
+    assert [r.title for r in response.results] == ["Example", "Docs"]
+    assert response.results[0].content == "a longer snippet"
+    assert response.results[0].engines == ["searxng"]
+    assert "q=Example" in fake_searxng[0]
+
+    # normalized query hits the cache
+    assert run_search("example query") is response
+    assert len(fake_searxng) == 1
+
+
+def test_engine_errors_reported_and_not_cached(fake_searxng, monkeypatch):
+    async def failing(query):
+        raise Exception("engine down")
+
+    monkeypatch.setitem(search.ENGINES, "duckduckgo", failing)
+    response = run_search("query", engines=("searxng", "duckduckgo"))
+    assert response.errors == {"duckduckgo": "engine down"}
+    assert len(response.results) == 2
+    assert set(response.timings) == {"searxng", "duckduckgo"}
+
+    run_search("query", engines=("searxng", "duckduckgo"))
+    assert len(fake_searxng) == 2
+
+
+def test_normalize_url():
+    assert normalize_url("https://WWW.Example.com/page/") == "example.com/page"
+    assert normalize_url("http://example.com/page?q=1") == "example.com/page?q=1"
+    assert normalize_url("") == ""
+
+
+def test_merge_results_dedupes_across_engines():
+    first = [
+        SearchResult("A", "https://a.com/", "a", ["searxng"]),
+        SearchResult("B", "https://b.com", "b", ["searxng"]),
+    ]
+    second = [
+        SearchResult("B2", "https://www.b.com/", "longer b", ["duckduckgo"]),
+        SearchResult("C", "https://c.com", "c", ["duckduckgo"]),
+    ]
+    merged = merge_results([first, second])
+
+    assert [r.url for r in merged] == ["https://b.com", "https://a.com/", "https://c.com"]
+    assert merged[0].title == "B" and merged[0].content == "longer b"
+    assert merged[0].engines == ["searxng", "duckduckgo"]
+    assert merged[0].score == pytest.approx(1 / 61 + 1 / 60)
+
+
+def test_merge_results_without_url_uses_title():
+    merged = merge_results([[SearchResult("T", "", "x")], [SearchResult("T", "", "y")]])
+    assert len(merged) == 1
@@ -0,0 +1,27 @@
+from python.helpers.shell_ssh import SSHInteractiveSession
+
+
+def session() -> SSHInteractiveSession:
+    # output handling only, no connection
+    s = SSHInteractiveSession.__new__(SSHInteractiveSession)
+    s.reset_full_output()
+    return s
+
+
+def test_lines_committed_and_cleaned():
+    s = session()
+    s._append_output("\x1b[32mok\x1b[0m\nprogress 10%\rprogress 50%")
+    s._append_output("\rprogress 100%\ndone")
+    assert s.full_output.start(100) == "ok\nprogress 100%\ndone"
+
+
+def test_long_line_without_newline_stays_bounded():
+    s = session()
+    keep = s.full_output.keep
+    for _ in range(1000):
+        s._append_output("x" * 1000)
+    s._append_output("end\n")
+    assert len(s._line) == 0
+    assert len(s.full_output) == 1000 * 1000 + 4
+    assert len(s.full_output.tail) <= 2 * keep
+    assert s.full_output.end(4) == "end\n"
@@ -0,0 +1,64 @@
+import re
+
+from python.helpers.strings import IncrementalMatcher, calculate_valid_match_lengths
+
+# same patterns as the SSH shell echo trimming, shell_ssh needs paramiko to import
+ECHO_IGNORE_PATTERNS = [
+    re.compile(rb"\x1b\[\?\d{4}[a-zA-Z](?:> )?"),
+    re.compile(rb"\r"),
+    re.compile(rb">\s"),
+]
+
+
+def heredoc(lines: int) -> bytes:
+    body = "".join(f"line {i} some text here for the heredoc\n" for i in range(lines))
+    return f"cat <<'EOF'\n{body}EOF\n".encode()
+
+
+def terminal_echo(command: bytes) -> bytes:
+    # bash echoes continuation lines with a "> " prompt and CRLF line ends
+    return command.replace(b"\n", b"\r\n> ")[:-2]
+
+
+def trim(command: bytes, output: bytes, chunk: int) -> bytes:
+    matcher = IncrementalMatcher(command, 8, 2, ECHO_IGNORE_PATTERNS)
+    rest = b""
+    for k in range(0, len(output), chunk):
+        data = output[k : k + chunk]
+        if not matcher.done:
+            data = data[matcher.feed(data) :]
+        rest += data
+    return rest
+
+
+def test_echo_trimmed_across_chunks():
+    command = b"echo hello\n"
+    output = terminal_echo(command) + b"hello\r\n"
+    for chunk in (1, 3, 7, len(output)):
+        assert trim(command, output, chunk) == b"hello\r\n"
+
+
+def test_escape_sequences_ignored():
+    command = b"echo hello\n"
+    output = b"\x1b[?2004l" + terminal_echo(command) + b"hello\r\n"
+    assert trim(command, output, len(output)) == b"hello\r\n"
+
+
+def test_heredoc_echo_trimmed():
+    command = heredoc(270)
+    output = terminal_echo(command) + b"line 0 some text\r\n"
+    assert trim(command, output, 1024) == b"line 0 some text\r\n"
+
+
+def test_output_kept_without_echo():
+    command = b"ls\n"
+    assert trim(command, b"total 0\r\n", 4) == b"total 0\r\n"
+
+
+def test_matches_whole_string_version():
+    command = b"python3 -c 'print(1)'\n"
+    output = terminal_echo(command) + b"1\r\n"
+    _, whole = calculate_valid_match_lengths(command, output, 8, 2, ECHO_IGNORE_PATTERNS)
+    matcher = IncrementalMatcher(command, 8, 2, ECHO_IGNORE_PATTERNS)
+    assert matcher.feed(output) == whole
+
@@ -0,0 +1,86 @@
+import asyncio
+import http.server
+import threading
+
+import pytest
+
+from python.helpers import web_fetch
+
+BODY = bytes(range(256)) * 2000  # 512 KB, many network chunks
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    requests = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            requests.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            if self.path == "/chunked":
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i in range(0, len(BODY), 10000):
+                    part = BODY[i : i + 10000]
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+                self.wfile.write(b"0\r\n\r\n")
+            else:
+                self.send_header("Content-Length", str(len(BODY)))
+                self.end_headers()
+                self.wfile.write(BODY)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(web_fetch, "CACHE_FOLDER", str(tmp_path))
+    yield f"http://127.0.0.1:{server.server_port}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(url: str, **kwargs) -> web_fetch.FetchResult:
+    async def run():
+        return await web_fetch.fetch(url, **kwargs)
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("path", ["/plain", "/chunked"])
+def test_large_body_read_to_the_end_and_cached(server, path):
+    base, requests = server
+    result = fetch(base + path)
+    assert result.content == BODY
+    assert not result.from_cache
+
+    cached = fetch(base + path)
+    assert cached.from_cache and cached.content == BODY
+    assert len(requests) == 1
+
+
+def test_body_over_limit_rejected_and_not_cached(server, monkeypatch):
+    base, requests = server
+    monkeypatch.setattr(web_fetch, "MAX_CONTENT_LENGTH", len(BODY) - 1)
+    for _ in range(2):
+        with pytest.raises(Exception, match="too large"):
+            fetch(base + "/chunked")
+    assert len(requests) == 2
+
+
+def test_session_closed_with_its_loop(server):
+    base, _ = server
+    sessions = []
+
+    async def run():
+        sessions.append(web_fetch.get_session())
+        await web_fetch.fetch(base + "/plain", ttl=0)
+
+    asyncio.run(run())
+    asyncio.run(run())
+    assert sessions[0] is not sessions[1]
+    assert all(session.closed for session in sessions)
+    assert not web_fetch._sessions and not web_fetch._guards
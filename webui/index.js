@@ -283,7 +283,8 @@ window.loadKnowledge = async function () {
             toast(await response.text(), "error");
         } else {
             const data = await response.json();
-            toast("Knowledge files imported: " + data.filenames.join(", "), "success");
+            toast("Importing knowledge files: " + data.filenames.join(", "), "info");
+            await waitForKnowledgeJob(data.job_id, data.filenames);
         }
         } catch (e) {
             toastFetchError("Error loading knowledge", e)
@@ -293,6 +294,40 @@ window.loadKnowledge = async function () {
     input.click();
 }
 
+async function waitForKnowledgeJob(jobId, filenames) {
+    // ingestion runs in the background, poll until it finishes or we give up
+    const deadline = Date.now() + 30 * 60 * 1000;
+    let failures = 0;
+    while (Date.now() < deadline) {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        let job;
+        try {
+            job = await sendJsonData("/import_knowledge_status", { job_id: jobId });
+            failures = 0;
+        } catch (e) {
+            // unknown job, e.g. after a backend restart, will never finish
+            if (e.message.includes("not found")) {
+                toast("Knowledge import status lost: " + filenames.join(", "), "error");
+                return;
+            }
+            if (++failures >= 10) {
+                toastFetchError("Error checking knowledge import", e);
+                return;
+            }
+            continue;
+        }
+        if (job.state === "done") {
+            toast("Knowledge files imported: " + filenames.join(", "), "success");
+            return;
+        }
+        if (job.state === "error") {
+            toast("Knowledge import failed: " + job.error, "error");
+            return;
+        }
+    }
+    toast("Knowledge import is still running: " + filenames.join(", "), "info");
+}
+
 
 function adjustTextareaHeight() {
     chatInput.style.height = 'auto';